@@ -0,0 +1,368 @@
+"""
+A reusable core for adversarial (minimax-style) search.
+
+`AdversarialSearch` runs minimax, alpha-beta, or expectimax with:
+ - iterative deepening (optionally under a time budget),
+ - move ordering from the previous iteration (and from the transposition table),
+ - a bounded `TranspositionTable` keyed on the game state hash.
+
+Depth is measured the same way as `pacai.agents.search.multiagent.MultiAgentSearchAgent`
+expects: a single level of depth is one move by every agent.
+"""
+
+import logging
+import time
+
+from pacai.core.directions import Directions
+
+MINIMAX = 'minimax'
+ALPHA_BETA = 'alphabeta'
+EXPECTIMAX = 'expectimax'
+SEARCH_TYPES = [MINIMAX, ALPHA_BETA, EXPECTIMAX]
+
+# What kind of value is stored in a transposition table entry.
+BOUND_EXACT = 0
+BOUND_LOWER = 1
+BOUND_UPPER = 2
+
+# How many nodes to expand between checks of the clock.
+TIME_CHECK_INTERVAL = 128
+
+class TranspositionTable(object):
+    """
+    A bounded table of search results keyed on (state hash, agent index).
+    Each entry holds the remaining depth that was searched, the value, the bound type,
+    and the best action found (which is used for move ordering).
+
+    When the table is full, the oldest entry is evicted.
+    An existing entry is only replaced by a search that was at least as deep.
+    """
+
+    def __init__(self, maxSize):
+        if (maxSize <= 0):
+            raise ValueError('Transposition tables need a positive size, got: %d.' % (maxSize))
+
+        self._maxSize = maxSize
+        self._entries = {}
+
+        self._hits = 0
+        self._lookups = 0
+
+    def clear(self):
+        self._entries.clear()
+
+    def get(self, key):
+        """
+        Get the (depth, value, bound, action) entry for a key, or None.
+        """
+
+        self._lookups += 1
+
+        entry = self._entries.get(key)
+        if (entry is not None):
+            self._hits += 1
+
+        return entry
+
+    def getHitCount(self):
+        return self._hits
+
+    def getLookupCount(self):
+        return self._lookups
+
+    def getMaxSize(self):
+        return self._maxSize
+
+    def put(self, key, depth, value, bound, action):
+        entries = self._entries
+
+        oldEntry = entries.get(key)
+        if (oldEntry is not None):
+            if (oldEntry[0] > depth):
+                return
+
+            # Remove the entry so it is re-inserted as the newest.
+            del entries[key]
+        elif (len(entries) >= self._maxSize):
+            # Dicts keep insertion order, so the first key is the oldest.
+            del entries[next(iter(entries))]
+
+        entries[key] = (depth, value, bound, action)
+
+    def __len__(self):
+        return len(self._entries)
+
+class SearchTimeout(Exception):
+    """
+    Raised inside a search when the time budget runs out.
+    """
+
+    pass
+
+class AdversarialSearch(object):
+    """
+    Search for the best action of a single (maximizing) agent.
+    All other agents are minimizers (MINIMAX, ALPHA_BETA)
+    or choose uniformly at random (EXPECTIMAX).
+
+    Each call to `AdversarialSearch.getAction` runs iterative deepening from depth 1 to `maxDepth`.
+    If there is a `timeLimit` (in seconds), then the search stops when the time runs out
+    and the action from the deepest completed iteration is used.
+    The transposition table (if `ttSize` is positive) is kept between calls.
+    """
+
+    def __init__(self, evaluationFunction, agentIndex = 0, searchType = ALPHA_BETA,
+            maxDepth = 2, timeLimit = None, ttSize = 0):
+        if (searchType not in SEARCH_TYPES):
+            raise ValueError('Unknown search type: "%s". Expected one of: %s.' %
+                    (searchType, SEARCH_TYPES))
+
+        self._evaluationFunction = evaluationFunction
+        self._agentIndex = agentIndex
+        self._searchType = searchType
+        self._maxDepth = int(maxDepth)
+
+        self._timeLimit = None
+        if (timeLimit is not None):
+            self._timeLimit = float(timeLimit)
+
+        self._table = None
+        if (ttSize > 0):
+            self._table = TranspositionTable(int(ttSize))
+
+        self._deadline = None
+        self._nodeCount = 0
+        self._hitCutoff = False
+        self._completedDepth = 0
+
+    def getAction(self, state):
+        actions = self._getActions(state, self._agentIndex)
+
+        self._nodeCount = 0
+        self._completedDepth = 0
+
+        self._deadline = None
+        if (self._timeLimit is not None):
+            self._deadline = time.time() + self._timeLimit
+
+        bestAction = actions[0]
+
+        for depth in range(1, self._maxDepth + 1):
+            self._hitCutoff = False
+
+            try:
+                bestAction, values = self._searchRoot(state, depth * state.getNumAgents(), actions)
+            except SearchTimeout:
+                break
+
+            self._completedDepth = depth
+
+            # Search the best actions first on the next iteration.
+            # The sort is stable, so the best action stays in front of ties.
+            actions.remove(bestAction)
+            actions.sort(key = lambda action: values[action], reverse = True)
+            actions.insert(0, bestAction)
+
+            # The whole game tree fit in this iteration, going deeper won't change anything.
+            if (not self._hitCutoff):
+                break
+
+        logging.debug('Adversarial search (%s) reached depth %d (%d nodes).' %
+                (self._searchType, self._completedDepth, self._nodeCount))
+
+        return bestAction
+
+    def getCompletedDepth(self):
+        """
+        Get the deepest iteration that was completed by the last call to getAction().
+        """
+
+        return self._completedDepth
+
+    def getNodeCount(self):
+        """
+        Get the number of nodes visited by the last call to getAction().
+        """
+
+        return self._nodeCount
+
+    def getTranspositionTable(self):
+        return self._table
+
+    def _getActions(self, state, agentIndex, firstAction = None):
+        actions = state.getLegalActions(agentIndex)
+
+        if (len(actions) > 1 and Directions.STOP in actions):
+            actions.remove(Directions.STOP)
+
+        if (firstAction is not None and firstAction in actions and actions[0] != firstAction):
+            actions.remove(firstAction)
+            actions.insert(0, firstAction)
+
+        return actions
+
+    def _searchRoot(self, state, remaining, actions):
+        """
+        Search all the actions of the root (in order).
+        Returns the best action and a dict of the value of each action.
+        """
+
+        alpha = float('-inf')
+        beta = float('inf')
+
+        nextAgent = (self._agentIndex + 1) % state.getNumAgents()
+
+        values = {}
+        bestAction = None
+        bestValue = float('-inf')
+
+        for action in actions:
+            successor = state.generateSuccessor(self._agentIndex, action)
+
+            if (self._searchType == EXPECTIMAX):
+                value = self._expectimax(successor, nextAgent, remaining - 1)
+            else:
+                value = self._minimax(successor, nextAgent, remaining - 1, alpha, beta)
+
+            values[action] = value
+
+            if (bestAction is None or value > bestValue):
+                bestAction = action
+                bestValue = value
+
+            if (self._searchType == ALPHA_BETA):
+                alpha = max(alpha, value)
+
+        return bestAction, values
+
+    def _visit(self):
+        self._nodeCount += 1
+
+        if (self._deadline is not None and self._nodeCount % TIME_CHECK_INTERVAL == 0
+                and time.time() > self._deadline):
+            raise SearchTimeout()
+
+    def _minimax(self, state, agentIndex, remaining, alpha, beta):
+        """
+        Minimax with optional (fail-soft) alpha-beta pruning.
+        Without pruning, alpha and beta stay infinite and every value is exact.
+        """
+
+        self._visit()
+
+        if (state.isOver()):
+            return self._evaluationFunction(state)
+
+        if (remaining <= 0):
+            self._hitCutoff = True
+            return self._evaluationFunction(state)
+
+        table = self._table
+        bestAction = None
+
+        if (table is not None):
+            key = (hash(state), agentIndex)
+            entry = table.get(key)
+
+            if (entry is not None):
+                depth, value, bound, bestAction = entry
+
+                # The stored search may have been cut off, so assume that deeper searches can help.
+                if (depth >= remaining):
+                    if (bound == BOUND_EXACT):
+                        self._hitCutoff = True
+                        return value
+                    elif (bound == BOUND_LOWER and value >= beta):
+                        self._hitCutoff = True
+                        return value
+                    elif (bound == BOUND_UPPER and value <= alpha):
+                        self._hitCutoff = True
+                        return value
+
+        prune = (self._searchType == ALPHA_BETA)
+        isMax = (agentIndex == self._agentIndex)
+        nextAgent = (agentIndex + 1) % state.getNumAgents()
+        originalAlpha = alpha
+        originalBeta = beta
+
+        bestValue = None
+        for action in self._getActions(state, agentIndex, bestAction):
+            successor = state.generateSuccessor(agentIndex, action)
+            value = self._minimax(successor, nextAgent, remaining - 1, alpha, beta)
+
+            if (isMax):
+                if (bestValue is None or value > bestValue):
+                    bestValue = value
+                    bestAction = action
+
+                if (prune):
+                    alpha = max(alpha, value)
+            else:
+                if (bestValue is None or value < bestValue):
+                    bestValue = value
+                    bestAction = action
+
+                if (prune):
+                    beta = min(beta, value)
+
+            if (prune and alpha >= beta):
+                break
+
+        if (table is not None):
+            bound = BOUND_EXACT
+            if (bestValue <= originalAlpha):
+                bound = BOUND_UPPER
+            elif (bestValue >= originalBeta):
+                bound = BOUND_LOWER
+
+            table.put(key, remaining, bestValue, bound, bestAction)
+
+        return bestValue
+
+    def _expectimax(self, state, agentIndex, remaining):
+        self._visit()
+
+        if (state.isOver()):
+            return self._evaluationFunction(state)
+
+        if (remaining <= 0):
+            self._hitCutoff = True
+            return self._evaluationFunction(state)
+
+        table = self._table
+        bestAction = None
+
+        if (table is not None):
+            key = (hash(state), agentIndex)
+            entry = table.get(key)
+
+            if (entry is not None):
+                depth, value, bound, bestAction = entry
+                if (depth >= remaining):
+                    self._hitCutoff = True
+                    return value
+
+        nextAgent = (agentIndex + 1) % state.getNumAgents()
+        actions = self._getActions(state, agentIndex, bestAction)
+
+        if (agentIndex == self._agentIndex):
+            bestValue = None
+            for action in actions:
+                successor = state.generateSuccessor(agentIndex, action)
+                value = self._expectimax(successor, nextAgent, remaining - 1)
+
+                if (bestValue is None or value > bestValue):
+                    bestValue = value
+                    bestAction = action
+        else:
+            bestValue = 0.0
+            for action in actions:
+                successor = state.generateSuccessor(agentIndex, action)
+                bestValue += self._expectimax(successor, nextAgent, remaining - 1)
+
+            bestValue /= len(actions)
+
+        if (table is not None):
+            table.put(key, remaining, bestValue, BOUND_EXACT, bestAction)
+
+        return bestValue
@@ -5,6 +5,7 @@ from typing import Callable, Union
 from pacai.agents.base import BaseAgent
 from pacai.core.directions import Directions
 from pacai.core.gamestate import AbstractGameState
+from pacai.core.search.anytime import SearchResult
 from pacai.core.search.heuristic import null as nullHeuristic
 from pacai.core.search.position import PositionSearchProblem
 from pacai.core.search.problem import SearchProblem
@@ -19,12 +20,17 @@ class SearchAgent(BaseAgent):
 
     As a default, this agent runs `pacai.student.search.depthFirstSearch` on a
     `pacai.core.search.position.PositionSearchProblem` to find location (1, 1).
+
+    Search functions that are given by name can also be given a `budget` (the most nodes to expand)
+    and a `weight` (e.g. the functions in `pacai.core.search.anytime`).
     """
 
     def __init__(self, index,
             fn: Union[str, Callable[[SearchProblem], any]] = depthFirstSearch,
             prob: Union[str, Callable[[AbstractGameState], SearchProblem]] = PositionSearchProblem,
             heuristic: Union[str, Callable] = nullHeuristic,
+            budget: Union[str, int, None] = None,
+            weight: Union[str, float, None] = None,
             **kwargs):
         super().__init__(index, **kwargs)
 
@@ -38,7 +44,7 @@ class SearchAgent(BaseAgent):
 
         if isinstance(fn, str):
             # Get the search function from the name and heuristic.
-            self.searchFunction = self._fetchSearchFunction(fn, heuristic)
+            self.searchFunction = self._fetchSearchFunction(fn, heuristic, budget, weight)
         else:
             # Use provided search function and ignore heuristic.
             self.searchFunction = fn
@@ -68,6 +74,11 @@ class SearchAgent(BaseAgent):
         self._actions = self.searchFunction(problem)  # Find a path.
         self._actionIndex = 0
 
+        # Bounded searches also return statistics.
+        if (isinstance(self._actions, SearchResult)):
+            logging.info('Search result: %s' % (self._actions))
+            self._actions = self._actions.actions or []
+
         totalCost = problem.actionsCost(self._actions)
 
         state.setHighlightLocations(problem.getVisitHistory())
@@ -91,26 +102,45 @@ class SearchAgent(BaseAgent):
 
         return action
 
-    def _fetchSearchFunction(self, functionName: str, heuristic: Union[str, Callable]):
+    def _fetchSearchFunction(self, functionName: str, heuristic: Union[str, Callable],
+            budget = None, weight = None):
         """
         Get the specified search function by name.
         If that function also takes a heurisitc (i.e. has a parameter called "heuristic"),
         then return a lambda that binds the heuristic to the function.
+        A budget and weight (if given) are bound the same way,
+        but the function must take them.
         """
 
         # Locate the function.
         function = reflection.qualifiedImport(functionName)
+        parameters = function.__code__.co_varnames[:function.__code__.co_argcount]
+
+        boundArgs = {}
+
+        if (budget is not None):
+            boundArgs['budget'] = int(budget)
+
+        if (weight is not None):
+            boundArgs['weight'] = float(weight)
+
+        for name in boundArgs:
+            if (name not in parameters):
+                raise ValueError('Search function %s does not take a %s.' % (functionName, name))
 
         # Check if the function has a heuristic.
-        if 'heuristic' not in function.__code__.co_varnames:
+        if 'heuristic' in parameters:
+            if isinstance(heuristic, str):
+                # Fetch the heuristic.
+                heuristic = reflection.qualifiedImport(heuristic)
+
+            boundArgs['heuristic'] = heuristic
+
+        if (len(boundArgs) == 0):
             logging.info('[SearchAgent] using function %s.' % (functionName))
             return function
 
-        if isinstance(heuristic, str):
-            # Fetch the heuristic.
-            heuristic = reflection.qualifiedImport(heuristic)
-        logging.info('[SearchAgent] using function %s and heuristic %s.' %
-                (functionName, heuristic))
+        logging.info('[SearchAgent] using function %s with %s.' % (functionName, boundArgs))
 
-        # Bind the heuristic.
-        return lambda x: function(x, heuristic = heuristic)
+        # Bind the arguments.
+        return lambda x: function(x, **boundArgs)
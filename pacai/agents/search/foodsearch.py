@@ -1,16 +1,17 @@
 from pacai.agents.search.base import SearchAgent
 from pacai.core.search import search
-from pacai.core.search.food import FoodSearchProblem
+from pacai.core.search.food import PackedFoodSearchProblem
 from pacai.student import searchAgents
 
 class AStarFoodSearchAgent(SearchAgent):
     """
-    A search agent for `pacai.core.search.food.FoodSearchProblem using A*
+    A search agent for `pacai.core.search.food.FoodSearchProblem` using A*
     and `pacai.student.searchAgents.foodHeuristic`.
+    The problem uses packed states (`pacai.core.search.food.PackedFoodSearchProblem`).
     """
 
     def __init__(self, index, **kwargs):
         super().__init__(index,
                          fn = lambda prob: search.astar(prob, searchAgents.foodHeuristic),
-                         prob = FoodSearchProblem,
+                         prob = PackedFoodSearchProblem,
                          **kwargs)
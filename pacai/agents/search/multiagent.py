@@ -1,19 +1,65 @@
 from pacai.agents.base import BaseAgent
+from pacai.agents.search.adversarial import AdversarialSearch
 from pacai.util import reflection
 
 class MultiAgentSearchAgent(BaseAgent):
     """
     A common class for all multi-agent searchers.
+
+    Subclasses can opt in to the shared search core (`pacai.agents.search.adversarial`)
+    by calling `MultiAgentSearchAgent.getSearchCore` in their `getAction`.
+    The core is configured with agent args:
+     - depth: The (maximum) search depth.
+     - timeLimit: A time budget (in seconds) for each move.
+       The search deepens iteratively until the budget runs out.
+     - ttSize: The number of entries in the transposition table (zero means no table).
     """
 
-    def __init__(self, index, evalFn = 'pacai.core.eval.score', depth = 2, **kwargs):
+    def __init__(self, index, evalFn = 'pacai.core.eval.score', depth = 2,
+            timeLimit = None, ttSize = 0, **kwargs):
         super().__init__(index, **kwargs)
 
         self._evaluationFunction = reflection.qualifiedImport(evalFn)
         self._treeDepth = int(depth)
 
+        self._timeLimit = None
+        if (timeLimit is not None):
+            self._timeLimit = float(timeLimit)
+
+        self._ttSize = int(ttSize)
+
+        # Search cores are built on demand (see getSearchCore()).
+        self._searchCores = {}
+
     def getEvaluationFunction(self):
         return self._evaluationFunction
 
+    def getSearchCore(self, searchType):
+        """
+        Get the `pacai.agents.search.adversarial.AdversarialSearch` of the given type
+        configured with this agent's args.
+        The same core is returned for every call, so its transposition table lasts the whole game.
+        """
+
+        if (searchType not in self._searchCores):
+            self._searchCores[searchType] = AdversarialSearch(self._evaluationFunction,
+                    agentIndex = self.index, searchType = searchType, maxDepth = self._treeDepth,
+                    timeLimit = self._timeLimit, ttSize = self._ttSize)
+
+        return self._searchCores[searchType]
+
+    def getTimeLimit(self):
+        return self._timeLimit
+
+    def getTranspositionTableSize(self):
+        return self._ttSize
+
     def getTreeDepth(self):
         return self._treeDepth
+
+    def usesSearchCore(self):
+        """
+        Check if this agent was given any of the args that are only supported by the search core.
+        """
+
+        return (self._timeLimit is not None or self._ttSize > 0)
@@ -0,0 +1,16 @@
+"""
+The `pacai.bench` package contains benchmarks for the hot paths of the engine
+(game states, grids, maze distances, search, and full games).
+
+Run all the benchmarks and write the results as JSON with:
+```
+python -m pacai.bench --output results.json
+```
+
+Then check a later run for regressions with:
+```
+python -m pacai.bench --baseline results.json
+```
+
+See `pacai.bench.runner` for all the options.
+"""
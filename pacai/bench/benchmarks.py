@@ -0,0 +1,231 @@
+"""
+The benchmarks that `pacai.bench.runner` knows how to run.
+
+A benchmark is a name and a setup function.
+The setup function does all the work that should not be timed,
+and returns a function to time (that takes no arguments) along with the number of operations
+that one call to that function performs.
+"""
+
+import glob
+import os
+import random
+
+from pacai.agents.base import BaseAgent
+from pacai.bin import capture
+from pacai.bin import pacman
+from pacai.core import distanceCalculator
+from pacai.core.grid import BitGrid
+from pacai.core.grid import Grid
+from pacai.core.layout import getLayout
+from pacai.core.search import heuristic
+from pacai.core.search.food import FoodSearchProblem
+from pacai.core.search.position import PositionSearchProblem
+from pacai.student import search
+from pacai.ui.capture.null import CaptureNullView
+from pacai.ui.pacman.null import PacmanNullView
+
+SEED = 4
+
+NUM_WALK_MOVES = 500
+NUM_GRID_OPERATIONS = 10000
+NUM_MINIMAX_STATES = 5
+MINIMAX_DEPTHS = [2, 3, 4]
+
+SEARCH_LAYOUTS = [
+    ('bigMaze', PositionSearchProblem, heuristic.manhattan),
+    ('trickySearch', FoodSearchProblem, heuristic.numFood),
+]
+
+LAYOUT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))),
+        'core', 'layouts')
+
+class Benchmark(object):
+    def __init__(self, name, setup):
+        self.name = name
+        self.setup = setup
+
+def getBenchmarks():
+    """
+    Get all the benchmarks (in a fixed order).
+    """
+
+    benchmarks = []
+
+    for gameType in ['pacman', 'capture']:
+        benchmarks.append(Benchmark('gamestate.generateSuccessor.' + gameType,
+                _bind(_setupGenerateSuccessor, gameType)))
+        benchmarks.append(Benchmark('gamestate.getLegalActions.' + gameType,
+                _bind(_setupGetLegalActions, gameType)))
+
+    for gridClass in [Grid, BitGrid]:
+        for operation in ['copy', 'count', 'hash']:
+            benchmarks.append(Benchmark('grid.%s.%s' % (operation, gridClass.__name__),
+                    _bind(_setupGrid, gridClass, operation)))
+
+    for layoutName in _getLayoutNames():
+        benchmarks.append(Benchmark('distances.computeDistances.' + layoutName,
+                _bind(_setupComputeDistances, layoutName)))
+
+    for (layoutName, problemClass, searchHeuristic) in SEARCH_LAYOUTS:
+        searchFunctions = [
+            ('bfs', search.breadthFirstSearch),
+            ('ucs', search.uniformCostSearch),
+            ('astar', _bind(search.aStarSearch, heuristic = searchHeuristic)),
+        ]
+
+        for (functionName, searchFunction) in searchFunctions:
+            benchmarks.append(Benchmark('search.%s.%s' % (functionName, layoutName),
+                    _bind(_setupSearch, layoutName, problemClass, searchFunction)))
+
+    for depth in MINIMAX_DEPTHS:
+        benchmarks.append(Benchmark('multiagent.minimax.depth%d' % (depth),
+                _bind(_setupMinimax, depth)))
+
+    benchmarks.append(Benchmark('game.pacman.mediumClassic', _setupPacmanGame))
+    benchmarks.append(Benchmark('game.capture.defaultCapture', _setupCaptureGame))
+
+    return benchmarks
+
+def _bind(function, *args, **kwargs):
+    def bound(*moreArgs):
+        return function(*args, *moreArgs, **kwargs)
+
+    return bound
+
+def _getLayoutNames():
+    paths = glob.glob(os.path.join(LAYOUT_DIR, '*.lay'))
+    return sorted([os.path.splitext(os.path.basename(path))[0] for path in paths])
+
+def _getStartingState(gameType):
+    if (gameType == 'pacman'):
+        return pacman.PacmanGameState(getLayout('mediumClassic'))
+
+    return capture.CaptureGameState(getLayout('defaultCapture'), 1200)
+
+def _randomWalk(gameType, numMoves):
+    """
+    Get a list of (state, agentIndex, action) from a seeded random walk.
+    """
+
+    rng = random.Random(SEED)
+    state = _getStartingState(gameType)
+
+    moves = []
+    agentIndex = 0
+
+    while (len(moves) < numMoves):
+        if (state.isOver()):
+            state = _getStartingState(gameType)
+            agentIndex = 0
+
+        action = rng.choice(state.getLegalActions(agentIndex))
+        moves.append((state, agentIndex, action))
+
+        state = state.generateSuccessor(agentIndex, action)
+        agentIndex = (agentIndex + 1) % state.getNumAgents()
+
+    return moves
+
+def _setupGenerateSuccessor(gameType):
+    moves = _randomWalk(gameType, NUM_WALK_MOVES)
+
+    def run():
+        for (state, agentIndex, action) in moves:
+            state.generateSuccessor(agentIndex, action)
+
+    return run, len(moves)
+
+def _setupGetLegalActions(gameType):
+    moves = _randomWalk(gameType, NUM_WALK_MOVES)
+
+    def run():
+        for (state, agentIndex, action) in moves:
+            state.getLegalActions(agentIndex)
+
+    return run, len(moves)
+
+def _setupGrid(gridClass, operation):
+    layout = getLayout('mediumClassic')
+
+    grid = gridClass(layout.width, layout.height)
+    for (x, y) in layout.food.asList():
+        grid[x][y] = True
+
+    if (operation == 'copy'):
+        function = grid.copy
+    elif (operation == 'count'):
+        function = grid.count
+    else:
+        function = grid.__hash__
+
+    def run():
+        for i in range(NUM_GRID_OPERATIONS):
+            function()
+
+    return run, NUM_GRID_OPERATIONS
+
+def _setupComputeDistances(layoutName):
+    layout = getLayout(layoutName)
+
+    def run():
+        distanceCalculator.computeDistances(layout)
+
+    return run, 1
+
+def _setupSearch(layoutName, problemClass, searchFunction):
+    state = pacman.PacmanGameState(getLayout(layoutName))
+
+    def run():
+        searchFunction(problemClass(state))
+
+    return run, 1
+
+def _setupMinimax(depth):
+    rng = random.Random(SEED)
+    states = []
+
+    for (state, agentIndex, action) in _randomWalk('pacman', NUM_WALK_MOVES):
+        if (agentIndex == 0 and not state.isOver()):
+            states.append(state)
+
+    states = rng.sample(states, NUM_MINIMAX_STATES)
+    agent = BaseAgent.loadAgent('MinimaxAgent', 0, {'depth': depth})
+
+    def run():
+        for state in states:
+            agent.getAction(state)
+
+    return run, len(states)
+
+def _setupPacmanGame():
+    layout = getLayout('mediumClassic')
+    rules = pacman.ClassicGameRules()
+
+    def run():
+        random.seed(SEED)
+
+        pacmanAgent = BaseAgent.loadAgent('GreedyAgent', 0)
+        ghosts = [BaseAgent.loadAgent('RandomGhost', i + 1) for i in range(layout.getNumGhosts())]
+
+        game = rules.newGame(layout, pacmanAgent, ghosts, PacmanNullView())
+        game.recordMoves = False
+        game.run()
+
+    return run, 1
+
+def _setupCaptureGame():
+    layout = getLayout('defaultCapture')
+    rules = capture.CaptureRules()
+
+    def run():
+        random.seed(SEED)
+
+        agents = capture.loadTeams('pacai.core.baselineTeam', {}, 'pacai.core.baselineTeam', {},
+                True)
+
+        game = rules.newGame(layout, agents, CaptureNullView(), 1200, False)
+        game.recordMoves = False
+        game.run()
+
+    return run, 1
@@ -0,0 +1,262 @@
+"""
+Run the benchmarks from `pacai.bench.benchmarks`, and compare results against a baseline.
+
+Results are JSON objects that look like:
+```
+{
+    "metadata": {"python": "3.11.7", "platform": "...", ...},
+    "results": {
+        "<benchmark name>": {
+            "min": <seconds>, "median": <seconds>, "mean": <seconds>, "max": <seconds>,
+            "repeat": <number of timed runs>, "operations": <operations per run>,
+            "operationsPerSecond": <operations / min>
+        },
+        ...
+    }
+}
+```
+
+Comparisons use the minimum time of each benchmark,
+since it is the least sensitive to noise from the rest of the machine.
+"""
+
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import textwrap
+import time
+
+from pacai.bench.benchmarks import getBenchmarks
+from pacai.util.logs import initLogging
+
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.10
+
+def runBenchmarks(pattern = None, repeat = DEFAULT_REPEAT):
+    """
+    Run all the benchmarks whose name matches the `pattern` regex (or all of them),
+    and return the results (see this module's description).
+    """
+
+    results = {}
+
+    for benchmark in getBenchmarks():
+        if (pattern is not None and re.search(pattern, benchmark.name) is None):
+            continue
+
+        logging.info('Running benchmark: %s' % (benchmark.name))
+
+        # Games and agents log a lot, so hide everything but warnings while timing.
+        logging.disable(logging.INFO)
+        try:
+            results[benchmark.name] = timeBenchmark(benchmark, repeat)
+        finally:
+            logging.disable(logging.NOTSET)
+
+    return {
+        'metadata': getMetadata(),
+        'results': results,
+    }
+
+def timeBenchmark(benchmark, repeat = DEFAULT_REPEAT):
+    function, operations = benchmark.setup()
+
+    # Warm up any caches (e.g. imports and lazily built tables) before timing.
+    function()
+
+    times = []
+    for i in range(max(1, repeat)):
+        startTime = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - startTime)
+
+    return {
+        'min': min(times),
+        'median': statistics.median(times),
+        'mean': statistics.mean(times),
+        'max': max(times),
+        'repeat': len(times),
+        'operations': operations,
+        'operationsPerSecond': operations / max(min(times), sys.float_info.min),
+    }
+
+def compareResults(baseline, current, threshold = DEFAULT_THRESHOLD):
+    """
+    Compare two sets of results (as returned by `runBenchmarks`).
+
+    Returns a list of (name, baseline seconds, current seconds, ratio, status) for every benchmark
+    in both sets (ordered by name).
+    The status is 'regression' if the current run is more than `threshold` (a fraction) slower,
+    'improvement' if it is more than `threshold` faster, and 'same' otherwise.
+    """
+
+    comparisons = []
+
+    baselineResults = baseline['results']
+    currentResults = current['results']
+
+    for name in sorted(set(baselineResults) & set(currentResults)):
+        baselineTime = baselineResults[name]['min']
+        currentTime = currentResults[name]['min']
+        ratio = currentTime / max(baselineTime, sys.float_info.min)
+
+        status = 'same'
+        if (ratio > 1.0 + threshold):
+            status = 'regression'
+        elif (ratio < 1.0 - threshold):
+            status = 'improvement'
+
+        comparisons.append((name, baselineTime, currentTime, ratio, status))
+
+    return comparisons
+
+def getMetadata():
+    """
+    Get information about the machine and code that the benchmarks ran on.
+    """
+
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpuCount': os.cpu_count(),
+        'hostname': platform.node(),
+        'commit': _getCommit(),
+    }
+
+def _getCommit():
+    """
+    Get the git commit of this code, or None if it is not in a git repository.
+    """
+
+    try:
+        output = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output = True, text = True,
+                cwd = os.path.dirname(os.path.realpath(__file__)), check = True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    return output.strip()
+
+def _loadResults(path):
+    with open(path, 'r') as file:
+        return json.load(file)
+
+def _logComparisons(comparisons):
+    for (name, baselineTime, currentTime, ratio, status) in comparisons:
+        message = '%-50s %10.4fs -> %10.4fs (%5.2fx) %s' % (name, baselineTime, currentTime,
+                ratio, status.upper())
+
+        if (status == 'regression'):
+            logging.warning(message)
+        else:
+            logging.info(message)
+
+def readCommand(argv):
+    description = """
+    DESCRIPTION:
+        Time the hot paths of the pacai engine and check for performance regressions.
+
+    EXAMPLES:
+        (1) python -m pacai.bench --output baseline.json
+            - Run all the benchmarks and save the results.
+        (2) python -m pacai.bench --baseline baseline.json
+            - Run all the benchmarks and compare them against saved results.
+        (3) python -m pacai.bench --filter '^grid\\.' --repeat 10
+            - Only run the grid benchmarks, with more runs each.
+        (4) python -m pacai.bench --baseline baseline.json --results new.json
+            - Compare two sets of saved results without running anything.
+    """
+
+    parser = argparse.ArgumentParser(description = textwrap.dedent(description),
+            prog = 'pacai.bench', formatter_class = argparse.RawTextHelpFormatter)
+
+    parser.add_argument('--baseline', dest = 'baseline',
+            action = 'store', type = str, default = None,
+            help = 'compare the results against the results in this JSON file '
+                + '(default: %(default)s)')
+
+    parser.add_argument('--filter', dest = 'filter',
+            action = 'store', type = str, default = None,
+            help = 'only run benchmarks whose name matches this regex (default: %(default)s)')
+
+    parser.add_argument('--list', dest = 'list',
+            action = 'store_true', default = False,
+            help = 'list the benchmarks and exit (default: %(default)s)')
+
+    parser.add_argument('--output', dest = 'output',
+            action = 'store', type = str, default = None,
+            help = 'write the results to this file instead of stdout (default: %(default)s)')
+
+    parser.add_argument('--repeat', dest = 'repeat',
+            action = 'store', type = int, default = DEFAULT_REPEAT,
+            help = 'the number of timed runs of each benchmark (default: %(default)s)')
+
+    parser.add_argument('--results', dest = 'results',
+            action = 'store', type = str, default = None,
+            help = 'use the results in this JSON file instead of running the benchmarks\n'
+                + '(only useful with --baseline) (default: %(default)s)')
+
+    parser.add_argument('--threshold', dest = 'threshold',
+            action = 'store', type = float, default = DEFAULT_THRESHOLD,
+            help = 'how much slower (as a fraction) a benchmark can be before it is '
+                + 'a regression (default: %(default)s)')
+
+    options, otherjunk = parser.parse_known_args(argv)
+
+    if len(otherjunk) != 0:
+        raise ValueError('Unrecognized options: \'%s\'.' % (str(otherjunk)))
+
+    if (options.results is not None and options.baseline is None):
+        raise ValueError('--results can only be used with --baseline.')
+
+    return options
+
+def main(argv):
+    """
+    Entry point for the benchmarks.
+    The args are a blind pass of `sys.argv` with the executable stripped.
+    Returns the number of regressions found (so it can be used as an exit code).
+    """
+
+    initLogging()
+    options = readCommand(argv)
+
+    if (options.list):
+        for benchmark in getBenchmarks():
+            print(benchmark.name)
+
+        return 0
+
+    if (options.results is not None):
+        current = _loadResults(options.results)
+    else:
+        current = runBenchmarks(options.filter, options.repeat)
+
+        output = json.dumps(current, indent = 4, sort_keys = True)
+        if (options.output is None):
+            print(output)
+        else:
+            with open(options.output, 'w') as file:
+                file.write(output + '\n')
+
+    if (options.baseline is None):
+        return 0
+
+    comparisons = compareResults(_loadResults(options.baseline), current, options.threshold)
+    _logComparisons(comparisons)
+
+    regressions = [comparison for comparison in comparisons if comparison[4] == 'regression']
+    logging.info('Found %d regression(s) in %d benchmark(s).' % (len(regressions),
+            len(comparisons)))
+
+    return len(regressions)
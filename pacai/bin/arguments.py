@@ -31,6 +31,11 @@ def getParser(description, name):
             action = 'store_true', default = False,
             help = 'turns on exception handling and timeouts during games (default: %(default)s)')
 
+    parser.add_argument('--count-operations', dest = 'countOperations',
+            action = 'store_true', default = False,
+            help = 'count the game state operations (successors, legal actions, hashes) done by\n'
+                + 'each agent in the (non-training) games and log them (default: %(default)s)')
+
     parser.add_argument('--fps', dest = 'fps',
             action = 'store', type = float, default = 15,
             help = 'cap the game to this fps, at zero frames will be animated as fast as possible'
@@ -56,6 +61,11 @@ def getParser(description, name):
             action = 'store', type = int, default = 0,
             help = 'set how many episodes of training (suppresses output) (default: %(default)s)')
 
+    parser.add_argument('--profile', dest = 'profile',
+            action = 'store', type = str, default = None,
+            help = 'profile the (non-training) games and write a JSON report of agent move,\n'
+                + 'successor, rules, and display times to this path (default: %(default)s)')
+
     parser.add_argument('--record', dest = 'record',
             action = 'store', type = str, default = None,
             help = 'writes the moves of a game to the named pickle file (default: %(default)s)')
@@ -72,4 +82,9 @@ def getParser(description, name):
             action = 'store_true', default = False,
             help = 'display output as text only (default: %(default)s)')
 
+    parser.add_argument('--workers', dest = 'workers',
+            action = 'store', type = int, default = 1,
+            help = 'play the (non-training) games in parallel across this many processes,\n'
+                + 'requires --null-graphics (default: %(default)s)')
+
     return parser
@@ -9,6 +9,7 @@ import logging
 import os
 import pickle
 import random
+import struct
 import sys
 
 from pacai.agents import keyboard
@@ -18,15 +19,18 @@ from pacai.core.actions import Actions
 from pacai.core.distance import manhattan
 from pacai.core.game import Game
 from pacai.core.gamestate import AbstractGameState
-from pacai.core.grid import Grid
 from pacai.core.layout import Layout
 from pacai.core.layout import getLayout
+from pacai.core.observers import ProfileCollector
+from pacai.core.observers import StateCountCollector
 from pacai.ui.capture.null import CaptureNullView
 from pacai.ui.capture.text import CaptureTextView
 from pacai.util import reflection
 from pacai.util.logs import initLogging
 from pacai.util.logs import updateLoggingLevel
 from pacai.util.mazeGenerator import generateMaze
+from pacai.util.parallel import deriveSeeds
+from pacai.util.parallel import runParallel
 from pacai.util.util import nearestPoint
 
 COLLISION_TOLERANCE = 0.7  # How close ghosts must be to Pacman to kill
@@ -38,6 +42,9 @@ MIN_FOOD = 2
 
 SCARED_TIME = 40
 
+# Capture states prefix their packed records with the time left.
+PACKED_TIMELEFT_FORMAT = struct.Struct('<i')
+
 class CaptureGameState(AbstractGameState):
     """
     A game state specific to capture.
@@ -78,8 +85,11 @@ class CaptureGameState(AbstractGameState):
             else:
                 self._blueCapsules.append(capsule)
 
-        self._redFood = Grid(self._food.getWidth(), self._food.getHeight(), initialValue = False)
-        self._blueFood = Grid(self._food.getWidth(), self._food.getHeight(), initialValue = False)
+        gridClass = type(self._food)
+        self._redFood = gridClass(self._food.getWidth(), self._food.getHeight(),
+                initialValue = False)
+        self._blueFood = gridClass(self._food.getWidth(), self._food.getHeight(),
+                initialValue = False)
 
         for x in range(self._food.getWidth()):
             for y in range(self._food.getHeight()):
@@ -104,11 +114,29 @@ class CaptureGameState(AbstractGameState):
 
     # Override
     def getLegalActions(self, agentIndex = 0):
+        counters = self._counters
+        if (counters is not None):
+            counters.getLegalActions += 1
+
         if (self.isOver()):
             return []
 
         return AgentRules.getLegalActions(self, agentIndex)
 
+    # Override
+    def pack(self):
+        return PACKED_TIMELEFT_FORMAT.pack(self._timeleft) + super().pack()
+
+    # Override
+    @classmethod
+    def unpack(cls, layout, record):
+        timeleft, = PACKED_TIMELEFT_FORMAT.unpack_from(record)
+
+        state = cls(layout, timeleft)
+        state._unpackFields(record, PACKED_TIMELEFT_FORMAT.size)
+
+        return state
+
     # Override
     def eatCapsule(self, x, y):
         if (not self._capsulesCopied):
@@ -232,14 +260,12 @@ class CaptureGameState(AbstractGameState):
         # Find appropriate rules for the agent.
         AgentRules.applyAction(self, action, agentIndex)
         AgentRules.checkDeath(self, agentIndex)
-        AgentRules.decrementTimer(self.getAgentState(agentIndex))
+        AgentRules.decrementTimer(self.getMutableAgentState(agentIndex))
 
         # Book keeping.
         self._lastAgentMoved = agentIndex
         self._timeleft -= 1
 
-        self._hash = None
-
 class CaptureRules:
     """
     These game rules manage the control flow of a game, deciding when
@@ -342,8 +368,8 @@ class AgentRules:
         """
 
         agentState = state.getAgentState(agentIndex)
-        return Actions.getPossibleActions(agentState.getPosition(), agentState.getDirection(),
-                state.getWalls())
+        return state.getActionTable().getPossibleActions(agentState.getPosition(),
+                agentState.getDirection())
 
     @staticmethod
     def applyAction(state, action, agentIndex):
@@ -355,7 +381,7 @@ class AgentRules:
         if (action not in legal):
             raise ValueError('Illegal action: ' + str(action))
 
-        agentState = state.getAgentState(agentIndex)
+        agentState = state.getMutableAgentState(agentIndex)
 
         # Update position.
         vector = Actions.directionToVector(action, AgentRules.AGENT_SPEED)
@@ -414,7 +440,7 @@ class AgentRules:
                 otherTeam = state.getRedTeamIndices()
 
             for agentIndex in otherTeam:
-                state.getAgentState(agentIndex).setScaredTimer(SCARED_TIME)
+                state.getMutableAgentState(agentIndex).setScaredTimer(SCARED_TIME)
 
     @staticmethod
     def decrementTimer(agentState):
@@ -455,10 +481,10 @@ class AgentRules:
             # Otherwise, we are being eatten.
             if (agentState.isBraveGhost() or otherAgentState.isScaredGhost()):
                 state.addScore(teamPointModifier * KILL_POINTS)
-                otherAgentState.respawn()
+                state.getMutableAgentState(otherAgentIndex).respawn()
             else:
                 state.addScore(teamPointModifier * -KILL_POINTS)
-                agentState.respawn()
+                state.getMutableAgentState(agentIndex).respawn()
 
 #############################
 # FRAMEWORK TO START A GAME #
@@ -559,6 +585,9 @@ def readCommand(argv):
     elif options.debug:
         updateLoggingLevel(logging.DEBUG)
 
+    if (options.workers > 1 and not options.nullGraphics):
+        raise ValueError('Parallel games (--workers) require --null-graphics.')
+
     viewOptions = {
         'gifFPS': options.gifFPS,
         'gifPath': options.gif,
@@ -597,17 +626,17 @@ def readCommand(argv):
         blueArgs['numTraining'] = options.numTraining
 
     nokeyboard = options.textGraphics or options.nullGraphics or options.numTraining > 0
-    logging.debug('\nRed team %s with %s:' % (options.red, redArgs))
-    redAgents = loadAgents(True, options.red, nokeyboard, redArgs)
-    logging.debug('\nBlue team %s with %s:' % (options.blue, blueArgs))
-    blueAgents = loadAgents(False, options.blue, nokeyboard, blueArgs)
-    args['agents'] = sum([list(el) for el in zip(redAgents, blueAgents)], [])  # List of agents.
+    args['agentSpec'] = (options.red, redArgs, options.blue, blueArgs, nokeyboard)
+    args['agents'] = loadTeams(*args['agentSpec'])
 
     numKeyboardAgents = 0
     for index, val in enumerate([options.keys0, options.keys1, options.keys2, options.keys3]):
         if (not val):
             continue
 
+        # Workers reload the agents, so they would not get the keyboard agents.
+        args['agentSpec'] = None
+
         if (numKeyboardAgents == 0):
             agent = keyboard.WASDKeyboardAgent(index, keyboard = args['display'].getKeyboard())
         elif (numKeyboardAgents == 1):
@@ -639,9 +668,25 @@ def readCommand(argv):
     args['record'] = options.record
     args['catchExceptions'] = options.catchExceptions
     args['replay'] = options.replay
+    args['seed'] = seed
+    args['workers'] = options.workers
+    args['profile'] = options.profile
+    args['countOperations'] = options.countOperations
 
     return args
 
+def loadTeams(redModule, redArgs, blueModule, blueArgs, nokeyboard):
+    """
+    Load both teams and return a list of all the agents (ordered by agent index).
+    """
+
+    logging.debug('\nRed team %s with %s:' % (redModule, redArgs))
+    redAgents = loadAgents(True, redModule, nokeyboard, redArgs)
+    logging.debug('\nBlue team %s with %s:' % (blueModule, blueArgs))
+    blueAgents = loadAgents(False, blueModule, nokeyboard, blueArgs)
+
+    return sum([list(el) for el in zip(redAgents, blueAgents)], [])  # List of agents.
+
 def loadAgents(isRed, agentModule, textgraphics, args):
     """
     Calls agent factories and returns lists of agents.
@@ -680,16 +725,47 @@ def replayGame(layout, agents, actions, display, length, redTeamName, blueTeamNa
     display.finish()
 
 def runGames(layout, agents, display, length, numGames, record, numTraining,
-        redTeamName, blueTeamName, catchExceptions = False, **kwargs):
+        redTeamName, blueTeamName, catchExceptions = False, workers = 1, seed = None,
+        agentSpec = None, profile = None, countOperations = False, **kwargs):
+    """
+    Play `numGames` games (the first `numTraining` of which are training games).
+
+    If `workers` is more than one, then the non-training games are played in parallel
+    (see `pacai.util.parallel.runParallel`) with seeds derived from `seed`.
+    For every game, workers reload the agents from `agentSpec` (the arguments to `loadTeams`)
+    when it is available,
+    otherwise (or if the agents were just trained) they get a fresh copy of `agents`.
+    Games played in parallel are returned without their agents and display.
+
+    If `profile` is a path, then the non-training games are profiled
+    (see `pacai.core.observers.ProfileCollector`) and a JSON report is written to that path.
+
+    If `countOperations` is true, then the game state operations of each agent are counted
+    in the non-training games (see `pacai.core.game.Game.countStateOperations`)
+    and logged after each game and for all the games together.
+    """
+
     rules = CaptureRules()
     games = []
 
+    collector = None
+    if (profile is not None):
+        collector = ProfileCollector()
+
+    stateCounts = None
+    if (countOperations):
+        stateCounts = StateCountCollector()
+
+    numParallel = 0
+    if (workers > 1):
+        numParallel = numGames - numTraining
+
     nullView = None
     if (numTraining > 0):
         logging.info('Playing %d training games.' % numTraining)
         nullView = CaptureNullView()
 
-    for i in range(numGames):
+    for i in range(numGames - numParallel):
         isTraining = (i < numTraining)
 
         if (isTraining):
@@ -699,31 +775,64 @@ def runGames(layout, agents, display, length, numGames, record, numTraining,
             gameDisplay = display
 
         g = rules.newGame(layout, agents, gameDisplay, length, catchExceptions)
+        g.recordMoves = bool(record)
+
+        if (collector is not None and not isTraining):
+            g.addObserver(collector)
+
+        if (countOperations and not isTraining):
+            g.countStateOperations()
+
         g.run()
 
         if (not isTraining):
             games.append(g)
 
+            if (stateCounts is not None):
+                stateCounts.merge(g.getStateCounts())
+
         g.record = None
         if record:
-            components = {
-                'layout': layout,
-                'agents': [agent.__class__.__name__ for agent in agents],
-                'actions': g.moveHistory,
-                'length': length,
-                'redTeamName': redTeamName,
-                'blueTeamName': blueTeamName
-            }
+            _recordGame(record, layout, agents, length, redTeamName, blueTeamName, g)
+
+    if (numParallel > 0):
+        if (agentSpec is not None and numTraining == 0):
+            agentLoader = (loadTeams, agentSpec)
+        else:
+            agentLoader = (_copyAgents, (agents,))
+
+        logging.info('Playing %d games across %d workers.' % (numParallel, workers))
+
+        parallelGames = runParallel(_loadParallelContext,
+                (layout, agentLoader, length, catchExceptions, bool(record),
+                    collector is not None, countOperations),
+                _playParallelGame, deriveSeeds(seed, numParallel), workers)
+
+        for g in parallelGames:
+            g.record = None
+
+        if record:
+            _recordGame(record, layout, agents, length, redTeamName, blueTeamName,
+                    parallelGames[-1])
+
+        for g in parallelGames:
+            if (collector is not None):
+                for observer in g.getObservers():
+                    if (isinstance(observer, ProfileCollector)):
+                        collector.merge(observer)
+
+            if (stateCounts is not None):
+                stateCounts.merge(g.getStateCounts())
 
-            path = 'replay'
-            if (isinstance(record, str)):
-                path = record
+        games += parallelGames
 
-            g.record = pickle.dumps(components)
-            with open(path, 'wb') as file:
-                file.write(g.record)
+    if (collector is not None):
+        collector.writeReport(profile)
+        logging.info('Profile written to: %s' % (profile))
 
-            logging.info("Game recorded to: '%s'." % (path))
+    if (stateCounts is not None):
+        logging.info('State operations over all games:')
+        stateCounts.logReport()
 
     if (numGames > 0):
         scores = [game.state.getScore() for game in games]
@@ -740,6 +849,61 @@ def runGames(layout, agents, display, length, numGames, record, numTraining,
 
     return games
 
+def _recordGame(record, layout, agents, length, redTeamName, blueTeamName, g):
+    components = {
+        'layout': layout,
+        'agents': [agent.__class__.__name__ for agent in agents],
+        'actions': g.moveHistory,
+        'length': length,
+        'redTeamName': redTeamName,
+        'blueTeamName': blueTeamName
+    }
+
+    path = 'replay'
+    if (isinstance(record, str)):
+        path = record
+
+    g.record = pickle.dumps(components)
+    with open(path, 'wb') as file:
+        file.write(g.record)
+
+    logging.info("Game recorded to: '%s'." % (path))
+
+def _copyAgents(agents):
+    return agents
+
+def _loadParallelContext(layout, agentLoader, length, catchExceptions, recordMoves, profile,
+        countOperations):
+    """
+    Set up a worker process for `runGames`.
+    """
+
+    loadFunction, loadArgs = agentLoader
+    agents = loadFunction(*loadArgs)
+
+    return (layout, agents, CaptureRules(), length, catchExceptions, recordMoves, profile,
+            countOperations)
+
+def _playParallelGame(context):
+    layout, agents, rules, length, catchExceptions, recordMoves, profile, countOperations = context
+
+    g = rules.newGame(layout, agents, CaptureNullView(), length, catchExceptions)
+    g.recordMoves = recordMoves
+
+    # Each game gets its own collector, the parent merges them.
+    if (profile):
+        g.addObserver(ProfileCollector())
+
+    if (countOperations):
+        g.countStateOperations()
+
+    g.run()
+
+    # The agents and display stay in the worker, only the results are sent back.
+    g.agents = None
+    g.display = None
+
+    return g
 
 def main(argv):
     """
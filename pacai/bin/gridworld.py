@@ -9,12 +9,23 @@ from pacai.agents.learning.reinforcement import ReinforcementAgent
 from pacai.core.environment import Environment
 from pacai.core.mdp import MarkovDecisionProcess
 from pacai.student.qlearningAgents import QLearningAgent
+from pacai.student.valueIterationAgent import SOLVERS
 from pacai.student.valueIterationAgent import ValueIterationAgent
 from pacai.ui.gridworld.text import TextGridworldDisplay
 from pacai.util.logs import initLogging
 from pacai.util.logs import updateLoggingLevel
 
 class Gridworld(MarkovDecisionProcess):
+    """
+    A gridworld MDP.
+
+    The states, rewards, and transitions are cached as they are computed.
+    The caches are cleared when `Gridworld.setNoise` or `Gridworld.setLivingReward`
+    changes a parameter, so parameters should only be changed through those methods
+    (and the grid should not be changed after the gridworld is created).
+    The states and transitions are returned as tuples, since they are shared.
+    """
+
     def __init__(self, grid):
         # layout
         if (isinstance(grid, list)):
@@ -26,6 +37,13 @@ class Gridworld(MarkovDecisionProcess):
         self.livingReward = 0.0
         self.noise = 0.2
 
+        # caches
+        self._states = None
+        # {state: reward}
+        self._rewards = {}
+        # {(state, action): ((nextState, prob), ...)}
+        self._transitions = {}
+
     def setLivingReward(self, reward):
         """
         The (negative) reward for exiting "normal" states.
@@ -35,14 +53,18 @@ class Gridworld(MarkovDecisionProcess):
         future rewards.
         """
 
-        self.livingReward = reward
+        if (reward != self.livingReward):
+            self.livingReward = reward
+            self._rewards.clear()
 
     def setNoise(self, noise):
         """
         The probability of moving in an unintended direction.
         """
 
-        self.noise = noise
+        if (noise != self.noise):
+            self.noise = noise
+            self._transitions.clear()
 
     def getPossibleActions(self, state):
         """
@@ -64,9 +86,12 @@ class Gridworld(MarkovDecisionProcess):
 
     def getStates(self):
         """
-        Return list of all states.
+        Return a tuple of all states.
         """
 
+        if (self._states is not None):
+            return self._states
+
         # The true terminal state.
         states = [self.grid.terminalState]
         for x in range(self.grid.width):
@@ -75,7 +100,8 @@ class Gridworld(MarkovDecisionProcess):
                     state = (x, y)
                     states.append(state)
 
-        return states
+        self._states = tuple(states)
+        return self._states
 
     def getReward(self, state, action, nextState):
         """
@@ -86,6 +112,14 @@ class Gridworld(MarkovDecisionProcess):
         less use this convention).
         """
 
+        reward = self._rewards.get(state)
+        if (reward is None):
+            reward = self._computeReward(state)
+            self._rewards[state] = reward
+
+        return reward
+
+    def _computeReward(self, state):
         if state == self.grid.terminalState:
             return 0.0
 
@@ -117,12 +151,22 @@ class Gridworld(MarkovDecisionProcess):
 
     def getTransitionStatesAndProbs(self, state, action):
         """
-        Returns list of (nextState, prob) pairs
+        Returns a tuple of (nextState, prob) pairs
         representing the states reachable
         from 'state' by taking 'action' along
         with their transition probabilities.
         """
 
+        transitions = self._transitions.get((state, action))
+        if (transitions is not None):
+            return transitions
+
+        transitions = tuple(self._computeTransitions(state, action))
+        self._transitions[(state, action)] = transitions
+
+        return transitions
+
+    def _computeTransitions(self, state, action):
         if action not in self.getPossibleActions(state):
             raise Exception('Illegal action!')
 
@@ -433,6 +477,11 @@ def parseOptions(argv):
             action = 'store', type = float, default = 1.0,
             help = 'speed of animation, S>1.0 is faster, 0<S<1 is slower (default %(default)s)')
 
+    parser.add_argument('-t', '--tolerance', dest = 'tolerance',
+            action = 'store', type = float, default = None,
+            help = 'stop value iteration once no value changes by more than this\n'
+                + '(default %(default)s)')
+
     parser.add_argument('-v', '--value-steps', dest = 'valueSteps',
             action = 'store_true', default = False,
             help = 'display each step of value iteration (default %(default)s)')
@@ -449,6 +498,11 @@ def parseOptions(argv):
             action = 'store_true', default = False,
             help = 'generate no graphics (default: %(default)s)')
 
+    parser.add_argument('--solver', dest = 'solver',
+            action = 'store', type = str, default = 'synchronous', choices = SOLVERS,
+            help = 'value iteration solver: synchronous, gauss-seidel, or prioritized\n'
+                + '(default %(default)s)')
+
     parser.add_argument('--text-graphics', dest = 'textGraphics',
             action = 'store_true', default = False,
             help = 'display output as text only (default: %(default)s)')
@@ -520,7 +574,13 @@ def main(argv):
 
     a = None
     if (opts.agent == 'value'):
-        a = ValueIterationAgent(0, mdp, opts.discount, opts.iters)
+        a = ValueIterationAgent(0, mdp, opts.discount, opts.iters, tolerance = opts.tolerance,
+                solver = opts.solver)
+        if (opts.solver == 'prioritized'):
+            logging.info('Value iteration (%s) did %d backups.' % (opts.solver, a.backupsDone))
+        else:
+            logging.info('Value iteration (%s) did %d iterations and %d backups.' %
+                    (opts.solver, a.iterationsDone, a.backupsDone))
     elif (opts.agent == 'q'):
         qLearnOpts = {
             'gamma': opts.discount,
@@ -564,13 +624,15 @@ def main(argv):
     if (not opts.manual and opts.agent == 'value'):
         if (opts.valueSteps):
             for i in range(opts.iters):
-                tempAgent = ValueIterationAgent(0, mdp, opts.discount, i)
-                display.displayValues(tempAgent, message = 'VALUES AFTER ' + str(i) + ' ITERATIONS')
+                tempAgent = ValueIterationAgent(0, mdp, opts.discount, i,
+                        tolerance = opts.tolerance, solver = opts.solver)
+                display.displayValues(tempAgent,
+                        message = 'VALUES AFTER ' + _getValueIterationProgress(tempAgent))
                 display.pause()
 
-        display.displayValues(a, message = 'VALUES AFTER ' + str(opts.iters) + ' ITERATIONS')
+        display.displayValues(a, message = 'VALUES AFTER ' + _getValueIterationProgress(a))
         display.pause()
-        display.displayQValues(a, message = 'Q-VALUES AFTER ' + str(opts.iters) + ' ITERATIONS')
+        display.displayQValues(a, message = 'Q-VALUES AFTER ' + _getValueIterationProgress(a))
         display.pause()
 
     # Figure out what to display each time step (if anything).
@@ -620,6 +682,18 @@ def main(argv):
         display.displayValues(a, message = 'VALUES AFTER ' + str(opts.episodes) + ' EPISODES')
         display.pause()
 
+def _getValueIterationProgress(agent):
+    """
+    Describe how much work a value iteration agent did, e.g. '5 ITERATIONS'.
+    Prioritized sweeping backs up one state at a time instead of sweeping,
+    so it is described by its number of backups.
+    """
+
+    if (agent.solver == 'prioritized'):
+        return str(agent.backupsDone) + ' BACKUPS'
+
+    return str(agent.iterationsDone) + ' ITERATIONS'
+
 def _getGridWorld(name):
     name = name.lower()
 
@@ -23,10 +23,14 @@ from pacai.core.distance import manhattan
 from pacai.core.game import Game
 from pacai.core.gamestate import AbstractGameState
 from pacai.core.layout import getLayout
+from pacai.core.observers import ProfileCollector
+from pacai.core.observers import StateCountCollector
 from pacai.ui.pacman.null import PacmanNullView
 from pacai.ui.pacman.text import PacmanTextView
 from pacai.util.logs import initLogging
 from pacai.util.logs import updateLoggingLevel
+from pacai.util.parallel import deriveSeeds
+from pacai.util.parallel import runParallel
 from pacai.util.util import nearestPoint
 
 PACMAN_AGENT_INDEX = 0
@@ -66,6 +70,10 @@ class PacmanGameState(AbstractGameState):
 
     # Override
     def getLegalActions(self, agentIndex = PACMAN_AGENT_INDEX):
+        counters = self._counters
+        if (counters is not None):
+            counters.getLegalActions += 1
+
         if (self.isOver()):
             return []
 
@@ -75,6 +83,14 @@ class PacmanGameState(AbstractGameState):
 
         return GhostRules.getLegalActions(self, agentIndex)
 
+    # Override
+    @classmethod
+    def unpack(cls, layout, record):
+        state = cls(layout)
+        state._unpackFields(record)
+
+        return state
+
     def generatePacmanSuccessor(self, action):
         return self.generateSuccessor(PACMAN_AGENT_INDEX, action)
 
@@ -134,7 +150,7 @@ class PacmanGameState(AbstractGameState):
             # Penalty for waiting around.
             self.addScore(-TIME_PENALTY)
         else:
-            GhostRules.decrementTimer(self.getAgentState(agentIndex))
+            GhostRules.decrementTimer(self.getMutableAgentState(agentIndex))
 
         # Resolve multi-agent effects.
         GhostRules.checkDeath(self, agentIndex)
@@ -142,8 +158,6 @@ class PacmanGameState(AbstractGameState):
         # Book keeping.
         self._lastAgentMoved = agentIndex
 
-        self._hash = None
-
 class ClassicGameRules(object):
     """
     These game rules manage the control flow of a game, deciding when
@@ -217,8 +231,8 @@ class PacmanRules:
         """
 
         agentState = state.getPacmanState()
-        return Actions.getPossibleActions(agentState.getPosition(), agentState.getDirection(),
-                state.getWalls())
+        return state.getActionTable().getPossibleActions(agentState.getPosition(),
+                agentState.getDirection())
 
     @staticmethod
     def applyAction(state, action):
@@ -230,7 +244,7 @@ class PacmanRules:
         if (action not in legal):
             raise ValueError('Illegal pacman action: ' + str(action))
 
-        pacmanState = state.getPacmanState()
+        pacmanState = state.getMutableAgentState(PACMAN_AGENT_INDEX)
 
         # Update position.
         vector = Actions.directionToVector(action, PacmanRules.PACMAN_SPEED)
@@ -260,8 +274,8 @@ class PacmanRules:
             state.eatCapsule(x, y)
 
             # Reset all ghosts' scared timers.
-            for ghostState in state.getGhostStates():
-                ghostState.setScaredTimer(SCARED_TIME)
+            for ghostIndex in state.getGhostIndexes():
+                state.getMutableAgentState(ghostIndex).setScaredTimer(SCARED_TIME)
 
 class GhostRules:
     """
@@ -278,8 +292,8 @@ class GhostRules:
         """
 
         agentState = state.getGhostState(ghostIndex)
-        possibleActions = Actions.getPossibleActions(agentState.getPosition(),
-                agentState.getDirection(), state.getWalls())
+        possibleActions = state.getActionTable().getPossibleActions(agentState.getPosition(),
+                agentState.getDirection())
         reverse = Actions.reverseDirection(agentState.getDirection())
 
         if (Directions.STOP in possibleActions):
@@ -296,7 +310,7 @@ class GhostRules:
         if (action not in legal):
             raise ValueError('Illegal ghost action: ' + str(action))
 
-        ghostState = state.getGhostState(ghostIndex)
+        ghostState = state.getMutableAgentState(ghostIndex)
         speed = GhostRules.GHOST_SPEED
         if (ghostState.isScared()):
             speed /= 2.0
@@ -341,7 +355,7 @@ class GhostRules:
         if (ghostState.isScared()):
             # Pacman ate a ghost.
             state.addScore(GHOST_POINTS)
-            ghostState.respawn()
+            state.getMutableAgentState(agentIndex).respawn()
         elif (not state.isOver()):
             # A ghost ate pacman.
             state.addScore(LOSE_POINTS)
@@ -430,6 +444,9 @@ def readCommand(argv):
     elif options.debug:
         updateLoggingLevel(logging.DEBUG)
 
+    if (options.workers > 1 and not options.nullGraphics):
+        raise ValueError('Parallel games (--workers) require --null-graphics.')
+
     # If seed value is not entered generate a random seed value.
     seed = options.seed
     if seed is None:
@@ -480,14 +497,29 @@ def readCommand(argv):
 
     args['catchExceptions'] = options.catchExceptions
     args['gameToReplay'] = options.replay
-    args['ghosts'] = [BaseAgent.loadAgent(options.ghost, i + 1) for i in range(options.numGhosts)]
+    args['agentSpec'] = (options.pacman, agentOpts, options.ghost, options.numGhosts)
+    args['pacman'], args['ghosts'] = loadAgents(*args['agentSpec'])
     args['numGames'] = options.numGames
-    args['pacman'] = BaseAgent.loadAgent(options.pacman, PACMAN_AGENT_INDEX, agentOpts)
+    args['profile'] = options.profile
+    args['countOperations'] = options.countOperations
     args['record'] = options.record
+    args['seed'] = seed
     args['timeout'] = options.timeout
+    args['workers'] = options.workers
 
     return args
 
+def loadAgents(pacmanName, pacmanArgs, ghostName, numGhosts):
+    """
+    Load pacman and the ghosts by name.
+    Returns (pacman, ghosts).
+    """
+
+    pacman = BaseAgent.loadAgent(pacmanName, PACMAN_AGENT_INDEX, pacmanArgs)
+    ghosts = [BaseAgent.loadAgent(ghostName, i + 1) for i in range(numGhosts)]
+
+    return pacman, ghosts
+
 def replayGame(layout, actions, display):
     rules = ClassicGameRules()
 
@@ -512,16 +544,47 @@ def replayGame(layout, actions, display):
     display.finish()
 
 def runGames(layout, pacman, ghosts, display, numGames, record = None, numTraining = 0,
-        catchExceptions = False, timeout = 30, **kwargs):
+        catchExceptions = False, timeout = 30, workers = 1, seed = None, agentSpec = None,
+        profile = None, countOperations = False, **kwargs):
+    """
+    Play `numGames` games (the first `numTraining` of which are training games).
+
+    If `workers` is more than one, then the non-training games are played in parallel
+    (see `pacai.util.parallel.runParallel`) with seeds derived from `seed`.
+    For every game, workers reload the agents from `agentSpec` (the arguments to `loadAgents`)
+    when it is available,
+    otherwise (or if the agents were just trained) they get a fresh copy of `pacman` and `ghosts`.
+    Games played in parallel are returned without their agents and display.
+
+    If `profile` is a path, then the non-training games are profiled
+    (see `pacai.core.observers.ProfileCollector`) and a JSON report is written to that path.
+
+    If `countOperations` is true, then the game state operations of each agent are counted
+    in the non-training games (see `pacai.core.game.Game.countStateOperations`)
+    and logged after each game and for all the games together.
+    """
+
     rules = ClassicGameRules(timeout)
     games = []
 
+    collector = None
+    if (profile is not None):
+        collector = ProfileCollector()
+
+    stateCounts = None
+    if (countOperations):
+        stateCounts = StateCountCollector()
+
+    numParallel = 0
+    if (workers > 1):
+        numParallel = numGames - numTraining
+
     nullView = None
     if (numTraining > 0):
         logging.info('Playing %d training games.' % numTraining)
         nullView = PacmanNullView()
 
-    for i in range(numGames):
+    for i in range(numGames - numParallel):
         isTraining = (i < numTraining)
 
         if (isTraining):
@@ -531,19 +594,59 @@ def runGames(layout, pacman, ghosts, display, numGames, record = None, numTraini
             gameDisplay = display
 
         game = rules.newGame(layout, pacman, ghosts, gameDisplay, catchExceptions)
+        game.recordMoves = bool(record)
+
+        if (collector is not None and not isTraining):
+            game.addObserver(collector)
+
+        if (countOperations and not isTraining):
+            game.countStateOperations()
+
         game.run()
 
         if (not isTraining):
             games.append(game)
 
+            if (stateCounts is not None):
+                stateCounts.merge(game.getStateCounts())
+
         if (record):
-            path = 'pacman.replay'
-            if (isinstance(record, str)):
-                path = record
+            _recordGame(record, layout, game)
 
-            components = {'layout': layout, 'actions': game.moveHistory}
-            with open(path, 'wb') as file:
-                pickle.dump(components, file)
+    if (numParallel > 0):
+        if (agentSpec is not None and numTraining == 0):
+            agentLoader = (loadAgents, agentSpec)
+        else:
+            agentLoader = (_copyAgents, (pacman, ghosts))
+
+        logging.info('Playing %d games across %d workers.' % (numParallel, workers))
+
+        parallelGames = runParallel(_loadParallelContext,
+                (layout, agentLoader, timeout, catchExceptions, bool(record),
+                    collector is not None, countOperations),
+                _playParallelGame, deriveSeeds(seed, numParallel), workers)
+
+        if (record):
+            _recordGame(record, layout, parallelGames[-1])
+
+        for game in parallelGames:
+            if (collector is not None):
+                for observer in game.getObservers():
+                    if (isinstance(observer, ProfileCollector)):
+                        collector.merge(observer)
+
+            if (stateCounts is not None):
+                stateCounts.merge(game.getStateCounts())
+
+        games += parallelGames
+
+    if (collector is not None):
+        collector.writeReport(profile)
+        logging.info('Profile written to: %s' % (profile))
+
+    if (stateCounts is not None):
+        logging.info('State operations over all games:')
+        stateCounts.logReport()
 
     if ((numGames - numTraining) > 0):
         scores = [game.state.getScore() for game in games]
@@ -556,6 +659,51 @@ def runGames(layout, pacman, ghosts, display, numGames, record = None, numTraini
 
     return games
 
+def _recordGame(record, layout, game):
+    path = 'pacman.replay'
+    if (isinstance(record, str)):
+        path = record
+
+    components = {'layout': layout, 'actions': game.moveHistory}
+    with open(path, 'wb') as file:
+        pickle.dump(components, file)
+
+def _copyAgents(pacman, ghosts):
+    return pacman, ghosts
+
+def _loadParallelContext(layout, agentLoader, timeout, catchExceptions, recordMoves, profile,
+        countOperations):
+    """
+    Set up a worker process for `runGames`.
+    """
+
+    loadFunction, loadArgs = agentLoader
+    pacman, ghosts = loadFunction(*loadArgs)
+
+    return (layout, pacman, ghosts, ClassicGameRules(timeout), catchExceptions, recordMoves,
+            profile, countOperations)
+
+def _playParallelGame(context):
+    layout, pacman, ghosts, rules, catchExceptions, recordMoves, profile, countOperations = context
+
+    game = rules.newGame(layout, pacman, ghosts, PacmanNullView(), catchExceptions)
+    game.recordMoves = recordMoves
+
+    # Each game gets its own collector, the parent merges them.
+    if (profile):
+        game.addObserver(ProfileCollector())
+
+    if (countOperations):
+        game.countStateOperations()
+
+    game.run()
+
+    # The agents and display stay in the worker, only the results are sent back.
+    game.agents = None
+    game.display = None
+
+    return game
+
 def main(argv):
     """
     Entry point for a pacman game.
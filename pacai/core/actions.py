@@ -1,3 +1,5 @@
+import array
+
 from pacai.core.directions import Directions
 
 class Actions:
@@ -97,3 +99,149 @@ class Actions:
         dx, dy = Actions.directionToVector(action)
         x, y = position
         return (x + dx, y + dy)
+
+class ActionTable(object):
+    """
+    The legal actions and neighbors of every cell of a board, computed once from its walls.
+    Tables should be fetched with `pacai.core.layout.Layout.getActionTable`,
+    so they are only computed once per layout.
+
+    Cells are identified by their index in the grid (x * height + y).
+    The possible actions of each cell are stored as a bitmask (in the order that
+    `Actions.getPossibleActions` returns them), and moves and neighbors as tuples.
+
+    Only integral positions are in the table,
+    any other position (e.g. an agent half way between cells) falls back to `Actions`.
+    The results are always the same as the matching `Actions` methods.
+    """
+
+    # Cells where Actions.getPossibleActions() would look past the edge of the board.
+    NO_MASK = 0xFF
+
+    # The actions for each possible mask.
+    _maskActions = tuple(
+        tuple(Actions._directionsAsList[i][0] for i in range(len(Actions._directionsAsList))
+                if (mask & (1 << i)))
+        for mask in range(1 << len(Actions._directionsAsList)))
+
+    def __init__(self, walls):
+        self._walls = walls
+
+        width = walls.getWidth()
+        height = walls.getHeight()
+
+        self._width = width
+        self._height = height
+
+        # {(x, y): cellId, ...}
+        # Since (1, 2) and (1.0, 2.0) hash the same, lookups also work for float positions.
+        self._cellIds = {}
+
+        self._actionMasks = array.array('B', [0] * (width * height))
+        self._moves = [None] * (width * height)
+        self._neighbors = [None] * (width * height)
+
+        # 1 for every cell that is not a wall.
+        self._openCells = bytearray(width * height)
+
+        for x in range(width):
+            for y in range(height):
+                cellId = x * height + y
+                self._cellIds[(x, y)] = cellId
+
+                self._actionMasks[cellId] = self._computeMask(x, y)
+                try:
+                    self._moves[cellId] = self._computeMoves(x, y)
+                except IndexError:
+                    # Moves off the edge of the board are left for _computeMoves() to raise.
+                    pass
+                self._neighbors[cellId] = tuple(Actions.getLegalNeighbors((x, y), walls))
+                self._openCells[cellId] = int(not walls[x][y])
+
+    def getCardinalMoves(self, position):
+        """
+        Get the (action, next position) of all the cardinal moves that do not go into a wall,
+        in the order of `pacai.core.directions.Directions.CARDINAL`.
+        This is what search problems need for their successors.
+        """
+
+        cellId = self._cellIds.get(position)
+        if (cellId is not None):
+            moves = self._moves[cellId]
+            if (moves is not None):
+                return moves
+
+        return self._computeMoves(*position)
+
+    def getCellId(self, position):
+        """
+        Get the id of an integral position, or None.
+        """
+
+        return self._cellIds.get(position)
+
+    def getHeight(self):
+        return self._height
+
+    def getLegalNeighbors(self, position):
+        """
+        The same as `Actions.getLegalNeighbors`.
+        """
+
+        cellId = self._cellIds.get(position)
+        if (cellId is None):
+            return Actions.getLegalNeighbors(position, self._walls)
+
+        return list(self._neighbors[cellId])
+
+    def getOpenCells(self):
+        """
+        Get a bytearray (indexed by cell id) that is 1 for every cell that is not a wall.
+        Do not modify it.
+        """
+
+        return self._openCells
+
+    def getPossibleActions(self, position, direction):
+        """
+        The same as `Actions.getPossibleActions`.
+        """
+
+        cellId = self._cellIds.get(position)
+        if (cellId is not None):
+            mask = self._actionMasks[cellId]
+            if (mask != ActionTable.NO_MASK):
+                return list(ActionTable._maskActions[mask])
+
+        return Actions.getPossibleActions(position, direction, self._walls)
+
+    def getWalls(self):
+        return self._walls
+
+    def getWidth(self):
+        return self._width
+
+    def _computeMask(self, x, y):
+        try:
+            actions = Actions.getPossibleActions((x, y), Directions.STOP, self._walls)
+        except IndexError:
+            return ActionTable.NO_MASK
+
+        mask = 0
+        for i in range(len(Actions._directionsAsList)):
+            if (Actions._directionsAsList[i][0] in actions):
+                mask |= (1 << i)
+
+        return mask
+
+    def _computeMoves(self, x, y):
+        moves = []
+
+        for action in Directions.CARDINAL:
+            dx, dy = Actions.directionToVector(action)
+            nextx, nexty = int(x + dx), int(y + dy)
+
+            if (not self._walls[nextx][nexty]):
+                moves.append((action, (nextx, nexty)))
+
+        return tuple(moves)
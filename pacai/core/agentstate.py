@@ -1,7 +1,22 @@
+import struct
+
 from pacai.core.actions import Actions
 from pacai.core.directions import Directions
 from pacai.util import util
 
+# The record format used by AgentState.pack().
+# Positions are stored doubled, since agents can be half way between cells.
+PACKED_FORMAT = struct.Struct('<hhBBH')
+PACKED_DIRECTIONS = [
+    Directions.NORTH,
+    Directions.SOUTH,
+    Directions.EAST,
+    Directions.WEST,
+    Directions.STOP,
+]
+PACKED_DIRECTION_INDEXES = {direction: index for (index, direction) in enumerate(PACKED_DIRECTIONS)}
+PACKED_NO_POSITION = -1
+
 class AgentState:
     """
     This class hold the state of an agent (position, direction, scared, etc).
@@ -9,13 +24,19 @@ class AgentState:
     The convention for positions, like a graph, is that (0, 0) is the lower left corner,
     x increases horizontally and y increases vertically.
     Therefore, north is the direction of increasing y, or (0, 1).
+
+    Agent states are small value objects that are shared between a game state and its successors.
+    A successor only copies the agent states that it actually changes
+    (see `pacai.core.gamestate.AbstractGameState.getMutableAgentState`),
+    so an agent state that was obtained from a game state should not be modified.
     """
 
+    __slots__ = ('_start', '_position', '_direction', '_isPacman', '_scaredTimer', '_hash')
+
     def __init__(self, position, direction, isPacman):
         # Save the starting information for later use.
-        self._startPosition = position
-        self._startDirection = direction
-        self._startIsPacman = isPacman
+        # This never changes, so all copies share the same tuple.
+        self._start = (position, direction, isPacman)
 
         self._position = position
         self._direction = direction
@@ -23,18 +44,26 @@ class AgentState:
         self._isPacman = isPacman
         self._scaredTimer = 0
 
+        # Cache the hash, since game states hash their agents every time they are hashed.
+        # Any method that modifies this state should clear the cached value.
+        self._hash = None
+
     def copy(self):
-        state = AgentState(self._startPosition, self._startDirection, self._startIsPacman)
+        # Skip the constructor, all the fields are set here.
+        state = AgentState.__new__(AgentState)
 
+        state._start = self._start
         state._isPacman = self._isPacman
         state._position = self._position
         state._direction = self._direction
         state._scaredTimer = self._scaredTimer
+        state._hash = self._hash
 
         return state
 
     def decrementScaredTimer(self):
         self._scaredTimer = max(0, self._scaredTimer - 1)
+        self._hash = None
 
     def getDirection(self):
         return self._direction
@@ -67,11 +96,52 @@ class AgentState:
     def isScaredGhost(self):
         return (self.isGhost() and self.isScared())
 
+    def loadPacked(self, record, offset = 0):
+        """
+        Set this state from a record produced by `AgentState.pack`.
+        The start information is not part of the record, so it is left unchanged.
+        """
+
+        x, y, direction, isPacman, scaredTimer = PACKED_FORMAT.unpack_from(record, offset)
+
+        if (x == PACKED_NO_POSITION):
+            self._position = None
+        else:
+            self._position = (_unpackCoordinate(x), _unpackCoordinate(y))
+
+        self._direction = PACKED_DIRECTIONS[direction]
+        self._isPacman = bool(isPacman)
+        self._scaredTimer = scaredTimer
+        self._hash = None
+
+    def pack(self):
+        """
+        Get a fixed-size bytes record of this state (position, direction, type, and timer).
+        """
+
+        if (self._position is None):
+            x = PACKED_NO_POSITION
+            y = PACKED_NO_POSITION
+        else:
+            x = int(self._position[0] * 2)
+            y = int(self._position[1] * 2)
+
+        return PACKED_FORMAT.pack(x, y, PACKED_DIRECTION_INDEXES[self._direction],
+                self._isPacman, self._scaredTimer)
+
     def setIsPacman(self, isPacman):
+        if (self._isPacman == isPacman):
+            return
+
         self._isPacman = isPacman
+        self._hash = None
 
     def setScaredTimer(self, timer):
+        if (self._scaredTimer == timer):
+            return
+
         self._scaredTimer = timer
+        self._hash = None
 
     def snapToNearestPoint(self):
         """
@@ -79,16 +149,16 @@ class AgentState:
         """
 
         self._position = util.nearestPoint(self._position)
+        self._hash = None
 
     def respawn(self):
         """
         This agent was killed, respawn it at the start as a pacman.
         """
 
-        self._position = self._startPosition
-        self._direction = self._startDirection
-        self._isPacman = self._startIsPacman
+        self._position, self._direction, self._isPacman = self._start
         self._scaredTimer = 0
+        self._hash = None
 
     def updatePosition(self, vector):
         """
@@ -105,6 +175,8 @@ class AgentState:
             # If this is a zero vector, face the same direction as before.
             self._direction = direction
 
+        self._hash = None
+
     def __eq__(self, other):
         if (other is None):
             return False
@@ -115,7 +187,11 @@ class AgentState:
                 and self._scaredTimer == other._scaredTimer)
 
     def __hash__(self):
-        return util.buildHash(self._position, self._direction, self._isPacman, self._scaredTimer)
+        if (self._hash is None):
+            self._hash = util.buildHash(self._position, self._direction, self._isPacman,
+                    self._scaredTimer)
+
+        return self._hash
 
     def __str__(self):
         typeString = 'Ghost'
@@ -127,4 +203,14 @@ class AgentState:
             scaredString = '!'
 
         return "%s%s: Position: %s, Direction: %s" % (typeString, scaredString,
-                str(self._position), str(self.direction))
+                str(self._position), str(self._direction))
+
+def _unpackCoordinate(value):
+    """
+    Convert a packed (doubled) coordinate back into its original value.
+    """
+
+    if (value % 2 == 0):
+        return value // 2
+
+    return value / 2.0
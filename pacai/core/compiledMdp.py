@@ -0,0 +1,551 @@
+"""
+Fast value iteration and policy evaluation over a `pacai.core.mdp.MarkovDecisionProcess`.
+
+A `CompiledMDP` asks the MDP for its states, actions, transitions, and rewards once,
+and stores them in flat tables indexed by state id.
+After that, each value iteration backup is a handful of list comprehensions over the tables
+instead of a Python loop over states that calls back into the MDP for every transition.
+
+The tables are sparse: each (state, action) pair only stores the states it can reach.
+Pairs are grouped into "slots" so that every backup can be done with whole-list operations:
+action slot `i` holds the `i`th action of every state that has more than `i` actions,
+and inside an action slot, transition slot `j` holds the `j`th transition of every pair
+that has more than `j` transitions.
+
+Q-values are computed exactly like the textbook loop does it,
+`sum(prob * (reward + discount * value))` over the transitions in the order the MDP gives them,
+so the results are identical (not just close) to a straightforward implementation.
+
+Besides synchronous value iteration (`CompiledMDP.valueIteration`), there are two solvers
+that update the values in place, so new values are used as soon as they are computed:
+ - `CompiledMDP.gaussSeidel` sweeps over the states like value iteration does.
+ - `CompiledMDP.prioritizedSweeping` always backs up the state whose value is the most wrong
+   (its Bellman residual), and only revisits the predecessors of states that changed.
+   When rewards are sparse, most states do not need to be touched until the values reach them,
+   so it converges in a fraction of the backups.
+"""
+
+import heapq
+import operator
+
+# The residual that prioritized sweeping stops at when it is not given one.
+DEFAULT_TOLERANCE = 1e-6
+
+# Prioritized sweeping moves a state that is already queued up the queue
+# once its residual is this many times the residual it was queued with.
+REQUEUE_FACTOR = 2.0
+
+class CompiledMDP(object):
+    """
+    The states, actions, transitions, and rewards of an MDP, in tables.
+
+    The MDP is read when this is constructed,
+    so changes to the MDP after that (e.g. a new noise) need a new `CompiledMDP`.
+    Terminal states have no actions and a value of zero.
+    """
+
+    def __init__(self, mdp):
+        self.mdp = mdp
+
+        states = list(mdp.getStates())
+        actions = [self._getActions(mdp, state) for state in states]
+
+        # States are ordered by how many actions they have (most first, stable otherwise),
+        # so every action slot covers a prefix of the states.
+        order = sorted(range(len(states)), key = lambda index: -len(actions[index]))
+
+        self._states = [states[index] for index in order]
+        self._actions = [actions[index] for index in order]
+        self._stateIds = {state: stateId for (stateId, state) in enumerate(self._states)}
+
+        if (len(self._stateIds) != len(self._states)):
+            raise ValueError('MDPs cannot have duplicate states.')
+
+        # [_PairTable, ...] (one per action slot).
+        self._actionSlots = []
+
+        # {(state, action): (action slot, index in the slot)}
+        self._pairIds = {}
+
+        # [[[(next state id, probability, reward), ...] (one per action)], ...]
+        # (indexed by state id, only for the states that have actions).
+        self._stateTransitions = []
+
+        # The states that can reach each state (built when needed, see _getPredecessors()).
+        self._predecessors = None
+
+        # How many state backups have been done (over all the solvers).
+        self._backupCount = 0
+
+        numSlots = max([len(stateActions) for stateActions in self._actions], default = 0)
+        for slot in range(numSlots):
+            pairs = []
+            for (stateId, stateActions) in enumerate(self._actions):
+                if (len(stateActions) <= slot):
+                    break
+
+                action = stateActions[slot]
+                self._pairIds[(self._states[stateId], action)] = (slot, len(pairs))
+                pairs.append(self._compilePair(stateId, action))
+
+                if (slot == 0):
+                    self._stateTransitions.append([])
+
+                self._stateTransitions[stateId].append(pairs[-1])
+
+            self._actionSlots.append(_PairTable(pairs))
+
+    def backup(self, values, discount):
+        """
+        One step of value iteration:
+        get the new value of every state (`max_action Q(state, action)`) from `values`.
+        """
+
+        newValues = [0.0] * len(values)
+
+        for (slot, pairTable) in enumerate(self._actionSlots):
+            qValues = pairTable.getQValues(values, discount)
+
+            if (slot == 0):
+                newValues[:len(qValues)] = qValues
+            else:
+                # The same as max(value, qValue).
+                newValues[:len(qValues)] = [(qValue if (qValue > value) else value)
+                        for (value, qValue) in zip(newValues, qValues)]
+
+        self._backupCount += len(self._stateTransitions)
+
+        return newValues
+
+    def evaluatePolicy(self, policy, discount, iterations = None, tolerance = None,
+            values = None):
+        """
+        Iterative policy evaluation:
+        get the value of every state when following `policy`,
+        a dict of {state: action} (states without an action are worth zero).
+
+        See `CompiledMDP.valueIteration` for the stopping conditions and the return value.
+        """
+
+        pairs = []
+        stateIds = []
+        for (state, action) in policy.items():
+            if (action is None):
+                continue
+
+            if ((state, action) not in self._pairIds):
+                raise ValueError("Illegal action '%s' in state: %s." % (action, str(state)))
+
+            stateIds.append(self._stateIds[state])
+            pairs.append(self._compilePair(self._stateIds[state], action))
+
+        pairTable = _PairTable(pairs)
+
+        def policyBackup(values, discount):
+            self._backupCount += len(pairs)
+
+            newValues = [0.0] * len(values)
+            for (stateId, value) in zip(stateIds, pairTable.getQValues(values, discount)):
+                newValues[stateId] = value
+
+            return newValues
+
+        return self._iterate(policyBackup, discount, iterations, tolerance, values)
+
+    def gaussSeidel(self, discount, iterations = None, tolerance = None, values = None):
+        """
+        Run value iteration in place (Gauss-Seidel):
+        each sweep goes over the states in order, and backs each one up with the newest values.
+        This usually needs fewer sweeps than `CompiledMDP.valueIteration`,
+        although each sweep is slower.
+
+        Stops after `iterations` sweeps,
+        or once no value changes by more than `tolerance` in a sweep.
+
+        Returns (the value list, the number of sweeps done).
+        """
+
+        values = self._startValues(iterations, tolerance, values)
+
+        count = 0
+        while (iterations is None or count < iterations):
+            change = 0.0
+
+            for (stateId, stateTransitions) in enumerate(self._stateTransitions):
+                value = self._getBestQValue(stateTransitions, values, discount)
+
+                if (abs(value - values[stateId]) > change):
+                    change = abs(value - values[stateId])
+
+                values[stateId] = value
+
+            self._backupCount += len(self._stateTransitions)
+            count += 1
+
+            if (tolerance is not None and change <= tolerance):
+                break
+
+        return values, count
+
+    def getBackupCount(self):
+        """
+        Get the number of state backups done (by all the solvers) so far.
+        """
+
+        return self._backupCount
+
+    def getNumStates(self):
+        return len(self._states)
+
+    def getNumPairs(self):
+        """
+        Get the number of (state, action) pairs.
+        """
+
+        return len(self._pairIds)
+
+    def getNumTransitions(self):
+        return sum([pairTable.getNumTransitions() for pairTable in self._actionSlots])
+
+    def getPolicy(self, values, discount):
+        """
+        Get the best action of every state (with respect to `values`) as {state: action}.
+        Ties go to the greatest action (as they do when taking `max` over (Q-value, action) tuples).
+        Terminal states are left out.
+        """
+
+        qValues = self.getQValues(values, discount)
+
+        policy = {}
+        for (state, stateActions) in zip(self._states, self._actions):
+            if (len(stateActions) == 0):
+                continue
+
+            policy[state] = max([(qValues[(state, action)], action)
+                    for action in stateActions])[1]
+
+        return policy
+
+    def getQValues(self, values, discount):
+        """
+        Get Q(state, action) of every pair (with respect to `values`)
+        as {(state, action): Q-value}.
+        """
+
+        qValues = {}
+        for (slot, pairTable) in enumerate(self._actionSlots):
+            slotValues = pairTable.getQValues(values, discount)
+            for (stateId, value) in enumerate(slotValues):
+                qValues[(self._states[stateId], self._actions[stateId][slot])] = value
+
+        return qValues
+
+    def getStateId(self, state):
+        """
+        Get the index of a state in the value lists.
+        """
+
+        return self._stateIds[state]
+
+    def getStates(self):
+        """
+        Get all the states (in value list order).
+        """
+
+        return self._states
+
+    def getValueDict(self, values, includeTerminal = False):
+        """
+        Convert a value list into {state: value}.
+        Terminal states are left out unless `includeTerminal` is True.
+        """
+
+        return {state: value for (state, stateActions, value)
+                in zip(self._states, self._actions, values)
+                if (includeTerminal or len(stateActions) > 0)}
+
+    def getZeroValues(self):
+        return [0.0] * len(self._states)
+
+    def prioritizedSweeping(self, discount, tolerance = DEFAULT_TOLERANCE, maxBackups = None,
+            values = None):
+        """
+        Run prioritized sweeping:
+        keep a queue of states ordered by their Bellman residual
+        (how much a backup would change their value),
+        and always back up the state with the largest residual.
+
+        Every state keeps an upper bound on its residual:
+        when a state's value changes by `delta`,
+        each predecessor's residual can grow by at most
+        `discount * delta * (the largest probability of reaching the state with one action)`.
+        Only when that bound goes over `tolerance` is the predecessor's actual residual computed
+        (and the predecessor queued if it really is over).
+
+        Every Bellman evaluation of a state counts as a backup:
+        the first pass that finds all the residuals, the backups of queued states,
+        and the checks of predecessors' actual residuals.
+        Stops once every residual is at most `tolerance` (the same test as the other solvers),
+        or once `maxBackups` backups have been done.
+
+        Returns (the value list, the number of backups done).
+        """
+
+        if (tolerance is None):
+            raise ValueError('Prioritized sweeping needs a tolerance.')
+
+        values = self._startValues(None, tolerance, values)
+        predecessors = self._getPredecessors()
+        stateTransitions = self._stateTransitions
+
+        # An upper bound on the residual of each state.
+        residuals = list(map(abs, map(operator.sub, self.backup(values, discount), values)))
+        count = len(stateTransitions)
+
+        # [(negative residual, state id), ...] (a heap, so the largest residual is first).
+        # Entries can be stale: the current one for a state is the one in `queued`.
+        queue = []
+
+        # {state id: the residual it was queued with}
+        queued = {}
+
+        for (stateId, residual) in enumerate(residuals):
+            if (residual > tolerance):
+                queue.append((-residual, stateId))
+                queued[stateId] = residual
+
+        heapq.heapify(queue)
+
+        while (len(queue) > 0 and (maxBackups is None or count < maxBackups)):
+            negativeResidual, stateId = heapq.heappop(queue)
+            if (queued.get(stateId) != -negativeResidual):
+                continue
+
+            del queued[stateId]
+
+            value = self._getBestQValue(stateTransitions[stateId], values, discount)
+            delta = abs(value - values[stateId])
+
+            values[stateId] = value
+            residuals[stateId] = 0.0
+            count += 1
+
+            for (predecessor, probability) in predecessors[stateId]:
+                residual = residuals[predecessor] + discount * probability * delta
+                residuals[predecessor] = residual
+
+                if (residual <= tolerance):
+                    continue
+
+                if (maxBackups is not None and count >= maxBackups):
+                    break
+
+                # The bound is too loose, get the actual residual.
+                residual = abs(self._getBestQValue(stateTransitions[predecessor], values, discount)
+                        - values[predecessor])
+                residuals[predecessor] = residual
+                count += 1
+
+                if (residual <= tolerance):
+                    continue
+
+                # Only move a state up the queue once its residual has grown a lot,
+                # otherwise the queue fills up with stale entries.
+                oldResidual = queued.get(predecessor)
+                if (oldResidual is None or residual >= REQUEUE_FACTOR * oldResidual):
+                    heapq.heappush(queue, (-residual, predecessor))
+                    queued[predecessor] = residual
+
+        # The first pass was already counted by backup().
+        self._backupCount += count - len(stateTransitions)
+
+        return values, count
+
+    def valueIteration(self, discount, iterations = None, tolerance = None, values = None):
+        """
+        Run value iteration starting from `values` (a value list, zeros by default).
+
+        Stops after `iterations` backups,
+        or once no value changes by more than `tolerance` in a backup
+        (whichever comes first, at least one of them must be given).
+
+        Returns (the value list, the number of backups done).
+        """
+
+        return self._iterate(self.backup, discount, iterations, tolerance, values)
+
+    def _compilePair(self, stateId, action):
+        """
+        Get the transitions of a (state, action) pair as [(next state id, probability, reward)].
+        """
+
+        state = self._states[stateId]
+
+        transitions = []
+        for (nextState, probability) in self.mdp.getTransitionStatesAndProbs(state, action):
+            nextStateId = self._stateIds.get(nextState)
+            if (nextStateId is None):
+                raise ValueError('Transition to a state that is not in the MDP: %s.' %
+                        (str(nextState)))
+
+            reward = self.mdp.getReward(state, action, nextState)
+            transitions.append((nextStateId, probability, reward))
+
+        return transitions
+
+    def _getActions(self, mdp, state):
+        if (mdp.isTerminal(state)):
+            return ()
+
+        return tuple(mdp.getPossibleActions(state))
+
+    def _getBestQValue(self, stateTransitions, values, discount):
+        """
+        Get the largest Q-value of a state (given its transitions by action).
+        """
+
+        best = None
+        for transitions in stateTransitions:
+            qValue = 0
+            for (nextStateId, probability, reward) in transitions:
+                qValue += probability * (reward + discount * values[nextStateId])
+
+            if (best is None or qValue > best):
+                best = qValue
+
+        return best
+
+    def _getPredecessors(self):
+        """
+        Get the states that can reach each state, as
+        [[(predecessor state id, the largest probability of reaching the state from it), ...], ...]
+        (indexed by state id, only for the states that have actions).
+        The probability of reaching a state with an action is the total over all its transitions
+        (an MDP may list the same next state more than once),
+        and the largest is taken over the predecessor's actions.
+        """
+
+        if (self._predecessors is not None):
+            return self._predecessors
+
+        predecessors = [{} for stateTransitions in self._stateTransitions]
+        for (stateId, stateTransitions) in enumerate(self._stateTransitions):
+            for transitions in stateTransitions:
+                # {next state id: the total probability of reaching it with this action}
+                actionProbabilities = {}
+                for (nextStateId, probability, reward) in transitions:
+                    # States without actions never need a backup.
+                    if (nextStateId >= len(predecessors)):
+                        continue
+
+                    actionProbabilities[nextStateId] = (probability
+                            + actionProbabilities.get(nextStateId, 0.0))
+
+                for (nextStateId, probability) in actionProbabilities.items():
+                    stateProbabilities = predecessors[nextStateId]
+                    if (probability > stateProbabilities.get(stateId, 0.0)):
+                        stateProbabilities[stateId] = probability
+
+        self._predecessors = [sorted(stateProbabilities.items())
+                for stateProbabilities in predecessors]
+        return self._predecessors
+
+    def _iterate(self, backup, discount, iterations, tolerance, values):
+        values = self._startValues(iterations, tolerance, values)
+
+        count = 0
+        while (iterations is None or count < iterations):
+            newValues = backup(values, discount)
+            count += 1
+
+            if (tolerance is not None
+                    and max(map(abs, map(operator.sub, newValues, values)), default = 0.0)
+                        <= tolerance):
+                values = newValues
+                break
+
+            values = newValues
+
+        return values, count
+
+    def _startValues(self, iterations, tolerance, values):
+        """
+        Check the stopping conditions of a solver, and get a (new) list of starting values.
+        """
+
+        if (iterations is None and tolerance is None):
+            raise ValueError('Value iteration needs a number of iterations or a tolerance.')
+
+        if (values is None):
+            return self.getZeroValues()
+
+        if (len(values) != len(self._states)):
+            raise ValueError('Expected %d values, got %d.' % (len(self._states), len(values)))
+
+        return list(values)
+
+class _PairTable(object):
+    """
+    The transitions of a list of (state, action) pairs, split into transition slots.
+    Slot `j` holds the `j`th transition of every pair with more than `j` transitions.
+    Pairs are sorted by how many transitions they have (most first),
+    so each slot covers a prefix of the (sorted) pairs.
+    """
+
+    def __init__(self, pairs):
+        self._numPairs = len(pairs)
+        self._numTransitions = sum([len(transitions) for transitions in pairs])
+
+        order = sorted(range(len(pairs)), key = lambda index: -len(pairs[index]))
+
+        # If the pairs were already sorted, there is no need to put them back in order.
+        self._unsort = None
+        if (order != list(range(len(pairs)))):
+            unsort = [0] * len(pairs)
+            for (sortedIndex, index) in enumerate(order):
+                unsort[index] = sortedIndex
+
+            self._unsort = operator.itemgetter(*unsort)
+
+        # [(next state ids, probabilities, rewards), ...] (one per transition slot).
+        self._slots = []
+
+        numSlots = max([len(transitions) for transitions in pairs], default = 0)
+        for slot in range(numSlots):
+            nextStateIds = []
+            probabilities = []
+            rewards = []
+
+            for index in order:
+                transitions = pairs[index]
+                if (len(transitions) <= slot):
+                    break
+
+                nextStateId, probability, reward = transitions[slot]
+                nextStateIds.append(nextStateId)
+                probabilities.append(probability)
+                rewards.append(reward)
+
+            self._slots.append((nextStateIds, probabilities, rewards))
+
+    def getNumTransitions(self):
+        return self._numTransitions
+
+    def getQValues(self, values, discount):
+        """
+        Get the Q-value of every pair (in the original pair order).
+        """
+
+        qValues = [0] * self._numPairs
+
+        for (nextStateIds, probabilities, rewards) in self._slots:
+            # The slot only covers a prefix of the pairs, zip() stops at its end.
+            qValues[:len(nextStateIds)] = [
+                    qValue + probability * (reward + discount * values[nextStateId])
+                    for (qValue, probability, reward, nextStateId)
+                    in zip(qValues, probabilities, rewards, nextStateIds)]
+
+        if (self._unsort is not None):
+            qValues = list(self._unsort(qValues))
+
+        return qValues
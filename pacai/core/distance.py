@@ -1,5 +1,14 @@
-from pacai.core.search.position import PositionSearchProblem
-from pacai.student import search
+import weakref
+
+from pacai.core.search import gridSearch
+
+# The most maze distances to remember for each layout (see maze()).
+MAZE_CACHE_SIZE = 100000
+
+# {ActionTable: {(position1, position2): distance}}
+# Each action table is built once per layout, so it stands in for the walls.
+# Keys are weak, so the distances for a layout are dropped along with its action table.
+_mazeCaches = weakref.WeakKeyDictionary()
 
 def manhattan(position1, position2):
     """
@@ -17,10 +26,11 @@ def euclidean(position1, position2):
 
 def maze(position1, position2, gameState):
     """
-    Returns the maze distance between any two positions,
-    using the search functions you have already built.
+    Returns the maze distance between any two positions.
 
-    WARNING: `pacai.student.search.breadthFirstSearch` must already be implemted.
+    Distances are found with `pacai.core.search.gridSearch.shortestPath`,
+    and the most recent `MAZE_CACHE_SIZE` of them are remembered for each set of walls
+    (in both directions).
 
     Example usage: `distance.maze((2, 4), (5, 6), gameState)`.
     """
@@ -36,6 +46,33 @@ def maze(position1, position2, gameState):
     if (walls[x2][y2]):
         raise ValueError('Position2 is a wall: ' + str(position2))
 
-    prob = PositionSearchProblem(gameState, start = position1, goal = position2)
+    actionTable = gameState.getActionTable()
+
+    # Distances are symmetric, so only store one order.
+    if (position2 < position1):
+        position1, position2 = position2, position1
+
+    cache = _mazeCaches.get(actionTable)
+    if (cache is None):
+        cache = {}
+        _mazeCaches[actionTable] = cache
+
+    key = (position1, position2)
+
+    distance = cache.get(key)
+    if (distance is not None):
+        return distance
+
+    path = gridSearch.shortestPath(actionTable, position1, position2)
+    if (path is None):
+        raise ValueError('There is no path between %s and %s.' % (str(position1), str(position2)))
+
+    distance = len(path) - 1
+
+    if (len(cache) >= MAZE_CACHE_SIZE):
+        # Dicts keep insertion order, so the first key is the oldest.
+        del cache[next(iter(cache))]
+
+    cache[key] = distance
 
-    return len(search.breadthFirstSearch(prob))
+    return distance
@@ -1,10 +1,33 @@
+import array
+import hashlib
+import logging
+import mmap
+import os
+import struct
 import sys
+import tempfile
 
 from pacai.core.distance import manhattan
-from pacai.util import priorityQueue
 
 DEFAULT_DISTANCE = 10000
 
+# Markers for unreachable cells in the distance tables (the max value of the array type).
+UNREACHABLE_16 = 2 ** 16 - 1
+UNREACHABLE_32 = 2 ** 32 - 1
+
+# The on-disk distance cache.
+# The cache lives in $PACAI_CACHE_DIR (if set) or the user's cache directory.
+# Setting PACAI_CACHE_DIR to an empty string disables the disk cache.
+CACHE_DIR_ENV = 'PACAI_CACHE_DIR'
+CACHE_SUBDIR = 'distances'
+CACHE_MAGIC = b'PDT1'
+# magic, table typecode, width, height, number of cells.
+# The header is padded so that the arrays after it are aligned.
+CACHE_HEADER_FORMAT = struct.Struct('=4s1s3xIII4x')
+# The most bytes of tables to keep on disk.
+# Past this, the least recently used tables are removed (see pruneCache()).
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
 class Distancer(object):
     """
     A class for computing and caching the shortest path between any two points in a given maze.
@@ -48,11 +71,7 @@ class Distancer(object):
         return bestDistance
 
     def getDistanceOnGrid(self, pos1, pos2):
-        key = (pos1, pos2)
-        if key in self._distances:
-            return self._distances[key]
-
-        raise Exception("Position not in grid: " + str(key))
+        return self._distances.getDistance(pos1, pos2)
 
     def isReadyForMazeDistance(self):
         return (self._distances is not None)
@@ -88,65 +107,354 @@ class DistanceCalculator:
 
     def run(self):
         if self.layout.walls not in self.cache:
-            self.cache[self.layout.walls] = computeDistances(self.layout)
+            self.cache[self.layout.walls] = getDistanceTable(self.layout)
 
         self.distancer._distances = self.cache[self.layout.walls]
 
+class DistanceTable:
+    """
+    All-pairs maze distances for a layout, stored in a dense table.
+
+    Every open (non-wall) cell is given a cell id,
+    and the distance between two cells is at `row * numCells + column` in a flat `array.array`.
+    Cells that cannot reach each other have a distance of `sys.maxsize`.
+
+    For compatibility with the old dict-based tables,
+    a table can also be indexed (and checked for membership) with a (pos1, pos2) key.
+    """
+
+    def __init__(self, width, height, cellIds, distances):
+        """
+        Args:
+            width: The width of the layout.
+            height: The height of the layout.
+            cellIds: An array mapping a cell's index on the board (x * height + y)
+                to its id in the table (or -1 for walls).
+            distances: A flat array holding the table.
+                This may also be a memoryview (e.g. over a memory-mapped cache file).
+        """
+
+        self._width = width
+        self._height = height
+        self._cellIds = cellIds
+        self._distances = distances
+
+        self._positionIds = {}
+        for index, cellId in enumerate(cellIds):
+            if (cellId >= 0):
+                self._positionIds[(index // height, index % height)] = cellId
+
+        self._numCells = len(self._positionIds)
+
+        self._unreachable = UNREACHABLE_16
+        if (distances.itemsize != 2):
+            self._unreachable = UNREACHABLE_32
+
+    def getCellId(self, position):
+        """
+        Get the id of the cell at the given integral position,
+        or None if the position is a wall or not on the board.
+        """
+
+        x, y = position
+        x = int(x)
+        y = int(y)
+
+        if (x < 0 or x >= self._width or y < 0 or y >= self._height):
+            return None
+
+        cellId = self._cellIds[x * self._height + y]
+        if (cellId < 0):
+            return None
+
+        return cellId
+
+    def getDistance(self, pos1, pos2):
+        """
+        Get the distance between two integral positions.
+        Raises an exception if either position is not an open cell.
+        """
+
+        # This is the hot path for agents, so positions are resolved with a single dict lookup each.
+        try:
+            id1 = self._positionIds[pos1]
+            id2 = self._positionIds[pos2]
+        except (KeyError, TypeError):
+            raise Exception("Position not in grid: " + str((pos1, pos2)))
+
+        distance = self._distances[id1 * self._numCells + id2]
+        if (distance == self._unreachable):
+            return sys.maxsize
+
+        return distance
+
+    def getNumCells(self):
+        return self._numCells
+
+    def __contains__(self, key):
+        pos1, pos2 = key
+        return self.getCellId(pos1) is not None and self.getCellId(pos2) is not None
+
+    def __getitem__(self, key):
+        pos1, pos2 = key
+        return self.getDistance(pos1, pos2)
+
 def computeDistances(layout):
     """
-    Runs UCS to all other positions from each position.
+    Compute the maze distance between every pair of open cells in the layout.
+    Since all moves have the same cost, this is just a BFS from each cell
+    over a precomputed adjacency list.
+
+    Returns a `DistanceTable`.
     """
 
-    distances = {}
-    allNodes = layout.walls.asList(False)
+    width = layout.width
+    height = layout.height
+    walls = layout.walls
 
-    for source in allNodes:
-        dist = {}
-        closed = {}
+    # Assign ids to the open cells.
+    cellIds = array.array('i', [-1] * (width * height))
+    positions = []
 
-        for node in allNodes:
-            dist[node] = sys.maxsize
+    for x in range(width):
+        for y in range(height):
+            if (not walls[x][y]):
+                cellIds[x * height + y] = len(positions)
+                positions.append((x, y))
 
-        queue = priorityQueue.PriorityQueue()
-        queue.push(source, 0)
-        dist[source] = 0
+    numCells = len(positions)
 
-        while not queue.isEmpty():
-            node = queue.pop()
-            if node in closed:
+    # Build the adjacency list (by id).
+    neighbors = []
+    for (x, y) in positions:
+        adjacent = []
+
+        for (dx, dy) in ((0, 1), (0, -1), (1, 0), (-1, 0)):
+            nextX = x + dx
+            nextY = y + dy
+
+            if (nextX < 0 or nextX >= width or nextY < 0 or nextY >= height):
                 continue
 
-            closed[node] = True
-            nodeDist = dist[node]
-            adjacent = []
-            x, y = node
+            cellId = cellIds[nextX * height + nextY]
+            if (cellId >= 0):
+                adjacent.append(cellId)
+
+        neighbors.append(adjacent)
+
+    typecode = 'H'
+    unreachable = UNREACHABLE_16
+    if (numCells >= UNREACHABLE_16):
+        typecode = 'I'
+        unreachable = UNREACHABLE_32
+
+    distances = array.array(typecode)
+    unreachableRow = [unreachable] * numCells
+
+    for source in range(numCells):
+        row = list(unreachableRow)
+        row[source] = 0
+
+        queue = [source]
+        head = 0
+
+        while (head < len(queue)):
+            node = queue[head]
+            head += 1
+
+            nextDistance = row[node] + 1
+            for other in neighbors[node]:
+                if (row[other] == unreachable):
+                    row[other] = nextDistance
+                    queue.append(other)
+
+        distances.extend(row)
+
+    return DistanceTable(width, height, cellIds, distances)
+
+def getDistanceTable(layout):
+    """
+    Get the `DistanceTable` for a layout.
+    Tables are shared by every layout with the same walls,
+    first in this process (through `distanceMap`) and then across processes through the disk cache.
+    Only the first game on a map will have to compute its table.
+    """
+
+    key = getWallsKey(layout.walls)
+
+    if (key in distanceMap):
+        return distanceMap[key]
+
+    table = loadCachedTable(key)
+    if (table is None):
+        table = computeDistances(layout)
+        saveCachedTable(key, table)
+
+    distanceMap[key] = table
+    return table
+
+def getWallsKey(walls):
+    """
+    Get a content hash of a layout's walls that is stable across processes.
+    """
+
+    width = walls.getWidth()
+    height = walls.getHeight()
+    bits = walls.getBits()
+
+    content = b'%d:%d:%s:%x' % (width, height, sys.byteorder.encode(), bits)
+    return hashlib.sha1(content).hexdigest()
+
+def getCacheDir():
+    """
+    Get the directory that distance tables are cached in,
+    or None if the disk cache is disabled.
+    """
+
+    cacheDir = os.environ.get(CACHE_DIR_ENV)
+    if (cacheDir is not None):
+        if (cacheDir == ''):
+            return None
+
+        return os.path.join(cacheDir, CACHE_SUBDIR)
+
+    baseDir = os.environ.get('XDG_CACHE_HOME')
+    if (not baseDir):
+        baseDir = os.path.join(os.path.expanduser('~'), '.cache')
+
+    return os.path.join(baseDir, 'pacai', CACHE_SUBDIR)
+
+def loadCachedTable(key):
+    """
+    Load a table from the disk cache, or return None if it is not cached.
+    The file is memory-mapped read-only, so all the processes using a table share a single copy.
+    """
+
+    cacheDir = getCacheDir()
+    if (cacheDir is None):
+        return None
+
+    path = os.path.join(cacheDir, key + '.bin')
+
+    try:
+        with open(path, 'rb') as file:
+            data = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        magic, typecode, width, height, numCells = CACHE_HEADER_FORMAT.unpack_from(data)
+        typecode = typecode.decode()
+        if (magic != CACHE_MAGIC or typecode not in ('H', 'I')):
+            raise ValueError('Bad header.')
 
-            if not layout.isWall((x, y + 1)):
-                adjacent.append((x, y + 1))
+        view = memoryview(data)
 
-            if not layout.isWall((x, y - 1)):
-                adjacent.append((x, y - 1))
+        offset = CACHE_HEADER_FORMAT.size
+        cellIdsSize = width * height * array.array('i').itemsize
+        cellIds = view[offset:(offset + cellIdsSize)].cast('i')
 
-            if not layout.isWall((x + 1, y)):
-                adjacent.append((x + 1, y))
+        offset += cellIdsSize
+        distances = view[offset:].cast(typecode)
 
-            if not layout.isWall((x - 1, y)):
-                adjacent.append((x - 1, y))
+        if (len(distances) != numCells * numCells):
+            raise ValueError('Bad table size.')
+    except (struct.error, TypeError, ValueError) as ex:
+        logging.warning('Ignoring corrupt distance cache file "%s": %s' % (path, ex))
+        return None
 
-            for other in adjacent:
-                if other not in dist:
+    # Mark the table as recently used, so pruneCache() removes it last.
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+    return DistanceTable(width, height, cellIds, distances)
+
+def saveCachedTable(key, table):
+    """
+    Write a table to the disk cache.
+    The file is written to a temp file first and then moved into place,
+    so concurrent processes will never see a partially written table.
+    Failing to write the cache is not an error, the table just won't be cached.
+    """
+
+    cacheDir = getCacheDir()
+    if (cacheDir is None):
+        return
+
+    header = CACHE_HEADER_FORMAT.pack(CACHE_MAGIC, table._distances.typecode.encode(),
+            table._width, table._height, table._numCells)
+
+    tempPath = None
+    try:
+        os.makedirs(cacheDir, exist_ok = True)
+
+        handle, tempPath = tempfile.mkstemp(dir = cacheDir, suffix = '.tmp')
+        with os.fdopen(handle, 'wb') as file:
+            file.write(header)
+            table._cellIds.tofile(file)
+            table._distances.tofile(file)
+
+        os.replace(tempPath, os.path.join(cacheDir, key + '.bin'))
+    except OSError as ex:
+        logging.debug('Unable to write distance cache to "%s": %s' % (cacheDir, ex))
+
+        if (tempPath is not None and os.path.exists(tempPath)):
+            os.remove(tempPath)
+
+        return
+
+    pruneCache(cacheDir)
+
+def pruneCache(cacheDir, maxBytes = MAX_CACHE_BYTES):
+    """
+    Remove the least recently used tables from the disk cache
+    until the tables in it take up at most `maxBytes`.
+    Other processes may be pruning at the same time, so files that are already gone are skipped.
+    Returns the number of tables that were removed.
+    """
+
+    entries = []
+    totalBytes = 0
+
+    try:
+        with os.scandir(cacheDir) as files:
+            for entry in files:
+                if (not entry.name.endswith('.bin')):
                     continue
 
-                oldDist = dist[other]
-                newDist = nodeDist + 1
-                if newDist < oldDist:
-                    dist[other] = newDist
-                    queue.push(other, newDist)
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+
+                entries.append((stat.st_mtime, entry.path, stat.st_size))
+                totalBytes += stat.st_size
+    except OSError as ex:
+        logging.debug('Unable to read distance cache "%s": %s' % (cacheDir, ex))
+        return 0
+
+    if (totalBytes <= maxBytes):
+        return 0
+
+    # Oldest first.
+    entries.sort()
+
+    count = 0
+    for (mtime, path, size) in entries:
+        if (totalBytes <= maxBytes):
+            break
+
+        try:
+            os.remove(path)
+            count += 1
+        except OSError:
+            pass
 
-        for target in allNodes:
-            distances[(target, source)] = dist[target]
+        totalBytes -= size
 
-    return distances
+    return count
 
 def getDistanceOnGrid(distances, pos1, pos2):
     key = (pos1, pos2)
@@ -1,19 +1,135 @@
 """
 Feature extractors for game states.
+
+Features can be had in two forms:
+as a dict of {feature name: value} (`FeatureExtractor.getFeatures`),
+or as a sparse `FeatureVector` over the extractor's `FeatureIndex`
+(`FeatureExtractor.getFeatureVector` and `FeatureExtractor.getFeatureVectors`).
+Vectors are what learning agents should use:
+a dot product with a weight list is a couple of builtin calls instead of a loop over a dict,
+and the vectors of every action in a state can be extracted at once.
 """
 
 import abc
+import operator
 
 from pacai.core.actions import Actions
-from pacai.core.search import search
-from pacai.student.searchAgents import AnyFoodSearchProblem
+from pacai.core.search.foodField import UNREACHABLE
+from pacai.core.search.foodField import getNearestFoodField
+
+class FeatureIndex(object):
+    """
+    A fixed index for every feature name, so that features can be put in vectors.
+    A name gets the next free index the first time it is seen, and keeps it.
+    """
+
+    def __init__(self, names = ()):
+        # {name: index}
+        self._indexes = {}
+        self._names = []
+
+        for name in names:
+            self.register(name)
+
+    def __len__(self):
+        return len(self._names)
+
+    def getIndex(self, name):
+        """
+        Get the index of a feature (or None if it has not been seen).
+        """
+
+        return self._indexes.get(name)
+
+    def getName(self, index):
+        return self._names[index]
+
+    def getNames(self):
+        """
+        Get the names of all the features (in index order).
+        """
+
+        return list(self._names)
+
+    def register(self, name):
+        """
+        Get the index of a feature, giving it the next free index if it does not have one yet.
+        """
+
+        index = self._indexes.get(name)
+        if (index is None):
+            index = len(self._names)
+            self._indexes[name] = index
+            self._names.append(name)
+
+        return index
+
+    def toVector(self, features):
+        """
+        Convert a dict of {feature name: value} into a `FeatureVector`
+        (in the same order as the dict).
+        """
+
+        indexes = tuple([self.register(name) for name in features])
+        return FeatureVector(indexes, tuple(features.values()))
+
+class FeatureVector(object):
+    """
+    A sparse vector of feature values:
+    `values[i]` is the value of the feature with index `indexes[i]` (see `FeatureIndex`).
+    Weights (for `FeatureVector.dot` and `FeatureVector.addTo`) are lists indexed by feature index.
+    """
+
+    def __init__(self, indexes, values):
+        self.indexes = indexes
+        self.values = values
+
+    def addTo(self, weights, scale):
+        """
+        `weights += scale * vector` (in place).
+        """
+
+        for (index, value) in zip(self.indexes, self.values):
+            weights[index] += scale * value
+
+    def dot(self, weights):
+        """
+        The dot product with a weight list.
+        """
+
+        return sum(map(operator.mul, map(weights.__getitem__, self.indexes), self.values))
+
+    def getMaxIndex(self):
+        """
+        Get the largest feature index in the vector (-1 for an empty vector).
+        """
+
+        return max(self.indexes, default = -1)
+
+    def toDict(self, featureIndex):
+        """
+        Convert back into a dict of {feature name: value}.
+        """
+
+        return {featureIndex.getName(index): value
+                for (index, value) in zip(self.indexes, self.values)}
 
 class FeatureExtractor(abc.ABC):
     """
     A class that takes a `pacai.core.gamestate.AbstractGameState` and `pacai.core.actions.Actions`,
     and returns a dict of features.
+
+    Every extractor has its own `FeatureIndex`,
+    which starts out with the features in `FEATURES` (in order).
+    Other features are added as they are seen.
     """
 
+    # The names of the features this extractor always knows about.
+    FEATURES = ()
+
+    def __init__(self):
+        self.featureIndex = FeatureIndex(self.FEATURES)
+
     @abc.abstractmethod
     def getFeatures(self, state, action):
         """
@@ -24,6 +140,24 @@ class FeatureExtractor(abc.ABC):
 
         pass
 
+    def getFeatureIndex(self):
+        return self.featureIndex
+
+    def getFeatureVector(self, state, action):
+        """
+        Get the features of a (state, action) as a `FeatureVector`.
+        """
+
+        return self.featureIndex.toVector(self.getFeatures(state, action))
+
+    def getFeatureVectors(self, state, actions):
+        """
+        Get a list of the `FeatureVector` of each action in a state.
+        Extractors can override this to share the work that does not depend on the action.
+        """
+
+        return [self.getFeatureVector(state, action) for action in actions]
+
 class IdentityExtractor(FeatureExtractor):
     def getFeatures(self, state, action):
         feats = {}
@@ -34,37 +168,79 @@ class IdentityExtractor(FeatureExtractor):
 class SimpleExtractor(FeatureExtractor):
     """
     Returns simple features for a basic reflex Pacman.
+
+    Everything that does not depend on the action is looked up once per state:
+    the distance to the closest food comes from a `pacai.core.search.foodField.NearestFoodField`
+    (shared by every state of the layout, and keyed by the remaining food),
+    and the cells next to ghosts are counted from the layout's precomputed neighbors.
+    So each (state, action) only takes a few lookups.
     """
 
+    FEATURES = ('bias', '#-of-ghosts-1-step-away', 'eats-food', 'closest-food')
+
+    def __init__(self):
+        super().__init__()
+
+        # The state the lookups below are for (see _getStateInfo()).
+        self._lastState = None
+        self._lastInfo = None
+
     def getFeatures(self, state, action):
-        # Extract the grid of food and wall locations and get the ghost locations.
-        food = state.getFood()
-        walls = state.getWalls()
-        ghosts = state.getGhostPositions()
+        return self.getFeatureVector(state, action).toDict(self.featureIndex)
 
-        features = {}
-        features["bias"] = 1.0
+    def getFeatureVector(self, state, action):
+        foodBits, nearestFood, ghostNeighbors, height, area = self._getStateInfo(state)
 
         # Compute the location of pacman after he takes the action.
         x, y = state.getPacmanPosition()
         dx, dy = Actions.directionToVector(action)
         next_x, next_y = int(x + dx), int(y + dy)
+        cellId = next_x * height + next_y
 
         # Count the number of ghosts 1-step away.
-        features["#-of-ghosts-1-step-away"] = sum((next_x, next_y) in
-                Actions.getLegalNeighbors(g, walls) for g in ghosts)
+        numGhosts = ghostNeighbors.get((next_x, next_y), 0)
+
+        # All the features are divided by 10,
+        # and the indexes are the positions of the features in FEATURES.
+        indexes = [0, 1]
+        values = [1.0 / 10.0, numGhosts / 10.0]
 
         # If there is no danger of ghosts then add the food feature.
-        if not features["#-of-ghosts-1-step-away"] and food[next_x][next_y]:
-            features["eats-food"] = 1.0
+        if not numGhosts and (foodBits >> cellId) & 1:
+            indexes.append(2)
+            values.append(1.0 / 10.0)
 
-        prob = AnyFoodSearchProblem(state, start = (next_x, next_y))
-        dist = len(search.bfs(prob))
-        if dist is not None:
+        dist = nearestFood[cellId]
+        if dist != UNREACHABLE:
             # Make the distance a number less than one otherwise the update will diverge wildly.
-            features["closest-food"] = float(dist) / (walls.getWidth() * walls.getHeight())
+            indexes.append(3)
+            values.append((float(dist) / area) / 10.0)
+
+        return FeatureVector(tuple(indexes), tuple(values))
+
+    def _getStateInfo(self, state):
+        """
+        Get the lookups for a state that do not depend on the action:
+        (food bits, nearest food field, {cell: number of ghosts next to it}, height, area).
+        """
+
+        if (state is self._lastState):
+            return self._lastInfo
+
+        actionTable = state.getActionTable()
+        walls = state.getWalls()
+        foodBits = state.getFoodBits()
+
+        nearestFood = getNearestFoodField(actionTable).getField(foodBits,
+                state.getLastFoodEaten())
+
+        ghostNeighbors = {}
+        for ghost in state.getGhostPositions():
+            for neighbor in set(actionTable.getLegalNeighbors(ghost)):
+                ghostNeighbors[neighbor] = ghostNeighbors.get(neighbor, 0) + 1
 
-        for key in features:
-            features[key] /= 10.0
+        self._lastState = state
+        self._lastInfo = (foodBits, nearestFood, ghostNeighbors, walls.getHeight(),
+                walls.getWidth() * walls.getHeight())
 
-        return features
+        return self._lastInfo
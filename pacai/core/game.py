@@ -5,12 +5,15 @@ The core of a pacman-style game.
 import logging
 import time
 
+from pacai.core.observers import StateCountCollector
+
 class Game:
     """
     The Game manages the control flow, soliciting actions from agents.
     """
 
-    def __init__(self, agents, display, rules, startingIndex = 0, catchExceptions = False):
+    def __init__(self, agents, display, rules, startingIndex = 0, catchExceptions = False,
+            recordMoves = True):
         self.agentCrashed = False
         self.agents = agents
         self.display = display
@@ -25,28 +28,108 @@ class Game:
         self.enforceTimeouts = catchExceptions
         self.catchExceptions = catchExceptions
 
+        # When false, moves will not be saved to moveHistory (e.g. the game is not being recorded).
+        self.recordMoves = recordMoves
+
+        # See addObserver().
+        self._observers = []
+
+        # See countStateOperations().
+        self._stateCounts = None
+
+    def addObserver(self, observer):
+        """
+        Add a `pacai.core.observers.GameObserver` that will be notified of events during play.
+        """
+
+        self._observers.append(observer)
+
+    def countStateOperations(self):
+        """
+        Count the game state operations that each agent performs while choosing its actions
+        (see `pacai.core.observers.StateCountCollector`).
+        The counts are logged at the end of the game.
+        Counting is off by default, since it is done with an observer (see `Game.run`).
+        Returns the collector.
+        """
+
+        if (self._stateCounts is None):
+            self._stateCounts = StateCountCollector()
+            self.addObserver(self._stateCounts)
+
+        return self._stateCounts
+
+    def getObservers(self):
+        return self._observers
+
+    def getStateCounts(self):
+        """
+        Get the `pacai.core.observers.StateCountCollector` for this game,
+        or None if the game is not counting state operations (see `Game.countStateOperations`).
+        """
+
+        return self._stateCounts
+
     def run(self):
         """
         Main control loop for game play.
+
+        If the display is headless (see `pacai.ui.view.AbstractView.isHeadless`),
+        then the display is skipped entirely.
+        If there are also no observers, then the game is played by `Game._runHeadless`.
         """
 
         self.numMoves = 0
 
-        agentIndex = self.startingIndex
-        numAgents = len(self.agents)
+        headless = self.display.isHeadless()
 
-        self.display.initialize(self.state)
+        if (not headless):
+            self.display.initialize(self.state)
 
         if (not self._registerInitialState()):
             return False
 
+        if (headless and len(self._observers) == 0):
+            if (not self._runHeadless()):
+                return False
+        else:
+            try:
+                completed = self._runFull(headless)
+            finally:
+                if (self._stateCounts is not None):
+                    self._stateCounts.stop()
+                    self._stateCounts.logReport()
+
+            if (not completed):
+                return False
+
+        if (not self._registerFinalState()):
+            return False
+
+        if (not headless):
+            self.display.finish()
+
+    def _runFull(self, headless):
+        """
+        The game loop with display updates (unless the display is headless) and observer events.
+        Return: False if the game was stopped early (an agent crashed or timed out).
+        """
+
+        agentIndex = self.startingIndex
+        numAgents = len(self.agents)
+        observed = (len(self._observers) > 0)
+
         # Draw the initial frame.
-        self.display.update(self.state)
+        if (not headless):
+            self.display.update(self.state)
 
         while (not self.gameOver):
             # Fetch the next agent
             agent = self.agents[agentIndex]
 
+            if (observed):
+                self._notify('onMoveStart', agentIndex)
+
             action = None
             startTime = time.time()
 
@@ -64,13 +147,25 @@ class Game:
             timeTaken = time.time() - startTime
             self.totalAgentTimes[agentIndex] += timeTaken
 
+            if (observed):
+                self._notify('onMoveEnd', agentIndex, action, timeTaken)
+
             if (self._checkForTimeouts(agentIndex, timeTaken)):
                 return False
 
             # Execute the action.
-            self.moveHistory.append((agentIndex, action))
+            if (self.recordMoves):
+                self.moveHistory.append((agentIndex, action))
+
             try:
+                if (observed):
+                    startTime = time.perf_counter()
+
                 self.state = self.state.generateSuccessor(agentIndex, action)
+
+                if (observed):
+                    self._notify('onGenerateSuccessor', agentIndex,
+                            time.perf_counter() - startTime)
             except Exception as ex:
                 if (not self.catchExceptions):
                     raise ex
@@ -79,11 +174,24 @@ class Game:
                 return False
 
             # Update the display.
-            self.display.update(self.state)
+            if (not headless):
+                if (observed):
+                    startTime = time.perf_counter()
+
+                self.display.update(self.state)
+
+                if (observed):
+                    self._notify('onDisplayUpdate', time.perf_counter() - startTime)
 
             # Allow for game specific conditions (winning, losing, etc.).
+            if (observed):
+                startTime = time.perf_counter()
+
             self.rules.process(self.state, self)
 
+            if (observed):
+                self._notify('onRulesProcess', time.perf_counter() - startTime)
+
             # Track progress.
             if (agentIndex == numAgents + 1):
                 self.numMoves += 1
@@ -91,10 +199,72 @@ class Game:
             # Next agent.
             agentIndex = (agentIndex + 1) % numAgents
 
-        if (not self._registerFinalState()):
-            return False
+        return True
+
+    def _runHeadless(self):
+        """
+        The same game loop as `Game._runFull`, but without a display or observers.
+        Everything that does not change during a game is pulled out of the loop,
+        and moves are only timed when timeouts are enforced
+        (so `Game.totalAgentTimes` is only tracked in that case).
+        Return: False if the game was stopped early (an agent crashed or timed out).
+        """
+
+        agents = self.agents
+        rules = self.rules
+        numAgents = len(agents)
+        moveHistory = self.moveHistory
+
+        catchExceptions = self.catchExceptions
+        enforceTimeouts = self.enforceTimeouts
+        recordMoves = self.recordMoves
+
+        agentIndex = self.startingIndex
+        state = self.state
+
+        while (not self.gameOver):
+            agent = agents[agentIndex]
+
+            if (enforceTimeouts):
+                startTime = time.time()
+
+            try:
+                agent.observationFunction(state)
+                action = agent.getAction(state)
+            except Exception as ex:
+                if (not catchExceptions):
+                    raise ex
+
+                self._agentCrash(agentIndex, ex)
+                return False
+
+            if (enforceTimeouts):
+                timeTaken = time.time() - startTime
+                self.totalAgentTimes[agentIndex] += timeTaken
+
+                if (self._checkForTimeouts(agentIndex, timeTaken)):
+                    return False
+
+            if (recordMoves):
+                moveHistory.append((agentIndex, action))
+
+            try:
+                state = state.generateSuccessor(agentIndex, action)
+            except Exception as ex:
+                if (not catchExceptions):
+                    raise ex
+
+                self._agentCrash(agentIndex, ex)
+                return False
+
+            self.state = state
+            rules.process(state, self)
 
-        self.display.finish()
+            agentIndex += 1
+            if (agentIndex == numAgents):
+                agentIndex = 0
+
+        return True
 
     def _agentCrash(self, agentIndex, exception = None):
         """
@@ -151,6 +321,10 @@ class Game:
 
         return False
 
+    def _notify(self, event, *args):
+        for observer in self._observers:
+            getattr(observer, event)(self, *args)
+
     def _registerInitialState(self):
         """
         Inform agents of the game start.
@@ -1,9 +1,44 @@
 import abc
 import copy
+import struct
 
 from pacai.core.agentstate import AgentState
+from pacai.core.agentstate import PACKED_FORMAT as PACKED_AGENT_FORMAT
 from pacai.core.directions import Directions
-from pacai.util import util
+
+# The fixed-size header of a packed state: score and game over flags.
+PACKED_HEADER_FORMAT = struct.Struct('<qB')
+PACKED_GAMEOVER_FLAG = 1
+PACKED_WIN_FLAG = 2
+
+class StateCounters(object):
+    """
+    Counts of the (potentially) expensive operations performed on game states:
+    successor generation, legal action queries, and hashing.
+    See `AbstractGameState.setCounters`.
+    """
+
+    __slots__ = ('generateSuccessor', 'getLegalActions', 'hash')
+
+    def __init__(self):
+        self.reset()
+
+    def add(self, other):
+        self.generateSuccessor += other.generateSuccessor
+        self.getLegalActions += other.getLegalActions
+        self.hash += other.hash
+
+    def asDict(self):
+        return {
+            'generateSuccessor': self.generateSuccessor,
+            'getLegalActions': self.getLegalActions,
+            'hash': self.hash,
+        }
+
+    def reset(self):
+        self.generateSuccessor = 0
+        self.getLegalActions = 0
+        self.hash = 0
 
 class AbstractGameState(abc.ABC):
     """
@@ -15,6 +50,9 @@ class AbstractGameState(abc.ABC):
     Only use the accessor methods to get data about the game state.
     """
 
+    # The StateCounters that operations on all states are counted in (None when not counting).
+    _counters = None
+
     def __init__(self, layout):
         self._lastAgentMoved = None
         self._gameover = False
@@ -22,9 +60,12 @@ class AbstractGameState(abc.ABC):
 
         self._layout = layout
 
-        # Keep a copy of the hash, since it is expensive to compute.
-        # Any children should be sure to clear the hash when modifications are made.
-        self._hash = None
+        # The Zobrist hash of everything except the agents (see `pacai.core.zobrist`).
+        # Methods that modify the score, food, capsules, or game over status
+        # keep this up-to-date incrementally.
+        # Agent states cache their own hashes, and are mixed in by __hash__().
+        self._zobristTable = layout.getZobristTable()
+        self._zobristHash = self._zobristTable.getInitialHash()
 
         # For food and capsules, we will only copy on write (if we eat one of them).
         # This avoid additional copies on successors that don't eat.
@@ -45,6 +86,10 @@ class AbstractGameState(abc.ABC):
         for (isPacman, position) in layout.agentPositions:
             self._agentStates.append(AgentState(position, Directions.STOP, isPacman))
 
+        # Agent states are shared with successors and copied on write (see getMutableAgentState()).
+        # This is a bitmask of the agent indexes whose states are owned by (private to) this state.
+        self._agentStatesCopied = (1 << len(self._agentStates)) - 1
+
         self._score = 0
 
     @abc.abstractmethod
@@ -60,13 +105,37 @@ class AbstractGameState(abc.ABC):
     def getLegalActions(self, agentIndex = 0):
         """
         Gets the legal actions for the agent specified.
+        Children should count the call in `AbstractGameState.getCounters` (when it is not None).
+        """
+
+        pass
+
+    @staticmethod
+    def getCounters():
+        return AbstractGameState._counters
+
+    @staticmethod
+    def setCounters(counters):
+        """
+        Start counting the operations on all game states into a `StateCounters`,
+        or stop counting if `counters` is None (the default).
+        When counting is off, each operation only pays for a single attribute check.
+        """
+
+        AbstractGameState._counters = counters
+
+    @classmethod
+    @abc.abstractmethod
+    def unpack(cls, layout, record):
+        """
+        Rebuild a state from a record produced by `AbstractGameState.pack`.
+        The layout must be the same one the packed state was played on.
         """
 
         pass
 
     def addScore(self, score):
-        self._hash = None
-        self._score += score
+        self.setScore(self._score + score)
 
     def eatCapsule(self, x, y):
         """
@@ -83,7 +152,7 @@ class AbstractGameState(abc.ABC):
         self._capsules.remove((x, y))
         self._lastCapsuleEaten = (x, y)
 
-        self._hash = None
+        self._zobristHash ^= self._zobristTable.capsuleKey(x, y)
         return True
 
     def eatFood(self, x, y):
@@ -101,14 +170,17 @@ class AbstractGameState(abc.ABC):
         self._food[x][y] = False
         self._lastFoodEaten = (x, y)
 
-        self._hash = None
+        self._zobristHash ^= self._zobristTable.foodKey(x, y)
         return True
 
     def endGame(self, win):
+        if (self._gameover):
+            self._zobristHash ^= self._zobristTable.endGameKey(self._win)
+
         self._gameover = True
         self._win = win
 
-        self._hash = None
+        self._zobristHash ^= self._zobristTable.endGameKey(self._win)
 
     def getAgentPosition(self, index):
         """
@@ -125,11 +197,31 @@ class AbstractGameState(abc.ABC):
         return tuple(int(pos) for pos in position)
 
     def getAgentState(self, index):
+        """
+        Get the `pacai.core.agentstate.AgentState` for the given agent.
+        The returned state may be shared with other game states, so it should not be modified.
+        """
+
         return self._agentStates[index]
 
     def getAgentStates(self):
         return self._agentStates
 
+    def getMutableAgentState(self, index):
+        """
+        Get an agent state that is owned by this game state and can be safely modified.
+        Agent states are shared between a state and its successors,
+        so this will make a copy the first time an agent's state is requested for modification.
+
+        Only game rules (which build successor states) should need to call this.
+        """
+
+        if (not (self._agentStatesCopied >> index) & 1):
+            self._agentStates[index] = self._agentStates[index].copy()
+            self._agentStatesCopied |= (1 << index)
+
+        return self._agentStates[index]
+
     def getCapsules(self):
         """
         Returns a list of positions (x, y) of the remaining capsules.
@@ -149,9 +241,25 @@ class AbstractGameState(abc.ABC):
 
         return self._food.copy()
 
+    def getFoodBits(self):
+        """
+        Get a bitmask of the remaining food (cell (x, y) is bit (x * height + y)).
+        Unlike getFood(), this does not copy anything.
+        """
+
+        return self._food.getBits()
+
     def getHighlightLocations(self):
         return self._highlightLocations
 
+    def getActionTable(self):
+        """
+        Get the precomputed legal actions and neighbors for the walls of this state
+        (see `pacai.core.actions.ActionTable`).
+        """
+
+        return self._layout.getActionTable()
+
     def getInitialAgentPosition(self, agentIndex):
         return self._layout.agentPositions[agentIndex][1]
 
@@ -235,32 +343,119 @@ class AbstractGameState(abc.ABC):
     def isWin(self):
         return self.isOver() and self._win
 
+    def pack(self):
+        """
+        Encode this state into a compact bytes record.
+
+        The record holds the score, game over status, each agent's position/direction/timer,
+        a bitmask of the remaining capsules (indexed by `pacai.core.layout.Layout.capsules`),
+        and a bitmask of the remaining food (cell (x, y) is bit (x * height + y)).
+        Everything else is taken from the layout, so all records for a layout have the same size.
+
+        Records can be hashed and compared directly (without unpacking),
+        which makes them a cheap key for tables of states.
+        Use the `unpack` class method of the state's class to get a full state back.
+        """
+
+        flags = 0
+        if (self._gameover):
+            flags |= PACKED_GAMEOVER_FLAG
+
+        if (self._win):
+            flags |= PACKED_WIN_FLAG
+
+        parts = [PACKED_HEADER_FORMAT.pack(self._score, flags)]
+
+        for agentState in self._agentStates:
+            parts.append(agentState.pack())
+
+        capsuleBits = 0
+        for index in range(len(self._layout.capsules)):
+            if (self._layout.capsules[index] in self._capsules):
+                capsuleBits |= (1 << index)
+
+        parts.append(capsuleBits.to_bytes(_numBytes(len(self._layout.capsules)), 'little'))
+
+        numCells = self._layout.width * self._layout.height
+        parts.append(self._food.getBits().to_bytes(_numBytes(numCells), 'little'))
+
+        return b''.join(parts)
+
     def setHighlightLocations(self, locations):
         self._highlightLocations = list(locations)
 
     def setScore(self, score):
+        self._zobristHash ^= self._zobristTable.scoreKey(self._score)
         self._score = score
-        self._hash = None
+        self._zobristHash ^= self._zobristTable.scoreKey(self._score)
 
     def _initSuccessor(self):
         """
         Get a state that will eventually serve as a successor.
         Initialize the successor to look like this state.
+        Every successor is made here, so this is also where they are counted.
         """
 
+        counters = self._counters
+        if (counters is not None):
+            counters.generateSuccessor += 1
+
         # Start with a shallow copy.
+        # Note that the Zobrist hash is carried over and will be updated incrementally.
         successor = copy.copy(self)
-        successor._hash = None
 
         # Leave food and capsules as a shallow copy, but mark them to be copied on write.
         successor._foodCopied = False
         successor._capsulesCopied = False
 
-        # Agent states need to be deep copied.
-        successor._agentStates = [agentState.copy() for agentState in self._agentStates]
+        # Agent states are shared until they are modified (see getMutableAgentState()),
+        # only the list needs to be copied.
+        successor._agentStates = list(self._agentStates)
+        successor._agentStatesCopied = 0
 
         return successor
 
+    def _unpackFields(self, record, offset = 0):
+        """
+        Load the fields written by `AbstractGameState.pack` into this state,
+        which should be a fresh state on the same layout.
+        The record is read starting at the given offset.
+        """
+
+        score, flags = PACKED_HEADER_FORMAT.unpack_from(record, offset)
+        offset += PACKED_HEADER_FORMAT.size
+
+        for agentIndex in range(len(self._agentStates)):
+            self.getMutableAgentState(agentIndex).loadPacked(record, offset)
+            offset += PACKED_AGENT_FORMAT.size
+
+        capsuleBytes = _numBytes(len(self._layout.capsules))
+        capsuleBits = int.from_bytes(record[offset:(offset + capsuleBytes)], 'little')
+        offset += capsuleBytes
+
+        for index in range(len(self._layout.capsules)):
+            if (not (capsuleBits >> index) & 1):
+                self.eatCapsule(*self._layout.capsules[index])
+
+        # Eat any food that the record does not have.
+        height = self._layout.height
+        foodBytes = _numBytes(self._layout.width * height)
+        foodBits = int.from_bytes(record[offset:(offset + foodBytes)], 'little')
+
+        eatenBits = self._layout.food.getBits() & ~foodBits
+        while (eatenBits):
+            lowBit = eatenBits & -eatenBits
+            index = lowBit.bit_length() - 1
+            self.eatFood(index // height, index % height)
+            eatenBits ^= lowBit
+
+        self._lastFoodEaten = None
+        self._lastCapsuleEaten = None
+
+        self.setScore(score)
+        if (flags & PACKED_GAMEOVER_FLAG):
+            self.endGame(bool(flags & PACKED_WIN_FLAG))
+
     def __eq__(self, other):
         if (other is None):
             return False
@@ -288,8 +483,16 @@ class AbstractGameState(abc.ABC):
                 and self._layout == other._layout)
 
     def __hash__(self):
-        if (self._hash is None):
-            self._hash = util.buildHash(self._score, self._gameover, self._win, *self._capsules,
-                self._food, *self._agentStates, self._layout)
+        counters = self._counters
+        if (counters is not None):
+            counters.hash += 1
+
+        hashCode = self._zobristHash
+
+        for agentIndex in range(len(self._agentStates)):
+            hashCode ^= self._zobristTable.agentKey(agentIndex, self._agentStates[agentIndex])
+
+        return hashCode
 
-        return self._hash
+def _numBytes(numBits):
+    return (numBits + 7) // 8
@@ -1,3 +1,5 @@
+import sys
+
 class Grid:
     """
     A 2-dimensional array of objects backed by a list of lists.
@@ -34,6 +36,23 @@ class Grid:
     def deepCopy(self):
         return self.copy()
 
+    def getBits(self):
+        """
+        Get the grid as an integer bitmask.
+        Cell (x, y) is stored in bit (x * height + y).
+        """
+
+        bits = 0
+        base = 1
+
+        for row in self._data:
+            for value in row:
+                if (value):
+                    bits += base
+                base *= 2
+
+        return bits
+
     def getHeight(self):
         return self._height
 
@@ -55,22 +74,18 @@ class Grid:
         if (other is None):
             return False
 
-        return self._data == other._data
+        if (isinstance(other, Grid)):
+            return self._data == other._data
+
+        return (self._width == other.getWidth()
+                and self._height == other.getHeight()
+                and self.getBits() == other.getBits())
 
     def __getitem__(self, i):
         return self._data[i]
 
     def __hash__(self):
-        hashcode = 0
-        base = 1
-
-        for row in self._data:
-            for value in row:
-                if (value):
-                    hashcode += base
-                base *= 2
-
-        return hash(hashcode)
+        return hash(self.getBits())
 
     def __lt__(self, other):
         return self.__hash__() < other.__hash__()
@@ -82,3 +97,215 @@ class Grid:
         out = [[str(self._data[x][y])[0] for x in range(self._width)] for y in range(self._height)]
         out.reverse()
         return '\n'.join([''.join(x) for x in out])
+
+# Python hashes non-negative ints modulo this value.
+# Keeping our running hash in the same space means a BitGrid hashes exactly like
+# the integer bitmask it holds (and therefore exactly like an equivalent Grid).
+_HASH_MODULUS = sys.hash_info.modulus
+
+class BitGrid:
+    """
+    A 2-dimensional array of booleans backed by a single integer bitmask.
+    This class has the same interface as `Grid`, so data is still accessed via grid[x][y].
+
+    The cell (x, y) is stored in bit (x * height + y),
+    which is the same ordering `Grid` uses when building its hash.
+    The number of set cells and the hash are maintained as cells are set,
+    so `BitGrid.count` and `BitGrid.__hash__` are constant time.
+    Because Python integers are immutable, `BitGrid.copy` is also constant time.
+    """
+
+    __slots__ = ('_width', '_height', '_bits', '_count', '_hash', '_columns')
+
+    def __init__(self, width, height, initialValue = False):
+        if (not isinstance(initialValue, bool)):
+            raise ValueError('Grids can only contain booleans')
+
+        self._width = width
+        self._height = height
+
+        self._bits = 0
+        self._count = 0
+
+        if (initialValue):
+            self._bits = (1 << (width * height)) - 1
+            self._count = width * height
+
+        self._hash = self._bits % _HASH_MODULUS
+
+        # Column views are built lazily (see __getitem__).
+        self._columns = None
+
+    def asList(self, key = True):
+        if (key):
+            bits = self._bits
+        else:
+            bits = self._bits ^ ((1 << (self._width * self._height)) - 1)
+
+        values = []
+        height = self._height
+
+        while (bits):
+            lowBit = bits & -bits
+            index = lowBit.bit_length() - 1
+            values.append((index // height, index % height))
+            bits ^= lowBit
+
+        return values
+
+    def copy(self):
+        grid = BitGrid.__new__(BitGrid)
+
+        grid._width = self._width
+        grid._height = self._height
+        grid._bits = self._bits
+        grid._count = self._count
+        grid._hash = self._hash
+        grid._columns = None
+
+        return grid
+
+    def count(self, item = True):
+        if (item == 1):
+            return self._count
+
+        if (item == 0):
+            return self._width * self._height - self._count
+
+        return 0
+
+    def deepCopy(self):
+        return self.copy()
+
+    def getBits(self):
+        """
+        Get the raw bitmask backing this grid.
+        Cell (x, y) is stored in bit (x * height + y).
+        """
+
+        return self._bits
+
+    def getHeight(self):
+        return self._height
+
+    def getWidth(self):
+        return self._width
+
+    def shallowCopy(self):
+        """
+        Since the backing bitmask is immutable, a shallow copy is the same as a full copy.
+        """
+
+        return self.copy()
+
+    def _cellIndexToPosition(self, index):
+        x = index // self._height
+        y = index % self._height
+
+        return x, y
+
+    def _get(self, x, y):
+        return (self._bits >> (x * self._height + y)) & 1 == 1
+
+    def _set(self, x, y, value):
+        index = x * self._height + y
+        mask = 1 << index
+        isSet = (self._bits & mask) != 0
+
+        if (bool(value) == isSet):
+            return
+
+        if (value):
+            self._bits |= mask
+            self._count += 1
+            self._hash = (self._hash + pow(2, index, _HASH_MODULUS)) % _HASH_MODULUS
+        else:
+            self._bits ^= mask
+            self._count -= 1
+            self._hash = (self._hash - pow(2, index, _HASH_MODULUS)) % _HASH_MODULUS
+
+    def __eq__(self, other):
+        if (other is None):
+            return False
+
+        if (isinstance(other, BitGrid)):
+            return (self._bits == other._bits
+                    and self._width == other._width
+                    and self._height == other._height)
+
+        return (self._width == other.getWidth()
+                and self._height == other.getHeight()
+                and self._bits == other.getBits())
+
+    def __getitem__(self, x):
+        if (self._columns is None):
+            self._columns = [None] * self._width
+
+        column = self._columns[x]
+        if (column is None):
+            if (x < 0):
+                x += self._width
+
+            column = _BitGridColumn(self, x)
+            self._columns[x] = column
+
+        return column
+
+    def __getstate__(self):
+        return (self._width, self._height, self._bits, self._count, self._hash)
+
+    def __hash__(self):
+        return self._hash
+
+    def __lt__(self, other):
+        return self.__hash__() < other.__hash__()
+
+    def __setitem__(self, x, column):
+        for y in range(self._height):
+            self._set(x, y, column[y])
+
+    def __setstate__(self, state):
+        self._width, self._height, self._bits, self._count, self._hash = state
+        self._columns = None
+
+    def __str__(self):
+        out = [[str(self._get(x, y))[0] for x in range(self._width)] for y in range(self._height)]
+        out.reverse()
+        return '\n'.join([''.join(x) for x in out])
+
+class _BitGridColumn:
+    """
+    A view of a single column (fixed x) of a `BitGrid`.
+    This is what allows a BitGrid to be accessed like a list of lists.
+    """
+
+    __slots__ = ('_grid', '_x')
+
+    def __init__(self, grid, x):
+        self._grid = grid
+        self._x = x
+
+    def __getitem__(self, y):
+        grid = self._grid
+
+        if (y < 0):
+            y += grid._height
+
+        if (y < 0 or y >= grid._height):
+            raise IndexError('Grid index out of range')
+
+        return (grid._bits >> (self._x * grid._height + y)) & 1 == 1
+
+    def __len__(self):
+        return self._grid._height
+
+    def __setitem__(self, y, value):
+        grid = self._grid
+
+        if (y < 0):
+            y += grid._height
+
+        if (y < 0 or y >= grid._height):
+            raise IndexError('Grid index out of range')
+
+        grid._set(self._x, y, value)
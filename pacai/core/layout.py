@@ -1,34 +1,69 @@
 import os
 import random
 
+from pacai.core.actions import ActionTable
 from pacai.core.distance import manhattan
+from pacai.core.grid import BitGrid
 from pacai.core.grid import Grid
+from pacai.core.zobrist import ZobristTable
 
 # By default, the layout directory is adjacent to this file.
 DEFAULT_LAYOUT_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'layouts')
 
 GHOST_NUMS = ['1', '2', '3', '4']
 
+# The grid implementation used for food.
+# `pacai.core.grid.Grid` may also be used (it has the same interface).
+# Walls are always a `pacai.core.grid.Grid`, since they are read far more often than they change.
+DEFAULT_FOOD_GRID_CLASS = BitGrid
+
 class Layout(object):
     """
     A Layout manages the static information about the game board.
     """
 
-    def __init__(self, layoutText, maxGhosts = None):
+    def __init__(self, layoutText, maxGhosts = None, foodGridClass = DEFAULT_FOOD_GRID_CLASS):
         self.width = len(layoutText[0])
         self.height = len(layoutText)
+        self.foodGridClass = foodGridClass
         self.walls = Grid(self.width, self.height, initialValue = False)
-        self.food = Grid(self.width, self.height, initialValue = False)
+        self.food = foodGridClass(self.width, self.height, initialValue = False)
         self.capsules = []
         self.agentPositions = []
         self.numGhosts = 0
         self.layoutText = layoutText
 
+        # Built on demand, see getActionTable() and getZobristTable().
+        self._actionTable = None
+        self._zobristTable = None
+
         self.processLayoutText(layoutText, maxGhosts)
 
+    def getActionTable(self):
+        """
+        Get the `pacai.core.actions.ActionTable` (legal actions and neighbors) of this layout.
+        The table is computed the first time it is requested.
+        """
+
+        if (self._actionTable is None):
+            self._actionTable = ActionTable(self.walls)
+
+        return self._actionTable
+
     def getNumGhosts(self):
         return self.numGhosts
 
+    def getZobristTable(self):
+        """
+        Get the `pacai.core.zobrist.ZobristTable` used to hash game states on this layout.
+        The table is computed the first time it is requested.
+        """
+
+        if (self._zobristTable is None):
+            self._zobristTable = ZobristTable(self)
+
+        return self._zobristTable
+
     def isWall(self, pos):
         x, col = pos
         return self.walls[x][col]
@@ -76,7 +111,7 @@ class Layout(object):
         return "\n".join(self.layoutText)
 
     def deepCopy(self):
-        return Layout(self.layoutText[:])
+        return Layout(self.layoutText[:], foodGridClass = self.foodGridClass)
 
     def processLayoutText(self, layoutText, maxGhosts):
         """
@@ -118,7 +153,8 @@ class Layout(object):
             self.agentPositions.append((int(layoutChar), (x, y)))
             self.numGhosts += 1
 
-def getLayout(name, layout_dir = DEFAULT_LAYOUT_DIR, maxGhosts = None):
+def getLayout(name, layout_dir = DEFAULT_LAYOUT_DIR, maxGhosts = None,
+        foodGridClass = DEFAULT_FOOD_GRID_CLASS):
     if (not name.endswith('.lay')):
         name += '.lay'
 
@@ -133,4 +169,4 @@ def getLayout(name, layout_dir = DEFAULT_LAYOUT_DIR, maxGhosts = None):
             if (line != ''):
                 rows.append(line)
 
-    return Layout(rows, maxGhosts)
+    return Layout(rows, maxGhosts, foodGridClass)
@@ -0,0 +1,267 @@
+"""
+Observers that can be attached to a `pacai.core.game.Game` to watch (and profile) play.
+"""
+
+import json
+import logging
+import math
+
+from pacai.core.gamestate import AbstractGameState
+from pacai.core.gamestate import StateCounters
+
+PERCENTILES = [50, 95, 99]
+
+class GameObserver(object):
+    """
+    The events that a game will notify its observers of (see `pacai.core.game.Game.addObserver`).
+    All the events do nothing by default, so children only need to override the ones they want.
+    All times are in seconds.
+    """
+
+    def onMoveStart(self, game, agentIndex):
+        """
+        An agent is about to be asked for its action.
+        """
+
+        pass
+
+    def onMoveEnd(self, game, agentIndex, action, timeTaken):
+        """
+        An agent chose its action (this includes the agent's observationFunction()).
+        """
+
+        pass
+
+    def onGenerateSuccessor(self, game, agentIndex, timeTaken):
+        """
+        The game applied an agent's action to the game state.
+        """
+
+        pass
+
+    def onRulesProcess(self, game, timeTaken):
+        """
+        The rules checked the new game state (e.g. for the end of the game).
+        """
+
+        pass
+
+    def onDisplayUpdate(self, game, timeTaken):
+        """
+        The display drew the new game state.
+        This is not called for headless displays.
+        """
+
+        pass
+
+class ProfileCollector(GameObserver):
+    """
+    Collect timings from any number of games,
+    and summarize them as latency percentiles (see `ProfileCollector.getReport`).
+    """
+
+    def __init__(self):
+        # Games are counted when their first move ends.
+        self._numGames = 0
+        self._lastGameId = None
+
+        # {agentIndex: [time, ...], ...}
+        self._moveTimes = {}
+        self._successorTimes = {}
+
+        self._processTimes = []
+        self._displayTimes = []
+
+    def getReport(self):
+        """
+        Get a JSON-friendly summary of everything collected so far.
+        """
+
+        agents = {}
+        for agentIndex in sorted(set(self._moveTimes) | set(self._successorTimes)):
+            agents[str(agentIndex)] = {
+                'move': _summarize(self._moveTimes.get(agentIndex, [])),
+                'generateSuccessor': _summarize(self._successorTimes.get(agentIndex, [])),
+            }
+
+        allSuccessorTimes = []
+        for times in self._successorTimes.values():
+            allSuccessorTimes += times
+
+        return {
+            'games': self.getNumGames(),
+            'agents': agents,
+            'generateSuccessor': _summarize(allSuccessorTimes),
+            'rules.process': _summarize(self._processTimes),
+            'display.update': _summarize(self._displayTimes),
+        }
+
+    def getNumGames(self):
+        return self._numGames
+
+    def merge(self, other):
+        """
+        Add all the timings from another collector (e.g. one from a worker process).
+        """
+
+        self._numGames += other.getNumGames()
+
+        for (mine, theirs) in [(self._moveTimes, other._moveTimes),
+                (self._successorTimes, other._successorTimes)]:
+            for (agentIndex, times) in theirs.items():
+                mine.setdefault(agentIndex, []).extend(times)
+
+        self._processTimes += other._processTimes
+        self._displayTimes += other._displayTimes
+
+    def writeReport(self, path):
+        with open(path, 'w') as file:
+            json.dump(self.getReport(), file, indent = 4)
+
+    # Override
+    def onMoveEnd(self, game, agentIndex, action, timeTaken):
+        if (id(game) != self._lastGameId):
+            self._numGames += 1
+            self._lastGameId = id(game)
+
+        self._moveTimes.setdefault(agentIndex, []).append(timeTaken)
+
+    # Override
+    def onGenerateSuccessor(self, game, agentIndex, timeTaken):
+        self._successorTimes.setdefault(agentIndex, []).append(timeTaken)
+
+    # Override
+    def onRulesProcess(self, game, timeTaken):
+        self._processTimes.append(timeTaken)
+
+    # Override
+    def onDisplayUpdate(self, game, timeTaken):
+        self._displayTimes.append(timeTaken)
+
+class StateCountCollector(GameObserver):
+    """
+    Count the game state operations (see `pacai.core.gamestate.StateCounters`)
+    that each agent performs while choosing its actions (in any number of games).
+    Only the agents' own work is counted, not the game applying their actions.
+
+    While a collector is attached to a game, it is the only one counting
+    (counting is global to all game states).
+    """
+
+    def __init__(self):
+        self._counters = StateCounters()
+
+        # {agentIndex: StateCounters, ...}
+        self._totals = {}
+        # {agentIndex: {'agent': name, 'turns': count, 'time': seconds, 'maxSuccessors': count}}
+        self._turns = {}
+
+    def getCounts(self, agentIndex):
+        """
+        Get the total `pacai.core.gamestate.StateCounters` of an agent (or None).
+        """
+
+        return self._totals.get(agentIndex)
+
+    def getReport(self):
+        """
+        Get a JSON-friendly summary of the counts for each agent,
+        including the counts per turn and the successors generated per second (node throughput).
+        """
+
+        report = {}
+
+        for agentIndex in sorted(self._totals):
+            counts = self._totals[agentIndex].asDict()
+            turns = self._turns[agentIndex]
+
+            numTurns = max(1, turns['turns'])
+            perTurn = {name: count / numTurns for (name, count) in counts.items()}
+
+            report[str(agentIndex)] = {
+                'agent': turns['agent'],
+                'turns': turns['turns'],
+                'time': turns['time'],
+                'totals': counts,
+                'perTurn': perTurn,
+                'maxSuccessorsPerTurn': turns['maxSuccessors'],
+                'successorsPerSecond': counts['generateSuccessor'] / max(turns['time'], 1e-9),
+            }
+
+        return report
+
+    def logReport(self):
+        for (agentIndex, summary) in self.getReport().items():
+            logging.info(('Agent %s (%s): %d turns, %.1f successors / %.1f legal actions / '
+                    + '%.1f hashes per turn, %.0f successors per second.') %
+                    (agentIndex, summary['agent'], summary['turns'],
+                    summary['perTurn']['generateSuccessor'], summary['perTurn']['getLegalActions'],
+                    summary['perTurn']['hash'], summary['successorsPerSecond']))
+
+    def merge(self, other):
+        """
+        Add all the counts from another collector (e.g. one from a worker process).
+        """
+
+        for (agentIndex, counts) in other._totals.items():
+            self._totals.setdefault(agentIndex, StateCounters()).add(counts)
+
+        for (agentIndex, theirs) in other._turns.items():
+            mine = self._turns.setdefault(agentIndex,
+                    {'agent': theirs['agent'], 'turns': 0, 'time': 0.0, 'maxSuccessors': 0})
+
+            mine['turns'] += theirs['turns']
+            mine['time'] += theirs['time']
+            mine['maxSuccessors'] = max(mine['maxSuccessors'], theirs['maxSuccessors'])
+
+    def stop(self):
+        """
+        Stop counting (e.g. if the game ended in the middle of a turn).
+        """
+
+        if (AbstractGameState.getCounters() is self._counters):
+            AbstractGameState.setCounters(None)
+
+    # Override
+    def onMoveStart(self, game, agentIndex):
+        self._counters.reset()
+        AbstractGameState.setCounters(self._counters)
+
+    # Override
+    def onMoveEnd(self, game, agentIndex, action, timeTaken):
+        self.stop()
+
+        self._totals.setdefault(agentIndex, StateCounters()).add(self._counters)
+
+        turns = self._turns.get(agentIndex)
+        if (turns is None):
+            turns = {'agent': type(game.agents[agentIndex]).__name__, 'turns': 0, 'time': 0.0,
+                    'maxSuccessors': 0}
+            self._turns[agentIndex] = turns
+
+        turns['turns'] += 1
+        turns['time'] += timeTaken
+        turns['maxSuccessors'] = max(turns['maxSuccessors'], self._counters.generateSuccessor)
+
+def _summarize(times):
+    """
+    Get the count, total, and latency percentiles (nearest-rank) of some timings.
+    """
+
+    summary = {
+        'count': len(times),
+        'total': sum(times),
+    }
+
+    if (len(times) == 0):
+        return summary
+
+    times = sorted(times)
+
+    for percentile in PERCENTILES:
+        rank = max(1, int(math.ceil(percentile / 100.0 * len(times))))
+        summary['p%d' % (percentile)] = times[rank - 1]
+
+    summary['max'] = times[-1]
+
+    return summary
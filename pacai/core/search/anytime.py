@@ -0,0 +1,406 @@
+"""
+Bounded variants of A* for searches that have to finish on time (e.g. inside an agent's turn).
+
+ - `weightedAStarSearch` orders nodes by `cost + weight * heuristic`,
+   which finds a path at most `weight` times longer than optimal (for a consistent heuristic)
+   while expanding far fewer nodes.
+ - `budgetedAStarSearch` is plain A* (a weight of one).
+ - `araStarSearch` (anytime repairing A*) runs weighted A* with a decreasing weight,
+   reusing the previous search each time, so it finds a path quickly and then keeps improving it.
+
+All of them take a `budget` (the most nodes to expand) and a `timeLimit` (in seconds).
+When either runs out, the search stops and returns the best path found so far.
+If no goal has been reached yet, that is the path to the expanded state with the smallest heuristic
+(i.e. the state that looks closest to a goal).
+
+The searches return a `SearchResult`, which holds the actions along with statistics.
+"""
+
+import heapq
+import itertools
+import logging
+import time
+
+# How many nodes to expand between checks of the clock.
+TIME_CHECK_INTERVAL = 128
+
+DEFAULT_WEIGHT = 2.0
+
+# ARA* starts with `DEFAULT_ARA_WEIGHT` and lowers the weight by `DEFAULT_ARA_WEIGHT_STEP`
+# after each path it finds (until it reaches one).
+DEFAULT_ARA_WEIGHT = 3.0
+DEFAULT_ARA_WEIGHT_STEP = 0.5
+
+class SearchResult(object):
+    """
+    The outcome of a bounded search.
+
+    `actions` is the best list of actions found (or None if nothing was expanded).
+    `complete` is True if the actions reach a goal.
+    `exhausted` is True if the search stopped because the budget (or time) ran out.
+    `bound` is how many times longer than optimal the path may be
+    (one for an optimal path, None if no goal was reached).
+    """
+
+    def __init__(self, actions, cost, complete, exhausted, bound, expanded, generated,
+            iterations, elapsed):
+        self.actions = actions
+        self.cost = cost
+        self.complete = complete
+        self.exhausted = exhausted
+        self.bound = bound
+        self.expanded = expanded
+        self.generated = generated
+        self.iterations = iterations
+        self.elapsed = elapsed
+
+    def asDict(self):
+        """
+        Get the statistics (everything but the actions).
+        """
+
+        return {
+            'cost': self.cost,
+            'complete': self.complete,
+            'exhausted': self.exhausted,
+            'bound': self.bound,
+            'expanded': self.expanded,
+            'generated': self.generated,
+            'iterations': self.iterations,
+            'elapsed': self.elapsed,
+        }
+
+    def __str__(self):
+        return ('SearchResult(cost: %s, complete: %s, exhausted: %s, bound: %s, expanded: %d, '
+                + 'generated: %d, iterations: %d, elapsed: %.3fs)') % (self.cost,
+                self.complete, self.exhausted, self.bound, self.expanded, self.generated,
+                self.iterations, self.elapsed)
+
+class BudgetExhausted(Exception):
+    """
+    Raised inside a search when the budget (or time) runs out.
+    """
+
+    pass
+
+class _BoundedSearch(object):
+    """
+    The bookkeeping shared by all the bounded searches:
+    g values and parent pointers (keyed by state), the budget, and the best state seen so far.
+    """
+
+    def __init__(self, problem, heuristic, budget, timeLimit):
+        if (budget is not None and budget <= 0):
+            raise ValueError('Search budgets must be positive, got: %d.' % (budget))
+
+        self.problem = problem
+        self.heuristic = heuristic
+        self.budget = budget
+
+        self.startTime = time.time()
+        self.deadline = None
+        if (timeLimit is not None):
+            self.deadline = self.startTime + timeLimit
+
+        # {state: cost of the best known path to it}
+        self.costs = {}
+        # {state: (parent state, action)}
+        self.parents = {}
+        # {state: heuristic}
+        self.heuristics = {}
+
+        # Break priority ties first by depth (deeper first), then by insertion order.
+        self.counter = itertools.count()
+
+        self.expanded = 0
+        self.generated = 0
+        self.iterations = 0
+
+        # The best complete path (the cheapest goal reached).
+        self.goal = None
+        self.goalCost = None
+
+        # The expanded state that looks closest to a goal, for when no goal is reached.
+        self.closest = None
+
+    def addStart(self):
+        start = self.problem.startingState()
+
+        self.costs[start] = 0
+        self.parents[start] = None
+        self.heuristics[start] = self.heuristic(start, self.problem)
+
+        return start
+
+    def expand(self, state):
+        """
+        Count an expansion (which may run out the budget) and get the state's successors.
+        """
+
+        if (self.budget is not None and self.expanded >= self.budget):
+            raise BudgetExhausted()
+
+        if (self.deadline is not None and self.expanded % TIME_CHECK_INTERVAL == 0
+                and time.time() > self.deadline):
+            raise BudgetExhausted()
+
+        self.expanded += 1
+
+        if (self.closest is None
+                or (self.heuristics[state], self.costs[state])
+                    < (self.heuristics[self.closest], self.costs[self.closest])):
+            self.closest = state
+
+        return self.problem.successorStates(state)
+
+    def getHeuristic(self, state):
+        value = self.heuristics.get(state)
+        if (value is None):
+            value = self.heuristic(state, self.problem)
+            self.heuristics[state] = value
+
+        return value
+
+    def getPath(self, state):
+        actions = []
+
+        link = self.parents[state]
+        while (link is not None):
+            state, action = link
+            actions.append(action)
+            link = self.parents[state]
+
+        actions.reverse()
+        return actions
+
+    def isGoal(self, state):
+        """
+        Check for a goal, and remember it if it is the cheapest one so far.
+        """
+
+        if (not self.problem.isGoal(state)):
+            return False
+
+        if (self.goal is None or self.costs[state] < self.goalCost):
+            self.goal = state
+            self.goalCost = self.costs[state]
+
+        return True
+
+    def makeResult(self, exhausted, bound):
+        elapsed = time.time() - self.startTime
+
+        if (self.goal is not None):
+            return SearchResult(self.getPath(self.goal), self.goalCost, True, exhausted, bound,
+                    self.expanded, self.generated, self.iterations, elapsed)
+
+        if (self.closest is not None):
+            return SearchResult(self.getPath(self.closest), self.costs[self.closest], False,
+                    exhausted, None, self.expanded, self.generated, self.iterations, elapsed)
+
+        return SearchResult(None, None, False, exhausted, None, self.expanded, self.generated,
+                self.iterations, elapsed)
+
+def weightedAStarSearch(problem, heuristic, weight = DEFAULT_WEIGHT, budget = None,
+        timeLimit = None):
+    """
+    Search the node with the lowest `cost + weight * heuristic` first.
+    With a consistent heuristic, the path found costs at most `weight` times the optimal cost.
+    Returns a `SearchResult`.
+    """
+
+    weight = float(weight)
+    if (weight < 1.0):
+        raise ValueError('Search weights must be at least one, got: %f.' % (weight))
+
+    search = _BoundedSearch(problem, heuristic, budget, timeLimit)
+    costs = search.costs
+    parents = search.parents
+    counter = search.counter
+
+    start = search.addStart()
+    fringe = [(weight * search.heuristics[start], 0, next(counter), start)]
+    closed = set()
+
+    search.iterations = 1
+
+    try:
+        while (len(fringe) > 0):
+            priority, negativeCost, count, state = heapq.heappop(fringe)
+            if (state in closed):
+                continue
+
+            if (search.isGoal(state)):
+                return search.makeResult(False, weight)
+
+            closed.add(state)
+            cost = costs[state]
+
+            for (successor, action, stepCost) in search.expand(state):
+                if (successor in closed):
+                    continue
+
+                successorCost = cost + stepCost
+                if (costs.get(successor, successorCost + 1) <= successorCost):
+                    continue
+
+                costs[successor] = successorCost
+                parents[successor] = (state, action)
+                search.generated += 1
+
+                priority = successorCost + weight * search.getHeuristic(successor)
+                heapq.heappush(fringe, (priority, -successorCost, next(counter), successor))
+    except BudgetExhausted:
+        return search.makeResult(True, None)
+
+    return search.makeResult(False, None)
+
+def budgetedAStarSearch(problem, heuristic, budget = None, timeLimit = None):
+    """
+    A* (with a budget).
+    Returns a `SearchResult`.
+    """
+
+    return weightedAStarSearch(problem, heuristic, 1.0, budget = budget, timeLimit = timeLimit)
+
+def araStarSearch(problem, heuristic, weight = DEFAULT_ARA_WEIGHT,
+        weightStep = DEFAULT_ARA_WEIGHT_STEP, budget = None, timeLimit = None):
+    """
+    Anytime repairing A* (Likhachev, Gordon, and Thrun, 2003).
+
+    Run weighted A* starting at `weight`.
+    Each time a path is found, lower the weight by `weightStep` and improve the path,
+    only re-expanding the states whose cost went down (instead of starting over).
+    Stops once the path is optimal (a weight of one), or the budget runs out.
+
+    Returns a `SearchResult` for the best path found,
+    where `bound` is the (proven) suboptimality bound of that path.
+    """
+
+    weight = float(weight)
+    weightStep = float(weightStep)
+
+    if (weight < 1.0):
+        raise ValueError('Search weights must be at least one, got: %f.' % (weight))
+
+    if (weightStep <= 0.0):
+        raise ValueError('ARA* needs a positive weight step, got: %f.' % (weightStep))
+
+    search = _BoundedSearch(problem, heuristic, budget, timeLimit)
+    costs = search.costs
+    counter = search.counter
+
+    start = search.addStart()
+
+    # The fringe (OPEN) can hold stale entries, the current ones are in `openStates`.
+    fringe = []
+    openStates = set([start])
+    heapq.heappush(fringe, (weight * search.heuristics[start], 0, next(counter), start))
+
+    closed = set()
+    # States whose cost went down after they were expanded in this iteration.
+    inconsistent = set()
+
+    # The weight of the last iteration that finished with a path.
+    # That path costs at most this many times the optimal cost.
+    finishedWeight = None
+    bound = None
+
+    try:
+        while (True):
+            search.iterations += 1
+            _improvePath(search, weight, fringe, openStates, closed, inconsistent)
+
+            if (search.goal is not None):
+                finishedWeight = weight
+
+            bound = _getBound(search, openStates | inconsistent, finishedWeight)
+            logging.debug('ARA* iteration %d: weight %.2f, cost %s, bound %s.' %
+                    (search.iterations, weight, search.goalCost, bound))
+
+            if (weight <= 1.0 or search.goal is None):
+                break
+
+            # Lower the weight and put all the states that need another look back into the fringe.
+            weight = max(1.0, weight - weightStep)
+
+            openStates |= inconsistent
+            inconsistent.clear()
+            closed.clear()
+
+            fringe = [(costs[state] + weight * search.heuristics[state], -costs[state],
+                    next(counter), state) for state in openStates]
+            heapq.heapify(fringe)
+    except BudgetExhausted:
+        # The current iteration did not finish, so only the previous one's weight holds.
+        bound = _getBound(search, openStates | inconsistent, finishedWeight)
+        return search.makeResult(True, bound)
+
+    return search.makeResult(False, bound)
+
+def _getBound(search, openStates, weight):
+    """
+    How many times longer than optimal can the best path be?
+    Every open state lower bounds the optimal cost (by its cost plus its heuristic),
+    and a finished weighted search bounds it by its weight (if there is one).
+    """
+
+    if (search.goal is None):
+        return None
+
+    lowerBound = min([search.costs[state] + search.heuristics[state] for state in openStates],
+            default = search.goalCost)
+
+    bound = float('inf')
+    if (lowerBound > 0):
+        bound = max(1.0, search.goalCost / lowerBound)
+
+    if (weight is not None):
+        bound = min(bound, weight)
+
+    return bound
+
+def _improvePath(search, weight, fringe, openStates, closed, inconsistent):
+    """
+    Expand nodes until no open node could lead to a cheaper goal (at this weight).
+    """
+
+    costs = search.costs
+    parents = search.parents
+    counter = search.counter
+
+    while (len(fringe) > 0):
+        priority, negativeCost, count, state = fringe[0]
+
+        # Skip stale entries.
+        if (state not in openStates or -negativeCost != costs[state]):
+            heapq.heappop(fringe)
+            continue
+
+        if (search.goal is not None and search.goalCost <= priority):
+            return
+
+        heapq.heappop(fringe)
+        openStates.discard(state)
+
+        if (search.isGoal(state)):
+            continue
+
+        closed.add(state)
+        cost = costs[state]
+
+        for (successor, action, stepCost) in search.expand(state):
+            successorCost = cost + stepCost
+            if (costs.get(successor, successorCost + 1) <= successorCost):
+                continue
+
+            costs[successor] = successorCost
+            parents[successor] = (state, action)
+            search.generated += 1
+
+            if (successor in closed):
+                inconsistent.add(successor)
+            else:
+                openStates.add(successor)
+                priority = successorCost + weight * search.getHeuristic(successor)
+                heapq.heappush(fringe, (priority, -successorCost, next(counter), successor))
@@ -1,5 +1,6 @@
 from pacai.core.actions import Actions
-from pacai.core.directions import Directions
+from pacai.core.search.foodDistances import FoodDistances
+from pacai.core.search.oracle import getDistanceOracle
 from pacai.core.search.problem import SearchProblem
 
 class FoodSearchProblem(SearchProblem):
@@ -11,6 +12,10 @@ class FoodSearchProblem(SearchProblem):
     Wwhere pacmanPosition is a tuple (x, y) of integers specifying Pacman's position,
     and foodGrid is a `pacai.core.grid.Grid` of either `True` or `False`,
     specifying remaining food.
+
+    Heuristics can get maze distances from `distanceOracle`
+    (a `pacai.core.search.oracle.MazeDistanceOracle`),
+    or distances to (and between) the food from `FoodSearchProblem.getFoodDistances`.
     """
 
     def __init__(self, startingGameState):
@@ -18,9 +23,66 @@ class FoodSearchProblem(SearchProblem):
 
         self.start = (startingGameState.getPacmanPosition(), startingGameState.getFood())
         self.walls = startingGameState.getWalls()
+        self.actionTable = startingGameState.getActionTable()
+        self.distanceOracle = getDistanceOracle(self.actionTable)
         self.startingGameState = startingGameState
         self.heuristicInfo = {}  # A dictionary for the heuristic to store information
 
+        # The food at the start, food masks (see getFoodMask()) index into this.
+        self.foodPositions = self.start[1].asList()
+
+        # Built the first time it is requested.
+        self._foodDistances = None
+
+    def getCellId(self, state):
+        """
+        Get the id of Pacman's cell (see `pacai.core.actions.ActionTable.getCellId`) in a state.
+        """
+
+        return self.actionTable.getCellId(state[0])
+
+    def getFoodDistances(self):
+        """
+        Get the `pacai.core.search.foodDistances.FoodDistances` for the food in this problem.
+        The distances are computed the first time they are requested.
+        """
+
+        if (self._foodDistances is None):
+            self._foodDistances = FoodDistances(self.actionTable, self.foodPositions)
+
+        return self._foodDistances
+
+    def getFoodMask(self, state):
+        """
+        Get the food remaining in a state as a bit mask,
+        where bit i is set if the food at `foodPositions[i]` is left.
+        """
+
+        food = state[1]
+
+        foodMask = 0
+        for (i, (x, y)) in enumerate(self.foodPositions):
+            if (food[x][y]):
+                foodMask |= 1 << i
+
+        return foodMask
+
+    def getFoodPositions(self, state):
+        """
+        Get a list of the positions of the food remaining in a state.
+        Heuristics that use this (and `FoodSearchProblem.getPosition`)
+        also work with `PackedFoodSearchProblem`.
+        """
+
+        return state[1].asList()
+
+    def getPosition(self, state):
+        """
+        Get Pacman's (x, y) position in a state.
+        """
+
+        return state[0]
+
     def startingState(self):
         return self.start
 
@@ -34,14 +96,11 @@ class FoodSearchProblem(SearchProblem):
 
         successors = []
         self._numExpanded += 1
-        for direction in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            x, y = state[0]
-            dx, dy = Actions.directionToVector(direction)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                nextFood = state[1].copy()
-                nextFood[nextx][nexty] = False
-                successors.append((((nextx, nexty), nextFood), direction, 1))
+        for (direction, nextPosition) in self.actionTable.getCardinalMoves(state[0]):
+            nextx, nexty = nextPosition
+            nextFood = state[1].copy()
+            nextFood[nextx][nexty] = False
+            successors.append(((nextPosition, nextFood), direction, 1))
 
         return successors
 
@@ -51,7 +110,7 @@ class FoodSearchProblem(SearchProblem):
         If those actions include an illegal move, return 999999.
         """
 
-        x, y = self.startingState()[0]
+        x, y = self.start[0]
         cost = 0
         for action in actions:
             # figure out the next state and see whether it's legal
@@ -62,3 +121,118 @@ class FoodSearchProblem(SearchProblem):
             cost += 1
 
         return cost
+
+class PackedFoodSearchProblem(FoodSearchProblem):
+    """
+    The same problem as `FoodSearchProblem`, but with compact states.
+
+    A search state in this problem is a tuple (cellId, foodMask).
+    Where cellId is Pacman's cell (see `pacai.core.actions.ActionTable.getCellId`),
+    and foodMask is an int with a bit for each piece of food that is left
+    (bit i is the food at `foodPositions[i]`, the food at the start of the problem).
+    So copying, hashing, and checking the food are all cheap integer operations.
+
+    Heuristics that need the `FoodSearchProblem` view of a state can get it from
+    `PackedFoodSearchProblem.unpackState`
+    (or use `FoodSearchProblem.getPosition` and `FoodSearchProblem.getFoodPositions`).
+    """
+
+    def __init__(self, startingGameState):
+        super().__init__(startingGameState)
+
+        position = self.start[0]
+        self._height = self.walls.getHeight()
+
+        # {cellId: food bit}
+        foodBits = {}
+        for (i, foodPosition) in enumerate(self.foodPositions):
+            foodBits[self.actionTable.getCellId(foodPosition)] = 1 << i
+
+        # [((action, next cellId, food bit of the next cell), ...), ...] (indexed by cellId).
+        # Built the first time each cell is expanded.
+        self._moves = [None] * (self.walls.getWidth() * self._height)
+        self._foodBits = foodBits
+
+        allFood = (1 << len(self.foodPositions)) - 1
+        self._packedStart = (self.actionTable.getCellId(position), allFood)
+
+    # Override
+    def getCellId(self, state):
+        return state[0]
+
+    def getFoodCount(self, state):
+        return bin(state[1]).count('1')
+
+    # Override
+    def getFoodMask(self, state):
+        return state[1]
+
+    # Override
+    def getFoodPositions(self, state):
+        foodMask = state[1]
+        return [self.foodPositions[i] for i in range(len(self.foodPositions))
+                if (foodMask >> i) & 1]
+
+    # Override
+    def getPosition(self, state):
+        return (state[0] // self._height, state[0] % self._height)
+
+    # Override
+    def isGoal(self, state):
+        return state[1] == 0
+
+    def packState(self, state):
+        """
+        Convert a `FoodSearchProblem` (position, foodGrid) state into a packed state.
+        Food that was not there at the start of the problem is ignored.
+        """
+
+        return (self.actionTable.getCellId(state[0]), FoodSearchProblem.getFoodMask(self, state))
+
+    # Override
+    def startingState(self):
+        return self._packedStart
+
+    # Override
+    def successorStates(self, state):
+        """
+        Returns successor states, the actions they require, and a cost of 1.
+        """
+
+        self._numExpanded += 1
+
+        cellId, foodMask = state
+
+        moves = self._moves[cellId]
+        if (moves is None):
+            moves = self._computeMoves(cellId)
+
+        return [((nextCellId, foodMask & ~foodBit), action, 1)
+                for (action, nextCellId, foodBit) in moves]
+
+    def unpackState(self, state):
+        """
+        Convert a packed state into a `FoodSearchProblem` (position, foodGrid) state.
+        """
+
+        foodMask = state[1]
+
+        food = self.start[1].copy()
+        for (i, (x, y)) in enumerate(self.foodPositions):
+            if (not (foodMask >> i) & 1):
+                food[x][y] = False
+
+        return (self.getPosition(state), food)
+
+    def _computeMoves(self, cellId):
+        position = (cellId // self._height, cellId % self._height)
+
+        moves = []
+        for (action, nextPosition) in self.actionTable.getCardinalMoves(position):
+            nextCellId = self.actionTable.getCellId(nextPosition)
+            moves.append((action, nextCellId, self._foodBits.get(nextCellId, 0)))
+
+        moves = tuple(moves)
+        self._moves[cellId] = moves
+
+        return moves
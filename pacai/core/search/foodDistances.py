@@ -0,0 +1,258 @@
+"""
+Precomputed maze distances for food search heuristics.
+
+A `FoodDistances` is built once for a `pacai.core.search.food.FoodSearchProblem`
+(see `pacai.core.search.food.FoodSearchProblem.getFoodDistances`).
+Food is identified by its index in the problem's `foodPositions`,
+and a set of food is an int bit mask over those indexes
+(the same as the states of `pacai.core.search.food.PackedFoodSearchProblem`).
+"""
+
+import sys
+
+# The distance between cells that cannot reach each other.
+UNREACHABLE = sys.maxsize
+
+# The most minimum spanning tree weights to remember (see FoodDistances.getTreeWeight()).
+MAX_TREE_CACHE_SIZE = 200000
+
+# Trees over k of the n food use Kruskal's algorithm when k * k >= KRUSKAL_FACTOR * n,
+# and Prim's algorithm otherwise.
+KRUSKAL_FACTOR = 16
+
+# The indexes of the set bits of every byte.
+_BYTE_INDEXES = [tuple([i for i in range(8) if (byte >> i) & 1]) for byte in range(256)]
+
+class FoodDistances(object):
+    """
+    The maze distance from every cell to every piece of food (and so between every pair of food),
+    and a heuristic built on them.
+
+    All the distances are found with a single multi-source breadth first search:
+    every cell keeps a bit mask of the food whose search has reached it,
+    and each level of the search pushes those masks one step further.
+    So each (cell, food) pair is only visited once.
+    """
+
+    def __init__(self, actionTable, foodPositions):
+        self._numFood = len(foodPositions)
+
+        width = actionTable.getWidth()
+        height = actionTable.getHeight()
+        openCells = actionTable.getOpenCells()
+
+        # [(neighbor cell id, ...), ...] (indexed by cell id).
+        neighbors = [()] * (width * height)
+        for x in range(width):
+            for y in range(height):
+                if (openCells[x * height + y] == 1):
+                    neighbors[x * height + y] = tuple([actionTable.getCellId(position)
+                            for (action, position) in actionTable.getCardinalMoves((x, y))])
+
+        self._foodCellIds = [actionTable.getCellId(position) for position in foodPositions]
+
+        # [[distance to food 0, distance to food 1, ...], ...] (indexed by cell id).
+        self._cellToFood = self._computeCellToFood(neighbors)
+
+        # [[distance from food i to food 0, ...], ...] (indexed by food index).
+        self._foodToFood = [self._cellToFood[cellId] for cellId in self._foodCellIds]
+
+        # Every pair of food as (distance, foodIndex1, foodIndex2), shortest first.
+        self._edges = sorted([(self._foodToFood[i][j], i, j)
+                for i in range(self._numFood) for j in range(i + 1, self._numFood)])
+
+        # {foodMask: minimum spanning tree weight}
+        self._treeWeights = {0: 0}
+
+    def estimate(self, cellId, foodMask):
+        """
+        A consistent lower bound on the cost of eating all the food in `foodMask`
+        starting from `cellId`:
+        the distance to the closest food plus the weight of the minimum spanning tree of the food.
+        """
+
+        if (foodMask == 0):
+            return 0
+
+        return self.getNearestDistance(cellId, foodMask) + self.getTreeWeight(foodMask)
+
+    def getDistance(self, cellId, foodIndex):
+        """
+        Get the maze distance from a cell to a piece of food.
+        """
+
+        return self._cellToFood[cellId][foodIndex]
+
+    def getFoodDistance(self, foodIndex1, foodIndex2):
+        """
+        Get the maze distance between two pieces of food.
+        """
+
+        return self._foodToFood[foodIndex1][foodIndex2]
+
+    def getNearestDistance(self, cellId, foodMask):
+        """
+        Get the maze distance from a cell to the closest food in `foodMask`
+        (`UNREACHABLE` if the mask is empty).
+        """
+
+        distances = self._cellToFood[cellId]
+
+        nearest = UNREACHABLE
+        for foodIndex in _maskIndexes(foodMask):
+            if (distances[foodIndex] < nearest):
+                nearest = distances[foodIndex]
+
+        return nearest
+
+    def getNumFood(self):
+        return self._numFood
+
+    def getTreeWeight(self, foodMask):
+        """
+        Get the weight of the minimum spanning tree (over maze distances) of the food in `foodMask`.
+        Weights are remembered, so each set of food is only computed once
+        (until `MAX_TREE_CACHE_SIZE` other sets have been computed).
+        """
+
+        weight = self._treeWeights.get(foodMask)
+        if (weight is not None):
+            return weight
+
+        foodIndexes = _maskIndexes(foodMask)
+        if (len(foodIndexes) ** 2 >= KRUSKAL_FACTOR * self._numFood):
+            weight = self._computeTreeWeightKruskal(foodIndexes)
+        else:
+            weight = self._computeTreeWeightPrim(foodIndexes)
+
+        if (len(self._treeWeights) >= MAX_TREE_CACHE_SIZE):
+            # Dicts keep insertion order, so the first key is the oldest.
+            del self._treeWeights[next(iter(self._treeWeights))]
+
+        self._treeWeights[foodMask] = weight
+
+        return weight
+
+    def _computeCellToFood(self, neighbors):
+        numCells = len(neighbors)
+        rows = [None] * numCells
+
+        # The food whose search has reached each cell.
+        reached = [0] * numCells
+
+        # {cellId: the food whose search reached the cell on the current level}
+        frontier = {}
+        for (foodIndex, cellId) in enumerate(self._foodCellIds):
+            frontier[cellId] = frontier.get(cellId, 0) | (1 << foodIndex)
+
+        distance = 0
+        while (len(frontier) > 0):
+            for (cellId, foodMask) in frontier.items():
+                reached[cellId] |= foodMask
+
+                row = rows[cellId]
+                if (row is None):
+                    row = [UNREACHABLE] * self._numFood
+                    rows[cellId] = row
+
+                for foodIndex in _maskIndexes(foodMask):
+                    row[foodIndex] = distance
+
+            nextFrontier = {}
+            for (cellId, foodMask) in frontier.items():
+                for neighbor in neighbors[cellId]:
+                    newFood = foodMask & ~reached[neighbor]
+                    if (newFood != 0):
+                        nextFrontier[neighbor] = nextFrontier.get(neighbor, 0) | newFood
+
+            frontier = nextFrontier
+            distance += 1
+
+        # Cells that no food can reach.
+        unreachableRow = [UNREACHABLE] * self._numFood
+        return [unreachableRow if (row is None) else row for row in rows]
+
+    def _computeTreeWeightKruskal(self, foodIndexes):
+        """
+        Kruskal's algorithm over the presorted edges between all the food.
+        When most of the food is left, the tree is done after only the shortest edges.
+        """
+
+        if (len(foodIndexes) <= 1):
+            return 0
+
+        present = bytearray(self._numFood)
+        for foodIndex in foodIndexes:
+            present[foodIndex] = 1
+
+        # A union-find forest (with path halving).
+        parents = list(range(self._numFood))
+
+        weight = 0
+        numJoined = 1
+
+        for (distance, root1, root2) in self._edges:
+            if (present[root1] == 0 or present[root2] == 0):
+                continue
+
+            while (parents[root1] != root1):
+                parents[root1] = parents[parents[root1]]
+                root1 = parents[root1]
+
+            while (parents[root2] != root2):
+                parents[root2] = parents[parents[root2]]
+                root2 = parents[root2]
+
+            if (root1 == root2):
+                continue
+
+            parents[root1] = root2
+            weight += distance
+            numJoined += 1
+
+            if (numJoined == len(foodIndexes)):
+                break
+
+        return weight
+
+    def _computeTreeWeightPrim(self, foodIndexes):
+        """
+        Prim's algorithm over the (dense) food distances.
+        With only a little food left, this beats scanning the edges between all the food.
+        """
+
+        if (len(foodIndexes) <= 1):
+            return 0
+
+        foodToFood = self._foodToFood
+
+        # The distance from each food that is not yet in the tree to the tree.
+        first = foodIndexes[0]
+        remaining = {foodIndex: foodToFood[first][foodIndex] for foodIndex in foodIndexes[1:]}
+
+        weight = 0
+        while (len(remaining) > 0):
+            closest = min(remaining, key = remaining.get)
+            weight += remaining.pop(closest)
+
+            distances = foodToFood[closest]
+            for foodIndex in remaining:
+                if (distances[foodIndex] < remaining[foodIndex]):
+                    remaining[foodIndex] = distances[foodIndex]
+
+        return weight
+
+def _maskIndexes(foodMask):
+    """
+    Get the indexes of the set bits of a mask (in increasing order).
+    """
+
+    indexes = []
+
+    data = foodMask.to_bytes((foodMask.bit_length() + 7) // 8, 'little')
+    for (byteIndex, byte) in enumerate(data):
+        if (byte != 0):
+            offset = byteIndex * 8
+            indexes.extend([offset + i for i in _BYTE_INDEXES[byte]])
+
+    return indexes
@@ -0,0 +1,231 @@
+"""
+The maze distance from every cell to the closest food.
+
+A `NearestFoodField` holds the distance fields of a layout (a `pacai.core.actions.ActionTable`),
+one per set of remaining food (keyed by the food bitmask, see `pacai.core.grid.BitGrid.getBits`).
+A field is computed with a single multi-source breadth first search (from all the food at once).
+When a piece of food is eaten, the new field is usually just a repair of the field from before
+(only the cells that were closest to the eaten food change),
+so following a game costs a lot less than a search per move.
+
+Use `getNearestFoodField` to get the fields shared by everything on the same layout.
+"""
+
+import collections
+import heapq
+import sys
+import weakref
+
+# How many fields (sets of food) to keep.
+DEFAULT_MAX_FIELDS = 256
+
+# The distance from cells that cannot reach any food.
+UNREACHABLE = sys.maxsize
+
+# {ActionTable: NearestFoodField}, see getNearestFoodField().
+_fields = weakref.WeakKeyDictionary()
+
+class NearestFoodField(object):
+    """
+    Distances to the closest food, as lists indexed by cell id
+    (see `pacai.core.actions.ActionTable.getCellId`).
+    The least recently used fields are evicted.
+    """
+
+    def __init__(self, actionTable, maxFields = DEFAULT_MAX_FIELDS):
+        if (maxFields <= 0):
+            raise ValueError('Food fields need to keep a positive number of fields, got: %d.' %
+                    (maxFields))
+
+        self._actionTable = actionTable
+        self._maxFields = maxFields
+        self._height = actionTable.getHeight()
+
+        # {foodBits: field}, ordered from least to most recently used.
+        self._fields = collections.OrderedDict()
+
+        # [(neighbor cell id, ...), ...] (indexed by cell id).
+        self._neighbors = None
+
+        self._searches = 0
+        self._repairs = 0
+
+    def getDistance(self, position, foodBits, lastFoodEaten = None):
+        """
+        Get the maze distance from a position to the closest food (`UNREACHABLE` if there is none).
+        """
+
+        x, y = position
+        return self.getField(foodBits, lastFoodEaten)[x * self._height + y]
+
+    def getField(self, foodBits, lastFoodEaten = None):
+        """
+        Get the distance from every cell to the closest food in `foodBits`
+        (a food bitmask, cell (x, y) is bit (x * height + y)).
+        Walls and cells that cannot reach any food are `UNREACHABLE`.
+        Do not modify the field.
+
+        If `lastFoodEaten` (a position) is given and the field from before it was eaten is around,
+        that field is repaired instead of searching from scratch.
+        """
+
+        field = self._fields.get(foodBits)
+        if (field is not None):
+            self._fields.move_to_end(foodBits)
+            return field
+
+        self._prepare()
+
+        field = None
+        if (lastFoodEaten is not None):
+            x, y = lastFoodEaten
+            eatenCellId = x * self._height + y
+            oldField = self._fields.get(foodBits | (1 << eatenCellId))
+
+            if (oldField is not None and foodBits & (1 << eatenCellId) == 0):
+                field = self._repair(oldField, eatenCellId)
+                self._repairs += 1
+
+        if (field is None):
+            field = self._search(foodBits)
+            self._searches += 1
+
+        if (len(self._fields) >= self._maxFields):
+            self._fields.popitem(last = False)
+
+        self._fields[foodBits] = field
+
+        return field
+
+    def getFieldCount(self):
+        return len(self._fields)
+
+    def getRepairCount(self):
+        """
+        Get the number of fields that were computed by repairing another field.
+        """
+
+        return self._repairs
+
+    def getSearchCount(self):
+        """
+        Get the number of fields that were computed with a full search.
+        """
+
+        return self._searches
+
+    def _prepare(self):
+        if (self._neighbors is not None):
+            return
+
+        actionTable = self._actionTable
+        width = actionTable.getWidth()
+        height = actionTable.getHeight()
+        openCells = actionTable.getOpenCells()
+
+        self._neighbors = [()] * (width * height)
+        for x in range(width):
+            for y in range(height):
+                if (openCells[x * height + y] == 1):
+                    self._neighbors[x * height + y] = tuple([actionTable.getCellId(position)
+                            for (action, position) in actionTable.getCardinalMoves((x, y))])
+
+    def _repair(self, oldField, eatenCellId):
+        """
+        Get a new field from the field from before the food at `eatenCellId` was eaten.
+
+        Distances only go up when food is eaten,
+        and only for the cells that lose every path to their closest food.
+        Those cells are found by walking out from the eaten food through cells that are one further
+        (a cell is affected when all its neighbors that are one closer are affected).
+        Then the affected cells are filled back in from their unaffected neighbors.
+        """
+
+        neighbors = self._neighbors
+        field = oldField[:]
+
+        affected = set([eatenCellId])
+
+        # The old distances grow by exactly one along the queue.
+        queue = [eatenCellId]
+        for cellId in queue:
+            nextDistance = oldField[cellId] + 1
+
+            for neighbor in neighbors[cellId]:
+                if (oldField[neighbor] != nextDistance or neighbor in affected):
+                    continue
+
+                supported = False
+                for support in neighbors[neighbor]:
+                    if (oldField[support] == nextDistance - 1 and support not in affected):
+                        supported = True
+                        break
+
+                if (not supported):
+                    affected.add(neighbor)
+                    queue.append(neighbor)
+
+        # Fill the affected cells back in, closest first (from the unaffected cells around them).
+        fringe = []
+        for cellId in affected:
+            field[cellId] = UNREACHABLE
+
+            for neighbor in neighbors[cellId]:
+                if (neighbor not in affected and oldField[neighbor] != UNREACHABLE):
+                    fringe.append((oldField[neighbor] + 1, cellId))
+
+        heapq.heapify(fringe)
+
+        while (len(fringe) > 0):
+            distance, cellId = heapq.heappop(fringe)
+            if (field[cellId] <= distance):
+                continue
+
+            field[cellId] = distance
+
+            for neighbor in neighbors[cellId]:
+                if (field[neighbor] > distance + 1):
+                    heapq.heappush(fringe, (distance + 1, neighbor))
+
+        return field
+
+    def _search(self, foodBits):
+        """
+        A breadth first search from all the food at once.
+        """
+
+        neighbors = self._neighbors
+        field = [UNREACHABLE] * len(neighbors)
+
+        queue = []
+        bits = foodBits
+        while (bits):
+            lowBit = bits & -bits
+            cellId = lowBit.bit_length() - 1
+            bits ^= lowBit
+
+            field[cellId] = 0
+            queue.append(cellId)
+
+        # The queue grows while it is being walked.
+        for cellId in queue:
+            nextDistance = field[cellId] + 1
+            for neighbor in neighbors[cellId]:
+                if (field[neighbor] == UNREACHABLE):
+                    field[neighbor] = nextDistance
+                    queue.append(neighbor)
+
+        return field
+
+def getNearestFoodField(actionTable):
+    """
+    Get the `NearestFoodField` for an action table (i.e. a layout's walls).
+    The same fields are shared by everything that uses the same action table.
+    """
+
+    field = _fields.get(actionTable)
+    if (field is None):
+        field = NearestFoodField(actionTable)
+        _fields[actionTable] = field
+
+    return field
@@ -0,0 +1,290 @@
+"""
+Generic graph search over a `pacai.core.search.problem.SearchProblem`.
+
+Search nodes are stored in a `SearchTree`: flat parallel lists indexed by node id,
+where each node only points to its parent (and the action that reached it).
+So adding a node is constant time and memory no matter how deep it is,
+the tree holds no per-node objects for the garbage collector to track,
+and a path is only reconstructed once a goal is found.
+"""
+
+import array
+
+ROOT_ID = 0
+NO_PARENT = -1
+
+class SearchTree(object):
+    """
+    Search nodes, identified by their (integer) id.
+    The root (the starting state) is always `ROOT_ID`.
+    The cost of a node is the total cost of the path to it from the root.
+    """
+
+    __slots__ = ('parents', 'actions', 'costs', 'depths')
+
+    def __init__(self):
+        # Parent ids and depths are packed, since they are never shared.
+        self.parents = array.array('i', [NO_PARENT])
+        self.depths = array.array('i', [0])
+        self.actions = [None]
+        self.costs = [0]
+
+    def addNode(self, parentId, action, cost):
+        """
+        Add a node and return its id.
+        """
+
+        self.parents.append(parentId)
+        self.depths.append(self.depths[parentId] + 1)
+        self.actions.append(action)
+        self.costs.append(cost)
+
+        return len(self.costs) - 1
+
+    def getAction(self, nodeId):
+        return self.actions[nodeId]
+
+    def getCost(self, nodeId):
+        return self.costs[nodeId]
+
+    def comparePaths(self, nodeId, otherId):
+        """
+        Compare the paths (lists of actions) to two nodes, without building them.
+        Returns a negative number, zero, or a positive number if the path to `nodeId` is
+        less than, equal to, or greater than the path to `otherId`.
+        """
+
+        if (nodeId == otherId):
+            return 0
+
+        parents = self.parents
+        depths = self.depths
+
+        first = nodeId
+        second = otherId
+        firstDepth = depths[first]
+        secondDepth = depths[second]
+
+        # Walk up to the same depth.
+        while (firstDepth > secondDepth):
+            first = parents[first]
+            firstDepth -= 1
+
+        while (secondDepth > firstDepth):
+            second = parents[second]
+            secondDepth -= 1
+
+        # One path is a prefix of the other, so the shorter one is less.
+        if (first == second):
+            return depths[nodeId] - depths[otherId]
+
+        # Walk up to the children of the deepest common ancestor, where the paths first differ.
+        while (parents[first] != parents[second]):
+            first = parents[first]
+            second = parents[second]
+
+        action = self.actions[first]
+        otherAction = self.actions[second]
+
+        if (action != otherAction):
+            if (action < otherAction):
+                return -1
+
+            return 1
+
+        # Different nodes reached with the same action from the same parent, check everything.
+        path = self.getPath(nodeId)
+        otherPath = self.getPath(otherId)
+
+        return (path > otherPath) - (path < otherPath)
+
+    def getDepth(self, nodeId):
+        return self.depths[nodeId]
+
+    def getParent(self, nodeId):
+        """
+        Get the id of the parent of a node (or `NO_PARENT` for the root).
+        """
+
+        return self.parents[nodeId]
+
+    def getPath(self, nodeId):
+        """
+        Get the list of actions that lead from the root to a node.
+        """
+
+        parents = self.parents
+        actions = self.actions
+
+        path = []
+        while (parents[nodeId] != NO_PARENT):
+            path.append(actions[nodeId])
+            nodeId = parents[nodeId]
+
+        path.reverse()
+        return path
+
+    def __len__(self):
+        return len(self.costs)
+
+class PathOrder(object):
+    """
+    Orders nodes of a `SearchTree` like their (path, cost),
+    i.e. in the same order that a list of actions and a cost would be compared.
+
+    Equality is left as identity, so comparing two items that hold a PathOrder
+    (e.g. (state, PathOrder) tuples) only walks the tree once.
+    Two distinct nodes with the same path and cost are neither less nor greater than each other,
+    so they still order the same as equal (path, cost) tuples.
+    """
+
+    __slots__ = ('tree', 'nodeId')
+
+    def __init__(self, tree, nodeId):
+        self.tree = tree
+        self.nodeId = nodeId
+
+    def __lt__(self, other):
+        tree = self.tree
+
+        comparison = tree.comparePaths(self.nodeId, other.nodeId)
+        if (comparison != 0):
+            return comparison < 0
+
+        return tree.costs[self.nodeId] < tree.costs[other.nodeId]
+
+def graphSearch(problem, fringe, priorityFunction = None):
+    """
+    Search a problem, always expanding the node popped from the fringe next.
+    The fringe decides the search order, e.g. a `pacai.util.stack.Stack` gives depth first search.
+
+    Without a `priorityFunction`, nodes are pushed with `fringe.push(item)`.
+    Otherwise, nodes are pushed with `fringe.push(item, priorityFunction(state, cost))`
+    (and the starting node gets a priority of zero).
+    Items are (state, node id) for plain fringes,
+    and (state, `PathOrder`) for priority fringes (so that ties are broken by state, then path).
+
+    A priority fringe that supports `decreaseKey`
+    (like `pacai.util.priorityQueue.IndexedPriorityQueue`) is keyed by state instead,
+    see `_indexedGraphSearch`.
+
+    States are only expanded once, the first time they are popped.
+    Returns the list of actions that reaches a goal, or None if no goal can be reached.
+    """
+
+    if (priorityFunction is not None and hasattr(fringe, 'decreaseKey')):
+        return _indexedGraphSearch(problem, fringe, priorityFunction)
+
+    tree = SearchTree()
+    prioritized = (priorityFunction is not None)
+
+    start = problem.startingState()
+    if (prioritized):
+        fringe.push((start, PathOrder(tree, ROOT_ID)), 0)
+    else:
+        fringe.push((start, ROOT_ID))
+
+    explored = set()
+
+    # The tree is grown inline (see SearchTree.addNode()), since this is the innermost loop.
+    costs = tree.costs
+    addParent = tree.parents.append
+    addDepth = tree.depths.append
+    addAction = tree.actions.append
+    addCost = costs.append
+    depths = tree.depths
+
+    while (not fringe.isEmpty()):
+        state, nodeId = fringe.pop()
+        if (prioritized):
+            nodeId = nodeId.nodeId
+
+        if (state in explored):
+            continue
+
+        if (problem.isGoal(state)):
+            return tree.getPath(nodeId)
+
+        explored.add(state)
+
+        cost = costs[nodeId]
+        childDepth = depths[nodeId] + 1
+
+        for (successor, action, stepCost) in problem.successorStates(state):
+            if (successor in explored):
+                continue
+
+            childCost = cost + stepCost
+
+            childId = len(costs)
+            addParent(nodeId)
+            addDepth(childDepth)
+            addAction(action)
+            addCost(childCost)
+
+            if (prioritized):
+                fringe.push((successor, PathOrder(tree, childId)),
+                        priorityFunction(successor, childCost))
+            else:
+                fringe.push((successor, childId))
+
+    return None
+
+def _indexedGraphSearch(problem, fringe, priorityFunction):
+    """
+    Like `graphSearch` with a priority fringe,
+    but every state is in the fringe at most once (with the best node that reaches it so far).
+    Pushing a state that is already in the fringe is a `decreaseKey`,
+    so no duplicate entries are ever popped and skipped.
+
+    The priority of an item is (priority, state, `PathOrder`),
+    so states are expanded in exactly the same order as `graphSearch`.
+    """
+
+    tree = SearchTree()
+
+    start = problem.startingState()
+    fringe.push(start, (0, start, PathOrder(tree, ROOT_ID)))
+
+    explored = set()
+
+    costs = tree.costs
+    addParent = tree.parents.append
+    addDepth = tree.depths.append
+    addAction = tree.actions.append
+    addCost = costs.append
+    depths = tree.depths
+
+    while (not fringe.isEmpty()):
+        state, (_, _, order) = fringe.popWithPriority()
+        nodeId = order.nodeId
+
+        if (problem.isGoal(state)):
+            return tree.getPath(nodeId)
+
+        explored.add(state)
+
+        cost = costs[nodeId]
+        childDepth = depths[nodeId] + 1
+
+        for (successor, action, stepCost) in problem.successorStates(state):
+            if (successor in explored):
+                continue
+
+            childCost = cost + stepCost
+            priority = priorityFunction(successor, childCost)
+
+            # Don't grow the tree for a node that can not beat the one already in the fringe.
+            current = fringe.getPriority(successor)
+            if (current is not None and current[0] < priority):
+                continue
+
+            childId = len(costs)
+            addParent(nodeId)
+            addDepth(childDepth)
+            addAction(action)
+            addCost(childCost)
+
+            fringe.decreaseKey(successor, (priority, successor, PathOrder(tree, childId)))
+
+    return None
@@ -0,0 +1,445 @@
+"""
+Point-to-point shortest paths on uniform-cost grid mazes (e.g. Pacman boards).
+
+These solvers only need the walls (as a `pacai.core.actions.ActionTable`),
+and are much faster than a full `pacai.core.search.problem.SearchProblem` search
+when all that is needed is a shortest path (or its length) between two cells:
+ - `bidirectionalPath` runs a breadth first search from both ends at once,
+   so it only explores about half as far as a single breadth first search.
+ - `jumpPointPath` runs A* over "jump points": it scans along straight lines
+   and only stops where a shortest path might have to turn,
+   which makes it very fast on open layouts with few walls.
+ - `shortestPath` picks between the two based on how open the layout is (see `isOpenLayout`).
+
+Paths are lists of positions that start at the starting position and end at the goal.
+Positions must be integral (x, y) tuples.
+"""
+
+import array
+import heapq
+import weakref
+
+from pacai.core.actions import Actions
+
+# Layouts where at least this fraction of the open cells have three or more open neighbors
+# are open enough for jump point search to beat bidirectional search.
+OPEN_LAYOUT_FRACTION = 0.5
+
+# {ActionTable: JumpTable}, see getJumpTable().
+_jumpTables = weakref.WeakKeyDictionary()
+
+# {ActionTable: bool}, see isOpenLayout().
+_openLayouts = weakref.WeakKeyDictionary()
+
+class JumpTable(object):
+    """
+    The goal-independent part of every straight scan that `jumpPointPath` can make
+    (this is known as JPS+).
+
+    Scans are indexed by direction: 1 (east), -1 (west), 2 (north), and -2 (south).
+    For each scan and cell id (see `pacai.core.actions.ActionTable`):
+     - `runs[scan][cellId]` is how many cells can be moved before hitting a wall.
+     - `jumps[scan][cellId]` is how many cells away the first jump point is (zero for none).
+       Horizontal scans stop at forced turns,
+       and vertical scans stop at cells where a horizontal scan would stop.
+    """
+
+    def __init__(self, actionTable):
+        self._width = actionTable.getWidth()
+        self._height = actionTable.getHeight()
+        self._openCells = actionTable.getOpenCells()
+
+        numCells = self._width * self._height
+
+        self.runs = {}
+        self.jumps = {}
+        for scan in (1, -1, 2, -2):
+            self.runs[scan] = array.array('i', [0] * numCells)
+            self.jumps[scan] = array.array('i', [0] * numCells)
+
+        for dx in (1, -1):
+            self._fill(dx, 0, lambda x, y: self.isForcedTurn(x, y, dx, 1)
+                    or self.isForcedTurn(x, y, dx, -1))
+
+        for dy in (1, -1):
+            self._fill(0, dy, lambda x, y: (self.jumps[1][x * self._height + y] > 0
+                    or self.jumps[-1][x * self._height + y] > 0))
+
+    def isForcedTurn(self, x, y, dx, dy):
+        """
+        Can a horizontal move (in the dx direction) into (x, y) be followed by a vertical move
+        (in the dy direction) that could not have been made one cell earlier?
+        """
+
+        return self.isOpen(x, y + dy) and not self.isOpen(x - dx, y + dy)
+
+    def isOpen(self, x, y):
+        return (0 <= x < self._width and 0 <= y < self._height
+                and self._openCells[x * self._height + y] == 1)
+
+    def _fill(self, dx, dy, isJumpPoint):
+        """
+        Fill in the scans in one direction, by sweeping each line from the far end.
+        """
+
+        scan = dx + 2 * dy
+        runs = self.runs[scan]
+        jumps = self.jumps[scan]
+
+        xs = list(range(self._width))
+        if (dx > 0):
+            xs.reverse()
+
+        ys = list(range(self._height))
+        if (dy > 0):
+            ys.reverse()
+
+        # Horizontal scans sweep rows, vertical scans sweep columns.
+        if (dx != 0):
+            order = [(x, y) for y in ys for x in xs]
+        else:
+            order = [(x, y) for x in xs for y in ys]
+
+        for (x, y) in order:
+            nextX = x + dx
+            nextY = y + dy
+
+            if (not self.isOpen(x, y) or not self.isOpen(nextX, nextY)):
+                continue
+
+            cellId = x * self._height + y
+            nextId = nextX * self._height + nextY
+
+            runs[cellId] = runs[nextId] + 1
+
+            if (isJumpPoint(nextX, nextY)):
+                jumps[cellId] = 1
+            elif (jumps[nextId] > 0):
+                jumps[cellId] = jumps[nextId] + 1
+
+def getJumpTable(actionTable):
+    """
+    Get the `JumpTable` for an action table.
+    The table is computed the first time it is requested.
+    """
+
+    table = _jumpTables.get(actionTable)
+    if (table is None):
+        table = JumpTable(actionTable)
+        _jumpTables[actionTable] = table
+
+    return table
+
+def bidirectionalPath(actionTable, start, goal):
+    """
+    Get a shortest path from `start` to `goal` with a bidirectional breadth first search,
+    or None if there is no path.
+    """
+
+    openCells = actionTable.getOpenCells()
+    if (not _isOpen(actionTable, openCells, start) or not _isOpen(actionTable, openCells, goal)):
+        return None
+
+    if (start == goal):
+        return [start]
+
+    # {position: parent (toward the side's root)}.
+    forwardParents = {start: None}
+    backwardParents = {goal: None}
+
+    # {position: distance from the side's root}.
+    forwardDistances = {start: 0}
+    backwardDistances = {goal: 0}
+
+    forwardFrontier = [start]
+    backwardFrontier = [goal]
+
+    while (len(forwardFrontier) > 0 and len(backwardFrontier) > 0):
+        # Always grow the smaller frontier.
+        if (len(forwardFrontier) <= len(backwardFrontier)):
+            forwardFrontier, meeting = _expandLevel(actionTable, forwardFrontier,
+                    forwardParents, forwardDistances, backwardDistances)
+        else:
+            backwardFrontier, meeting = _expandLevel(actionTable, backwardFrontier,
+                    backwardParents, backwardDistances, forwardDistances)
+
+        if (meeting is not None):
+            return _joinPaths(meeting, forwardParents, backwardParents)
+
+    return None
+
+def bidirectionalSearch(problem):
+    """
+    A search function (like `pacai.student.search.breadthFirstSearch`)
+    for a `pacai.core.search.position.PositionSearchProblem` with uniform costs.
+    Returns the list of actions, or None if there is no path.
+    Note that the problem's expansion bookkeeping is not updated.
+    """
+
+    return pathToActions(bidirectionalPath(problem.actionTable, problem.startingState(),
+            problem.goal))
+
+def isOpenLayout(actionTable):
+    """
+    Is a layout mostly open space (rooms) instead of mostly corridors?
+    Jump point search can skip across open space, but has nothing to skip in corridors.
+    """
+
+    isOpen = _openLayouts.get(actionTable)
+    if (isOpen is not None):
+        return isOpen
+
+    openCells = actionTable.getOpenCells()
+    height = actionTable.getHeight()
+
+    numOpen = 0
+    numJunctions = 0
+
+    for x in range(actionTable.getWidth()):
+        for y in range(height):
+            if (openCells[x * height + y] == 0):
+                continue
+
+            numOpen += 1
+            if (len(actionTable.getCardinalMoves((x, y))) >= 3):
+                numJunctions += 1
+
+    isOpen = (numOpen > 0 and numJunctions / numOpen >= OPEN_LAYOUT_FRACTION)
+    _openLayouts[actionTable] = isOpen
+
+    return isOpen
+
+def jumpPointPath(actionTable, start, goal):
+    """
+    Get a shortest path from `start` to `goal` with jump point search,
+    or None if there is no path.
+
+    Shortest paths on a grid can always be reordered so that they only turn from a horizontal
+    move to a vertical one when the cell diagonally behind the turn is a wall
+    (otherwise the vertical move could have been made one step earlier).
+    So a horizontal scan only stops at the goal and at those "forced" turns,
+    while a vertical scan stops at the goal and anywhere a horizontal scan would find something.
+    The scans themselves are looked up in a `JumpTable`, so each one is constant time.
+    """
+
+    openCells = actionTable.getOpenCells()
+    if (not _isOpen(actionTable, openCells, start) or not _isOpen(actionTable, openCells, goal)):
+        return None
+
+    if (start == goal):
+        return [start]
+
+    jumps = getJumpTable(actionTable)
+    height = actionTable.getHeight()
+    goalX, goalY = goal
+
+    def jumpHorizontal(x, y, dx):
+        cellId = x * height + y
+        run = jumps.runs[dx][cellId]
+        jump = jumps.jumps[dx][cellId]
+
+        if (y == goalY):
+            goalDistance = (goalX - x) * dx
+            if (0 < goalDistance <= run and (jump == 0 or goalDistance <= jump)):
+                return goal
+
+        if (jump == 0):
+            return None
+
+        return (x + jump * dx, y)
+
+    def jumpVertical(x, y, dy):
+        cellId = x * height + y
+        run = jumps.runs[2 * dy][cellId]
+        jump = jumps.jumps[2 * dy][cellId]
+
+        # The goal's row is the only other place where a horizontal scan can find something.
+        goalDistance = (goalY - y) * dy
+        if (0 < goalDistance <= run and (jump == 0 or goalDistance <= jump)):
+            if (x == goalX):
+                return goal
+
+            dx = 1 if (goalX > x) else -1
+            if (jumps.runs[dx][x * height + goalY] >= abs(goalX - x)):
+                return (x, goalY)
+
+        if (jump == 0):
+            return None
+
+        return (x, y + jump * dy)
+
+    # Nodes are (position, direction that reached it).
+    # The direction matters, since it decides where a node can go next.
+    startNode = (start, (0, 0))
+
+    # {node: parent node}
+    parents = {startNode: None}
+    costs = {startNode: 0}
+    closed = set()
+
+    fringe = [(_manhattan(start, goal), 0, startNode)]
+
+    while (len(fringe) > 0):
+        priority, negativeCost, node = heapq.heappop(fringe)
+        if (node in closed):
+            continue
+
+        closed.add(node)
+
+        position, direction = node
+        if (position == goal):
+            return _expandJumps(node, parents)
+
+        x, y = position
+        dx, dy = direction
+        cost = -negativeCost
+
+        if (direction == (0, 0)):
+            directions = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+        elif (dy == 0):
+            directions = [direction]
+            for turn in (1, -1):
+                if (jumps.isForcedTurn(x, y, dx, turn)):
+                    directions.append((0, turn))
+        else:
+            directions = [direction, (1, 0), (-1, 0)]
+
+        for (nextDX, nextDY) in directions:
+            if (nextDY == 0):
+                jumpPoint = jumpHorizontal(x, y, nextDX)
+            else:
+                jumpPoint = jumpVertical(x, y, nextDY)
+
+            if (jumpPoint is None):
+                continue
+
+            nextNode = (jumpPoint, (nextDX, nextDY))
+            nextCost = cost + _manhattan(position, jumpPoint)
+
+            if (nextNode in closed or costs.get(nextNode, nextCost + 1) <= nextCost):
+                continue
+
+            costs[nextNode] = nextCost
+            parents[nextNode] = node
+
+            # Break ties toward deeper nodes.
+            heapq.heappush(fringe, (nextCost + _manhattan(jumpPoint, goal), -nextCost, nextNode))
+
+    return None
+
+def jumpPointSearch(problem):
+    """
+    A search function (like `pacai.student.search.breadthFirstSearch`)
+    for a `pacai.core.search.position.PositionSearchProblem` with uniform costs.
+    Returns the list of actions, or None if there is no path.
+    Note that the problem's expansion bookkeeping is not updated.
+    """
+
+    return pathToActions(jumpPointPath(problem.actionTable, problem.startingState(),
+            problem.goal))
+
+def pathToActions(path):
+    """
+    Convert a path of adjacent positions into the list of actions that walks it.
+    Returns None if the path is None.
+    """
+
+    if (path is None):
+        return None
+
+    actions = []
+    for i in range(1, len(path)):
+        vector = (path[i][0] - path[i - 1][0], path[i][1] - path[i - 1][1])
+        actions.append(Actions.vectorToDirection(vector))
+
+    return actions
+
+def shortestPath(actionTable, start, goal):
+    """
+    Get a shortest path from `start` to `goal` (or None if there is no path)
+    with whichever solver is faster on this layout.
+    """
+
+    if (isOpenLayout(actionTable)):
+        return jumpPointPath(actionTable, start, goal)
+
+    return bidirectionalPath(actionTable, start, goal)
+
+def _expandJumps(node, parents):
+    """
+    Get the full path (every cell) to a jump point search node.
+    """
+
+    jumpPoints = []
+    while (node is not None):
+        jumpPoints.append(node[0])
+        node = parents[node]
+
+    jumpPoints.reverse()
+
+    path = [jumpPoints[0]]
+    for (x, y) in jumpPoints[1:]:
+        lastX, lastY = path[-1]
+        stepX = (x > lastX) - (x < lastX)
+        stepY = (y > lastY) - (y < lastY)
+
+        while (lastX != x or lastY != y):
+            lastX += stepX
+            lastY += stepY
+            path.append((lastX, lastY))
+
+    return path
+
+def _expandLevel(actionTable, frontier, parents, distances, otherDistances):
+    """
+    Expand every position in a frontier (which are all the same distance from their root).
+    Returns the next frontier and the position where the shortest path through the other side
+    crosses (or None).
+    """
+
+    nextFrontier = []
+    meeting = None
+    bestLength = None
+
+    for position in frontier:
+        distance = distances[position] + 1
+
+        for (action, nextPosition) in actionTable.getCardinalMoves(position):
+            if (nextPosition in parents):
+                continue
+
+            parents[nextPosition] = position
+            distances[nextPosition] = distance
+            nextFrontier.append(nextPosition)
+
+            otherDistance = otherDistances.get(nextPosition)
+            if (otherDistance is not None
+                    and (bestLength is None or distance + otherDistance < bestLength)):
+                meeting = nextPosition
+                bestLength = distance + otherDistance
+
+    return nextFrontier, meeting
+
+def _isOpen(actionTable, openCells, position):
+    cellId = actionTable.getCellId(position)
+    return (cellId is not None and openCells[cellId] == 1)
+
+def _joinPaths(meeting, forwardParents, backwardParents):
+    path = []
+
+    position = meeting
+    while (position is not None):
+        path.append(position)
+        position = forwardParents[position]
+
+    path.reverse()
+
+    position = backwardParents[meeting]
+    while (position is not None):
+        path.append(position)
+        position = backwardParents[position]
+
+    return path
+
+def _manhattan(position1, position2):
+    return abs(position1[0] - position2[0]) + abs(position1[1] - position2[1])
@@ -37,4 +37,23 @@ def numFood(state, problem):
     This heuristic is the amount of food left to on the board.
     """
 
-    return state[1].count()
+    food = state[1]
+
+    # `pacai.core.search.food.PackedFoodSearchProblem` keeps the food as a bit mask.
+    if (isinstance(food, int)):
+        return bin(food).count('1')
+
+    return food.count()
+
+def foodSpanningTree(state, problem):
+    """
+    This heuristic is the maze distance to the closest food,
+    plus the weight of the minimum spanning tree (over maze distances) of the remaining food.
+    It is consistent.
+
+    The problem must be a `pacai.core.search.food.FoodSearchProblem`
+    (or a `pacai.core.search.food.PackedFoodSearchProblem`).
+    """
+
+    return problem.getFoodDistances().estimate(problem.getCellId(state),
+            problem.getFoodMask(state))
@@ -0,0 +1,223 @@
+"""
+Fast maze distances for search heuristics.
+
+A `MazeDistanceOracle` answers maze distance queries on a single set of walls
+(a `pacai.core.actions.ActionTable`) by computing whole rows of distances:
+one breadth first search from a source cell gives its distance to every other cell.
+Rows are computed on demand and the least recently used rows are evicted,
+so heuristics that keep asking about the same few positions (e.g. the remaining food)
+get maze distances for about the cost of a Manhattan distance.
+On small maps, every row is computed up front (all-pairs) and nothing is evicted.
+
+Use `getDistanceOracle` to get the oracle shared by every problem on the same layout.
+"""
+
+import array
+import collections
+import sys
+import weakref
+
+# How many rows an oracle keeps (on maps that are too big for all-pairs).
+DEFAULT_MAX_ROWS = 1024
+
+# Maps with at most this many open cells have all their rows computed at once.
+ALL_PAIRS_MAX_CELLS = 400
+
+# The distance between cells that cannot reach each other (the same as
+# `pacai.core.distanceCalculator.DistanceTable`).
+UNREACHABLE = sys.maxsize
+
+# {ActionTable: MazeDistanceOracle}, see getDistanceOracle().
+_oracles = weakref.WeakKeyDictionary()
+
+class MazeDistanceOracle(object):
+    """
+    Maze distances between the cells of a layout.
+    Rows are indexed by cell id (see `pacai.core.actions.ActionTable.getCellId`).
+
+    Nothing is computed until the first query.
+    """
+
+    def __init__(self, actionTable, maxRows = DEFAULT_MAX_ROWS,
+            allPairsMaxCells = ALL_PAIRS_MAX_CELLS):
+        if (maxRows <= 0):
+            raise ValueError('Distance oracles need a positive number of rows, got: %d.' %
+                    (maxRows))
+
+        self._actionTable = actionTable
+        self._maxRows = maxRows
+        self._allPairsMaxCells = allPairsMaxCells
+
+        # {sourceCellId: row}, ordered from least to most recently used.
+        self._rows = collections.OrderedDict()
+        self._allPairs = False
+
+        # Built on the first query.
+        # [(neighbor cell id, ...), ...] (indexed by cell id).
+        self._neighbors = None
+        self._openCellIds = None
+        self._unreachableRow = None
+
+        self._hits = 0
+        self._lookups = 0
+
+    def getDistance(self, position1, position2):
+        """
+        Get the maze distance between two positions (`UNREACHABLE` if there is no path).
+        Raises a ValueError if either position is a wall or off the board.
+        """
+
+        cellId1 = self._getCellId(position1)
+        cellId2 = self._getCellId(position2)
+
+        # Distances are symmetric, so use whichever row is already around.
+        if (cellId1 not in self._rows and cellId2 in self._rows):
+            cellId1, cellId2 = cellId2, cellId1
+
+        return self._getRow(cellId1)[cellId2]
+
+    def getDistances(self, source, targets):
+        """
+        Get a list of the maze distances from `source` to each position in `targets`
+        (e.g. all the remaining food).
+        This only needs a single row.
+        """
+
+        row = self._getRow(self._getCellId(source))
+        return [row[self._getCellId(target)] for target in targets]
+
+    def getHitCount(self):
+        return self._hits
+
+    def getLookupCount(self):
+        return self._lookups
+
+    def getMaxRows(self):
+        return self._maxRows
+
+    def getRow(self, source):
+        """
+        Get the distances from `source` to every cell, as an array indexed by cell id.
+        Walls (and unreachable cells) are `UNREACHABLE`.
+        Do not modify it.
+        """
+
+        return self._getRow(self._getCellId(source))
+
+    def getRowCount(self):
+        """
+        Get the number of rows that are currently stored.
+        """
+
+        return len(self._rows)
+
+    def isAllPairs(self):
+        """
+        Are all the rows stored (see `MazeDistanceOracle.materialize`)?
+        """
+
+        return self._allPairs
+
+    def materialize(self):
+        """
+        Compute the rows of every open cell, and never evict them.
+        """
+
+        self._prepare()
+
+        for cellId in self._openCellIds:
+            if (cellId not in self._rows):
+                self._rows[cellId] = self._computeRow(cellId)
+
+        self._allPairs = True
+
+    def _computeRow(self, source):
+        neighbors = self._neighbors
+
+        row = self._unreachableRow[:]
+        row[source] = 0
+
+        # The queue grows while it is being walked.
+        queue = [source]
+        for cellId in queue:
+            nextDistance = row[cellId] + 1
+            for neighbor in neighbors[cellId]:
+                if (row[neighbor] == UNREACHABLE):
+                    row[neighbor] = nextDistance
+                    queue.append(neighbor)
+
+        return row
+
+    def _getCellId(self, position):
+        cellId = self._actionTable.getCellId(position)
+        if (cellId is None or self._actionTable.getOpenCells()[cellId] == 0):
+            raise ValueError('Position is not an open cell: ' + str(position))
+
+        return cellId
+
+    def _getRow(self, cellId):
+        self._lookups += 1
+
+        row = self._rows.get(cellId)
+        if (row is not None):
+            self._hits += 1
+
+            if (not self._allPairs):
+                self._rows.move_to_end(cellId)
+
+            return row
+
+        self._prepare()
+        if (len(self._openCellIds) <= self._allPairsMaxCells):
+            self.materialize()
+            return self._rows[cellId]
+
+        row = self._computeRow(cellId)
+
+        if (len(self._rows) >= self._maxRows):
+            self._rows.popitem(last = False)
+
+        self._rows[cellId] = row
+
+        return row
+
+    def _prepare(self):
+        """
+        Build the adjacency (by cell id) that rows are computed from.
+        """
+
+        if (self._neighbors is not None):
+            return
+
+        actionTable = self._actionTable
+        width = actionTable.getWidth()
+        height = actionTable.getHeight()
+        openCells = actionTable.getOpenCells()
+
+        self._neighbors = [()] * (width * height)
+        self._openCellIds = []
+
+        for x in range(width):
+            for y in range(height):
+                cellId = x * height + y
+                if (openCells[cellId] == 0):
+                    continue
+
+                self._openCellIds.append(cellId)
+                self._neighbors[cellId] = tuple([actionTable.getCellId(position)
+                        for (action, position) in actionTable.getCardinalMoves((x, y))])
+
+        self._unreachableRow = array.array('q', [UNREACHABLE] * (width * height))
+
+def getDistanceOracle(actionTable):
+    """
+    Get the `MazeDistanceOracle` for an action table (i.e. a layout's walls).
+    The same oracle is shared by everything that uses the same action table.
+    """
+
+    oracle = _oracles.get(actionTable)
+    if (oracle is None):
+        oracle = MazeDistanceOracle(actionTable)
+        _oracles[actionTable] = oracle
+
+    return oracle
@@ -1,5 +1,4 @@
 from pacai.core.actions import Actions
-from pacai.core.directions import Directions
 from pacai.core.search.problem import SearchProblem
 
 DEFAULT_COST_FUNCTION = lambda x: 1
@@ -24,6 +23,7 @@ class PositionSearchProblem(SearchProblem):
         super().__init__()
 
         self.walls = gameState.getWalls()
+        self.actionTable = gameState.getActionTable()
         self.goal = goal
         self.costFn = costFn
 
@@ -58,16 +58,10 @@ class PositionSearchProblem(SearchProblem):
 
         successors = []
 
-        for action in Directions.CARDINAL:
-            x, y = state
-            dx, dy = Actions.directionToVector(action)
-            nextx, nexty = int(x + dx), int(y + dy)
-
-            if (not self.walls[nextx][nexty]):
-                nextState = (nextx, nexty)
-                cost = self.costFn(nextState)
-
-                successors.append((nextState, action, cost))
+        # The moves that do not hit a wall are precomputed (see `pacai.core.actions.ActionTable`).
+        for (action, nextState) in self.actionTable.getCardinalMoves(state):
+            cost = self.costFn(nextState)
+            successors.append((nextState, action, cost))
 
         # Bookkeeping for display purposes (the highlight in the GUI).
         self._numExpanded += 1
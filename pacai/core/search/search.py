@@ -1,4 +1,5 @@
 from pacai.core.directions import Directions
+from pacai.core.search import anytime
 from pacai.student import search
 
 def tinyMazeSearch(problem):
@@ -26,3 +27,12 @@ astar = search.aStarSearch
 
 uniformCostSearch = search.uniformCostSearch
 ucs = search.uniformCostSearch
+
+weightedAStarSearch = anytime.weightedAStarSearch
+wastar = anytime.weightedAStarSearch
+
+budgetedAStarSearch = anytime.budgetedAStarSearch
+bastar = anytime.budgetedAStarSearch
+
+araStarSearch = anytime.araStarSearch
+arastar = anytime.araStarSearch
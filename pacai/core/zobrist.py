@@ -0,0 +1,81 @@
+"""
+Zobrist hashing for game states.
+
+A Zobrist hash assigns a random key to every (location, feature) pair on the board,
+and the hash of a state is the XOR of the keys for all the features that are present.
+Since XOR is its own inverse, a feature can be added or removed from a hash in constant time,
+which allows game states to maintain their hash incrementally as they are modified.
+"""
+
+import random
+
+# Keys are drawn from a private generator with a fixed seed,
+# so building a table never disturbs the global random state (and therefore seeded games).
+ZOBRIST_SEED = 1093
+KEY_BITS = 64
+KEY_MASK = (1 << KEY_BITS) - 1
+
+class ZobristTable:
+    """
+    The random keys used to hash game states on a specific `pacai.core.layout.Layout`.
+    Tables should be fetched with `pacai.core.layout.Layout.getZobristTable`,
+    so they are only computed once per layout.
+    """
+
+    def __init__(self, layout):
+        rng = random.Random(ZOBRIST_SEED)
+
+        self._height = layout.height
+
+        numCells = layout.width * layout.height
+        self._foodKeys = [rng.getrandbits(KEY_BITS) for i in range(numCells)]
+        self._capsuleKeys = [rng.getrandbits(KEY_BITS) for i in range(numCells)]
+
+        # Agent keys must be odd so that multiplying by them does not lose information.
+        self._agentKeys = [rng.getrandbits(KEY_BITS) | 1 for i in range(len(layout.agentPositions))]
+
+        self._scoreKey = rng.getrandbits(KEY_BITS) | 1
+        self._gameoverKey = rng.getrandbits(KEY_BITS)
+        self._winKey = rng.getrandbits(KEY_BITS)
+
+        # The hash for the starting board (layout, food, capsules, and a zero score).
+        self._initialHash = hash(tuple(layout.layoutText)) & KEY_MASK
+
+        for (x, y) in layout.food.asList():
+            self._initialHash ^= self.foodKey(x, y)
+
+        for (x, y) in layout.capsules:
+            self._initialHash ^= self.capsuleKey(x, y)
+
+        self._initialHash ^= self.scoreKey(0)
+
+    def agentKey(self, agentIndex, agentState):
+        """
+        Get the key for an agent.
+        Since agents can be in fractional positions and have several mutable attributes,
+        the key is derived from the agent state's (cached) hash instead of a lookup table.
+        """
+
+        return (hash(agentState) * self._agentKeys[agentIndex]) & KEY_MASK
+
+    def capsuleKey(self, x, y):
+        return self._capsuleKeys[x * self._height + y]
+
+    def endGameKey(self, win):
+        if (win):
+            return self._gameoverKey ^ self._winKey
+
+        return self._gameoverKey
+
+    def foodKey(self, x, y):
+        return self._foodKeys[x * self._height + y]
+
+    def getInitialHash(self):
+        """
+        Get the hash of all the static (non-agent) parts of a freshly initialized game state.
+        """
+
+        return self._initialHash
+
+    def scoreKey(self, score):
+        return (hash(score) * self._scoreKey) & KEY_MASK
@@ -1,6 +1,7 @@
 import random
 
 from pacai.agents.base import BaseAgent
+from pacai.agents.search import adversarial
 from pacai.agents.search.multiagent import MultiAgentSearchAgent
 import pacai.core.distance as dist
 from pacai.core.directions import Directions
@@ -127,6 +128,10 @@ class MinimaxAgent(MultiAgentSearchAgent):
     # Returns the minimax action from the current gameState
     
     def getAction(self, gamestate):
+        # Use the shared search core if any of its options (timeLimit, ttSize) were given.
+        if (self.usesSearchCore()):
+            return self.getSearchCore(adversarial.MINIMAX).getAction(gamestate)
+
         # helper functs
         # pseudocode
         # function MAX-VALUE(state) returns a utility value
@@ -209,6 +214,10 @@ class AlphaBetaAgent(MultiAgentSearchAgent):
 
     # Returns the minimax action from the current gameState
     def getAction(self, gamestate):
+        # Use the shared search core if any of its options (timeLimit, ttSize) were given.
+        if (self.usesSearchCore()):
+            return self.getSearchCore(adversarial.ALPHA_BETA).getAction(gamestate)
+
         # helper functs
         # pseudocode
         # function MAX-VALUE(state,α, β) returns a utility value
@@ -317,6 +326,10 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
 
     # Returns the expectimax action from the current gameState
     def getAction(self, gamestate):
+        # Use the shared search core if any of its options (timeLimit, ttSize) were given.
+        if (self.usesSearchCore()):
+            return self.getSearchCore(adversarial.EXPECTIMAX).getAction(gamestate)
+
         # helpers
         # pseudocode
         # def maxValue(s)
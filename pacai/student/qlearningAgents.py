@@ -3,6 +3,12 @@ from pacai.util import reflection
 from pacai.util import probability
 import random
 
+# The weight of a feature that an approximate Q-learning agent has not seen before.
+INITIAL_WEIGHT = 1.0
+
+# The number of states whose features an approximate Q-learning agent keeps around.
+FEATURE_CACHE_SIZE = 2
+
 class QLearningAgent(ReinforcementAgent):
     """
     A Q-Learning agent.
@@ -56,7 +62,15 @@ class QLearningAgent(ReinforcementAgent):
         and `pacai.core.directions.Directions`.
         Should return 0.0 if the (state, action) pair has never been seen.
         """
-        return self.qValues.get((state, action), 0.0)
+        return self.qValues.get((self.getStateKey(state), action), 0.0)
+
+    def getStateKey(self, state):
+        """
+        Get the key used to store a state in the q-value table.
+        By default, the state itself is used.
+        """
+
+        return state
 
     def getValue(self, state):
         """
@@ -138,7 +152,7 @@ class QLearningAgent(ReinforcementAgent):
         q = (1 - alpha) * sQValue + alpha * sample
         
         # update qValues
-        self.qValues[(state, action)] = q
+        self.qValues[(self.getStateKey(state), action)] = q
 
 class PacmanQAgent(QLearningAgent):
     """
@@ -164,6 +178,14 @@ class PacmanQAgent(QLearningAgent):
 
         return action
 
+    def getStateKey(self, state):
+        """
+        Key the q-value table on packed states (see `pacai.core.gamestate.AbstractGameState.pack`),
+        so the table does not keep every visited game state (and its grids) alive.
+        """
+
+        return state.pack()
+
 class ApproximateQAgent(PacmanQAgent):
     """
     An approximate Q-learning agent.
@@ -187,10 +209,17 @@ class ApproximateQAgent(PacmanQAgent):
     def __init__(self, index,
             extractor = 'pacai.core.featureExtractors.IdentityExtractor', **kwargs):
         super().__init__(index, **kwargs)
-        self.featExtractor = reflection.qualifiedImport(extractor)
+        self.featExtractor = reflection.qualifiedImport(extractor)()
+        self.featureIndex = self.featExtractor.getFeatureIndex()
+
+        # The weight of every feature, indexed by the extractor's feature index.
+        # Features that have never been seen start at INITIAL_WEIGHT.
+        self.weights = []
 
-        # You might want to initialize weights here.
-        self.weights = {}
+        # [(state, {action: FeatureVector}), ...] for the last few states.
+        # The game hands the same state to update() and then getAction(),
+        # so the features of each state only need to be extracted once.
+        self._featureCache = []
 
     def final(self, state):
         """
@@ -204,21 +233,73 @@ class ApproximateQAgent(PacmanQAgent):
         if self.episodesSoFar == self.numTraining:
             # You might want to print your weights here for debugging.
             # *** Your Code Here ***
-            return self.weights
-        
+            return self.getWeights()
+
+    def getWeights(self):
+        """
+        Get the weights as a dict of {feature name: weight}.
+        """
+
+        return {self.featureIndex.getName(index): weight
+                for (index, weight) in enumerate(self.weights)}
+
+    def getFeatureVectors(self, state):
+        """
+        Get the `pacai.core.featureExtractors.FeatureVector` of every legal action in a state,
+        as {action: vector}.
+        """
+
+        for (cachedState, vectors) in self._featureCache:
+            if (cachedState is state):
+                return vectors
+
+        actions = self.getLegalActions(state)
+        vectors = dict(zip(actions, self.featExtractor.getFeatureVectors(state, actions)))
+
+        if (len(self._featureCache) >= FEATURE_CACHE_SIZE):
+            self._featureCache.pop(0)
+
+        self._featureCache.append((state, vectors))
+        self._addWeights()
+
+        return vectors
+
     def getQValue(self, state, action):
         """Should return `Q(state, action) = w * featureVector`,
     where `*` is the dotProduct operator."""
-        features = self.featExtractor.getFeatures(self, state, action)
-        # print(features)
-        # dot product sum(w*f) for each f key
-        q = 0
-        for f in features.keys():
-            # no weight, set to 1
-            if f not in self.weights:
-                self.weights[f] = 1
-            q += self.weights[f] * features[f]
-        return q
+        vector = self.getFeatureVectors(state).get(action)
+        if (vector is None):
+            vector = self.featExtractor.getFeatureVector(state, action)
+            self._addWeights()
+
+        return vector.dot(self.weights)
+
+    def getQValues(self, state):
+        """
+        Get the Q-value of every legal action in a state, as {action: Q-value}.
+        """
+
+        weights = self.weights
+        return {action: vector.dot(weights)
+                for (action, vector) in self.getFeatureVectors(state).items()}
+
+    def getValue(self, state):
+        """
+        The same as `QLearningAgent.getValue`, but with all the Q-values computed at once.
+        """
+
+        return max(self.getQValues(state).values(), default = 0.0)
+
+    def getPolicy(self, state):
+        """
+        The same as `QLearningAgent.getPolicy`, but with all the Q-values computed at once.
+        """
+
+        qValues = self.getQValues(state)
+        if (len(qValues) == 0):
+            return None
+
+        return max([(qValue, action) for (action, qValue) in qValues.items()])[1]
 
     def update(self, state, action, nextState, reward):
         """Should update your weights based on transition."""
@@ -228,10 +309,21 @@ class ApproximateQAgent(PacmanQAgent):
         vValue = self.getValue(nextState)
         # q(s, a)
         sQValue = self.getQValue(state, action)
-        features = self.featExtractor.getFeatures(self, state, action)
 
-        for f in features.keys():
-            # correction = (R(s, a) + gamma * V'(s)) - Q(s, a)
-            correction = (reward + gamma * vValue) - sQValue
-            # wi = wi + alpha[correction] fi(s, a)
-            self.weights[f] = self.weights[f] + alpha * correction * features[f]
\ No newline at end of file
+        # correction = (R(s, a) + gamma * V'(s)) - Q(s, a)
+        correction = (reward + gamma * vValue) - sQValue
+
+        # w = w + alpha[correction] f(s, a)
+        vector = self.getFeatureVectors(state).get(action)
+        if (vector is None):
+            vector = self.featExtractor.getFeatureVector(state, action)
+
+        vector.addTo(self.weights, alpha * correction)
+
+    def _addWeights(self):
+        """
+        Give every new feature (in the feature index) a weight.
+        """
+
+        if (len(self.weights) < len(self.featureIndex)):
+            self.weights.extend([INITIAL_WEIGHT] * (len(self.featureIndex) - len(self.weights)))
@@ -4,6 +4,7 @@ In this file, you will implement generic search algorithms which are called by P
 import pacai.util.stack as util1
 import pacai.util.queue as util2
 import pacai.util.priorityQueue as util3
+from pacai.core.search.graph import graphSearch
 
 def depthFirstSearch(problem):
     """
@@ -25,79 +26,18 @@ def depthFirstSearch(problem):
     """
 
     # *** Your Code Here ***
-    # initialize the explored set to be empty
-    explored = set()
-    # list of actions to take
-    # initialize empty
-    actions = []
-    # initialize the fringe with the start state of problem
-    start = problem.startingState()
-    fringe = util1.Stack()
-    fringe.push((start, actions, 0))
-    # loop
-    while not fringe.isEmpty():
-        # choose a leaf node and remove it from the frontier
-        # actions list is what is in fringe already
-        node, actions, dist = fringe.pop()
-        # if node is not already explored
-        if node not in explored:
-            # if the node contains a goal state then return the corresponding solution
-            if problem.isGoal(node):
-                # return list of actions
-                return actions
-            # add the node to the explored set
-            explored.add(node)
-            # expand the chosen node, adding the resulting nodes to the frontier
-            successors = problem.successorStates(node)
-            for n, a, d in successors:
-                # only if not in the frontier or explored set
-                if n not in explored:
-                    # add a to the an actions list
-                    # ask how they did the actions and new actiosn part
-                    newActions = actions + [a]
-                    fringe.push((n, newActions, d))
-    # return failure when the fringe is empty
-    return exit(1)
-    
+    # the fringe decides the order: a stack (LIFO) makes it DFS
+    # nodes only point to their parents, the actions are built once the goal is found
+    return _search(problem, util1.Stack())
+
 def breadthFirstSearch(problem):
     """
     Search the shallowest nodes in the search tree first. [p 81]
     """
 
     # *** Your Code Here ***
-    # initialize the explored set to be empty
-    explored = set()
-    # list of actions to take
-    # initialize empty
-    actions = []
-    # initialize the fringe with the start state of problem
-    start = problem.startingState()
     # changing it to a queue makes it BFS (FIFO)
-    fringe = util2.Queue()
-    fringe.push((start, actions, 0))
-    # loop
-    while not fringe.isEmpty():
-        # choose a leaf node and remove it from the frontier
-        # actions list is what is in fringe already
-        node, actions, dist = fringe.pop()
-        # if node is not already explored
-        if node not in explored:
-            # if the node contains a goal state then return the corresponding solution
-            if problem.isGoal(node):
-                # return list of actions
-                return actions
-            # add the node to the explored set
-            explored.add(node)
-            # expand the chosen node, adding the resulting nodes to the frontier
-            successors = problem.successorStates(node)
-            for n, a, d in successors:
-                # only if not in the frontier or explored set
-                if n not in explored:
-                    # add a to the an actions list
-                    newActions = actions + [a]
-                    fringe.push((n, newActions, d))
-    # return failure when the fringe is empty
-    return exit(1)
+    return _search(problem, util2.Queue())
 
 def uniformCostSearch(problem):
     """
@@ -105,42 +45,9 @@ def uniformCostSearch(problem):
     """
 
     # *** Your Code Here ***
-    # initialize the explored set to be empty
-    explored = set()
-    # list of actions to take
-    # initialize empty
-    actions = []
-    # initialize the fringe with the start state of problem
-    start = problem.startingState()
     # priority is by total dist/cost
-    fringe = util3.PriorityQueue()
-    fringe.push((start, actions, 0), 0)
-    # loop
-    while not fringe.isEmpty():
-        # choose a leaf node and remove it from the frontier
-        # actions list is what is in fringe already
-        node, actions, dist = fringe.pop()
-        # if node is not already explored
-        if node not in explored:
-            # if the node contains a goal state then return the corresponding solution
-            if problem.isGoal(node):
-                # return list of actions
-                return actions
-            # add the node to the explored set
-            explored.add(node)
-            # expand the chosen node, adding the resulting nodes to the frontier
-            successors = problem.successorStates(node)
-            for n, a, d in successors:
-                # only if not in the frontier or explored set
-                if n not in explored:
-                    # add a to the an actions list
-                    newActions = actions + [a]
-                    newDist = dist + d
-                    # priority is the total dist/cost
-                    fringe.push((n, newActions, newDist), newDist)
-    # return failure when the fringe is empty
-    return exit(1)
-    # 619
+    # an indexed queue holds each state once (a cheaper path lowers its priority)
+    return _search(problem, util3.IndexedPriorityQueue(), lambda state, dist: dist)
 
 def aStarSearch(problem, heuristic):
     """
@@ -148,41 +55,16 @@ def aStarSearch(problem, heuristic):
     """
 
     # *** Your Code Here ***
-    # initialize the explored set to be empty
-    explored = set()
-    # list of actions to take
-    # initialize empty
-    actions = []
-    # initialize the fringe with the start state of problem
-    start = problem.startingState()
-    # priority is by total dist/cost
-    fringe = util3.PriorityQueue()
-    fringe.push((start, actions, 0), 0)
-    # loop
-    while not fringe.isEmpty():
-        # choose a leaf node and remove it from the frontier
-        # actions list is what is in fringe already
-        # chooses the lowest-cost node in frontier
-        node, actions, dist = fringe.pop()
-        # if node is not already explored
-        if node not in explored:
-            # if the node contains a goal state then return the corresponding solution
-            if problem.isGoal(node):
-                # return list of actions
-                return actions
-            # add the node to the explored set
-            explored.add(node)
-            # expand the chosen node, adding the resulting nodes to the frontier
-            successors = problem.successorStates(node)
-            for n, a, d in successors:
-                # only if not in the frontier or explored set
-                if n not in explored:
-                    # add a to the an actions list
-                    newActions = actions + [a]
-                    newDist = dist + d
-                    # priority is the total dist/cost + heuristic function result passing
-                    # node state and problem
-                    fringe.push((n, newActions, newDist), heuristic(n, problem) + newDist)
+    # priority is the total dist/cost + heuristic function result passing
+    # node state and problem
+    return _search(problem, util3.IndexedPriorityQueue(),
+            lambda state, dist: heuristic(state, problem) + dist)
+
+def _search(problem, fringe, priorityFunction = None):
+    actions = graphSearch(problem, fringe, priorityFunction)
+
     # return failure when the fringe is empty
-    return exit(1)
-    # 538 nodes
+    if (actions is None):
+        return exit(1)
+
+    return actions
@@ -8,12 +8,12 @@ Good luck and happy searching!
 import logging
 
 from pacai.core.actions import Actions
-# from pacai.core.search import heuristic
+from pacai.core.search import heuristic
+from pacai.core.search.oracle import getDistanceOracle
 from pacai.core.search.position import PositionSearchProblem
 from pacai.core.search.problem import SearchProblem
 from pacai.agents.base import BaseAgent
 from pacai.agents.search.base import SearchAgent
-from pacai.core.directions import Directions
 import pacai.core.distance as dist
 from pacai.student import search
 
@@ -60,6 +60,8 @@ class CornersProblem(SearchProblem):
         super().__init__()
 
         self.walls = startingGameState.getWalls()
+        self.actionTable = startingGameState.getActionTable()
+        self.distanceOracle = getDistanceOracle(self.actionTable)
         self.startingPosition = startingGameState.getPacmanPosition()
         top = self.walls.getHeight() - 2
         right = self.walls.getWidth() - 2
@@ -92,25 +94,20 @@ class CornersProblem(SearchProblem):
 
         successors = []
 
-        for action in Directions.CARDINAL:
-            x, y = currentPosition
-            dx, dy = Actions.directionToVector(action)
-            nextx, nexty = int(x + dx), int(y + dy)
-            hitsWall = self.walls[nextx][nexty]
+        # The moves that do not hit a wall are precomputed.
+        for (action, (nextx, nexty)) in self.actionTable.getCardinalMoves(currentPosition):
+            # Construct the successor.
+            # copy
+            cornersVisted = tuple(visitedCorners)
+            # see if next x, y is a corner
+            if (nextx, nexty) in self.corners:
+                # see if not already visited
+                if (nextx, nexty) not in cornersVisted:
+                    cornersVisted += ((nextx, nexty),)
+            successorStates = ((nextx, nexty), cornersVisted)
+            # successor states actions cost
+            successors.append((successorStates, action, 1))
 
-            if (not hitsWall):
-                # Construct the successor.
-                # copy
-                cornersVisted = tuple(visitedCorners)
-                # see if next x, y is a corner
-                if (nextx, nexty) in self.corners:
-                    # see if not already visited
-                    if (nextx, nexty) not in cornersVisted:
-                        cornersVisted += ((nextx, nexty),)
-                successorStates = ((nextx, nexty), cornersVisted)
-                # successor states actions cost
-                successors.append((successorStates, action, 1))
-                
         self._numExpanded += 1
         return successors
 
@@ -206,21 +203,11 @@ def foodHeuristic(state, problem):
     Subsequent calls to this heuristic can access problem.heuristicInfo['wallCount'].
     """
 
-    position, foodGrid = state
-
     # *** Your Code Here ***
-    food = foodGrid.asList()
-    # check if there is no more food
-    if len(food) == 0:
-        return 0
-    # find the max dist from the position to a food piece
-    m = -999
-    for f in food:
-        # use maze dist not manhattan
-        d = dist.maze(position, f, problem.startingGameState)
-        if d > m:
-            m = d
-    return m
+    # maze dist to the closest food + minimum spanning tree of the rest
+    # (at least as big as the max dist to any food, and still consistent)
+    # works for both the (position, grid) and the packed states
+    return heuristic.foodSpanningTree(state, problem)
     # return heuristic.null(state, problem)  # Default to the null heuristic.
 
 class ClosestDotSearchAgent(SearchAgent):
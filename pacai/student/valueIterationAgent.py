@@ -1,4 +1,8 @@
 from pacai.agents.learning.value import ValueEstimationAgent
+from pacai.core.compiledMdp import CompiledMDP
+from pacai.core.compiledMdp import DEFAULT_TOLERANCE
+
+SOLVERS = ['synchronous', 'gauss-seidel', 'prioritized']
 
 class ValueIterationAgent(ValueEstimationAgent):
     """
@@ -28,16 +32,84 @@ class ValueIterationAgent(ValueEstimationAgent):
     You may break ties any way you see fit.
     Note that if there are no legal actions, which is the case at the terminal state,
     you should return None.
+
+    The values can be computed by two backends (`backend`):
+    'compiled' (the default) compiles the MDP into a `pacai.core.compiledMdp.CompiledMDP` first,
+    and 'python' calls into the MDP for every backup.
+    Both give the same values.
+    If `tolerance` is given, value iteration stops early once no value changes by more than it.
+
+    The compiled backend can also use a different solver (`solver`):
+    'synchronous' (the default) is plain value iteration,
+    'gauss-seidel' updates the values in place
+    (see `pacai.core.compiledMdp.CompiledMDP.gaussSeidel`),
+    and 'prioritized' uses prioritized sweeping
+    (see `pacai.core.compiledMdp.CompiledMDP.prioritizedSweeping`),
+    which runs until every residual is within `tolerance` (or a small default),
+    but at most as many backups as `iters` full sweeps would do.
+
+    After running, `iterationsDone` holds the number of sweeps over the states
+    and `backupsDone` holds the number of single-state backups.
+    Prioritized sweeping does not sweep, so it only counts backups.
     """
 
-    def __init__(self, index, mdp, discountRate = 0.9, iters = 100, **kwargs):
+    def __init__(self, index, mdp, discountRate = 0.9, iters = 100, backend = 'compiled',
+            tolerance = None, solver = 'synchronous', **kwargs):
         super().__init__(index, **kwargs)
 
         self.mdp = mdp
         self.discountRate = discountRate
         self.iters = iters
+        self.tolerance = tolerance
+        self.solver = solver
         self.values = {}  # A dictionary which holds the q-values for each state.
+        self.iterationsDone = 0
+        self.backupsDone = 0
+
+        # {(state, action): Q-value}, only filled by the compiled backend.
+        self.qValues = {}
+
+        if (solver not in SOLVERS):
+            raise ValueError("Unknown value iteration solver: '%s'." % (solver))
+
+        if (backend == 'compiled'):
+            self._runCompiled()
+        elif (backend == 'python'):
+            if (solver != 'synchronous'):
+                raise ValueError("The python backend only has the synchronous solver, not '%s'." %
+                        (solver))
+
+            self._runPython()
+        else:
+            raise ValueError("Unknown value iteration backend: '%s'." % (backend))
+
+    def _runCompiled(self):
+        """
+        Run value iteration on a `pacai.core.compiledMdp.CompiledMDP`.
+        This gives the same values as `ValueIterationAgent._runPython`, just much faster.
+        """
+
+        compiled = CompiledMDP(self.mdp)
+
+        if (self.solver == 'gauss-seidel'):
+            values, self.iterationsDone = compiled.gaussSeidel(self.discountRate, self.iters,
+                    self.tolerance)
+        elif (self.solver == 'prioritized'):
+            tolerance = self.tolerance
+            if (tolerance is None):
+                tolerance = DEFAULT_TOLERANCE
+
+            maxBackups = self.iters * compiled.getNumStates()
+            values, _ = compiled.prioritizedSweeping(self.discountRate, tolerance, maxBackups)
+        else:
+            values, self.iterationsDone = compiled.valueIteration(self.discountRate, self.iters,
+                    self.tolerance)
 
+        self.backupsDone = compiled.getBackupCount()
+        self.values = compiled.getValueDict(values)
+        self.qValues = compiled.getQValues(values, self.discountRate)
+
+    def _runPython(self):
         # Compute the values here.
         # Vi+1(s) = max action of sum(t * [r + discount*Vi])
         for i in range(self.iters):
@@ -50,8 +122,15 @@ class ValueIterationAgent(ValueEstimationAgent):
                     # Q for best action
                     nextiValues[state] = self.getQValue(state, bestAction)
             # "throw out" old vi values
+            change = max([abs(value - self.getValue(state))
+                    for (state, value) in nextiValues.items()], default = 0.0)
             self.values = nextiValues
-            
+            self.iterationsDone += 1
+            self.backupsDone += len(nextiValues)
+
+            if (self.tolerance is not None and change <= self.tolerance):
+                break
+
     def getValue(self, state):
         """
         Return the value of the state (computed in __init__).
@@ -87,6 +166,10 @@ class ValueIterationAgent(ValueEstimationAgent):
         """The q-value of the state action pair (after the indicated number of value iteration
           passes). Note that value iteration does not necessarily create this quantity,
     and you may have to derive it on the fly."""
+        qValue = self.qValues.get((state, action))
+        if (qValue is not None):
+            return qValue
+
         q = 0
         for tState, tProb in self.mdp.getTransitionStatesAndProbs(state, action):
             q += tProb * (self.mdp.getReward(state, action, tState) + (self.discountRate
@@ -8,6 +8,11 @@ class AbstractNullView(AbstractView):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
+    # Override
+    def isHeadless(self):
+        # We still need to see the game if we are making a gif.
+        return not self._saveFrames
+
     # Override
     def _createFrame(self, state):
         # Only create frames if we are creating a gif and this is not a skip frame.
@@ -63,6 +63,15 @@ class AbstractView(abc.ABC):
 
         raise NotImplementedError("This view does not support keyboards.")
 
+    def isHeadless(self):
+        """
+        Check if this view has no output at all (not even a gif).
+        A game with a headless view will skip calling the view during play
+        (see `pacai.core.game.Game.run`).
+        """
+
+        return False
+
     def initialize(self, state):
         """
         Perform an initial drawing of the view.
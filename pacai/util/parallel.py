@@ -0,0 +1,61 @@
+"""
+Helpers for playing batches of games across a pool of worker processes.
+"""
+
+import multiprocessing
+import pickle
+import random
+
+MAX_SEED = 2 ** 32
+
+# The per-process state of a worker (see _initWorker()).
+_workerLoadFunction = None
+_workerLoadArgs = None
+_workerPlayFunction = None
+
+def deriveSeeds(seed, count):
+    """
+    Derive a list of seeds (one for each game) from a single seed.
+    Each game gets its own seed (rather than each worker),
+    and `runParallel` loads fresh agents for every game,
+    so that the results do not depend on the number of workers or on how games are scheduled.
+    """
+
+    rng = random.Random(seed)
+    return [rng.randrange(MAX_SEED) for i in range(count)]
+
+def runParallel(loadFunction, loadArgs, playFunction, seeds, numWorkers):
+    """
+    Play one game for each seed across a pool of `numWorkers` processes.
+
+    Before every game, the worker calls `loadFunction` on a fresh copy of `loadArgs`,
+    and passes the result (e.g. the agents and rules) to `playFunction`.
+    So no game sees the state that agents built up in an earlier game on the same worker
+    (e.g. what a learning agent learned).
+    The global random state is seeded with the game's seed right before the game is loaded.
+    All the functions must be module-level so they can be sent to the workers.
+
+    Returns the result of each `playFunction` call, in the same order as `seeds`.
+    """
+
+    numWorkers = max(1, min(numWorkers, len(seeds)))
+
+    with multiprocessing.Pool(numWorkers, _initWorker,
+            (loadFunction, loadArgs, playFunction)) as pool:
+        return pool.map(_playGame, seeds, chunksize = 1)
+
+def _initWorker(loadFunction, loadArgs, playFunction):
+    global _workerLoadFunction
+    global _workerLoadArgs
+    global _workerPlayFunction
+
+    # Kept pickled, so every game can unpickle its own copy.
+    _workerLoadFunction = loadFunction
+    _workerLoadArgs = pickle.dumps(loadArgs)
+    _workerPlayFunction = playFunction
+
+def _playGame(seed):
+    random.seed(seed)
+
+    context = _workerLoadFunction(*pickle.loads(_workerLoadArgs))
+    return _workerPlayFunction(context)
@@ -3,6 +3,10 @@ Priority queue containers.
 """
 
 import heapq
+import itertools
+
+# Marks a heap entry whose item was removed or re-prioritized (see IndexedPriorityQueue).
+_REMOVED = object()
 
 class PriorityQueue(object):
     """
@@ -13,6 +17,8 @@ class PriorityQueue(object):
 
     Note that this PriorityQueue does not allow you to change the priority of an item.
     However, you may insert the same item multiple times with different priorities.
+    Items with the same priority are compared to each other to break ties.
+    See `IndexedPriorityQueue` for a queue that can change priorities.
     """
 
     def __init__(self):
@@ -56,3 +62,108 @@ class PriorityQueueWithFunction(PriorityQueue):
 
     def __len__(self):
         return len(self.heap)
+
+class IndexedPriorityQueue(object):
+    """
+    A priority queue that holds each (hashable) item at most once,
+    and can change the priority of an item that is already in the queue.
+    Items with the same priority are popped in the order they were pushed
+    (so items never need to be comparable).
+
+    Changes of priority and removals are lazy:
+    the old heap entry is marked as removed (and skipped when it reaches the top of the heap)
+    instead of being searched for, so every operation is O(log n).
+    """
+
+    def __init__(self):
+        self.heap = []
+
+        # {item: [priority, count, item], ...} for every item still in the queue.
+        self._entries = {}
+
+        # Breaks priority ties in push order.
+        self._counter = itertools.count()
+
+    def decreaseKey(self, item, priority):
+        """
+        Lower the priority of an item (or push it if it is not in the queue).
+        Returns True if the queue changed,
+        i.e. if the item was not in the queue or its priority was higher than `priority`.
+        """
+
+        # Only `<` is used on priorities (like heapq), so any orderable priority works.
+        entry = self._entries.get(item)
+        if (entry is not None and not (priority < entry[0])):
+            return False
+
+        self.push(item, priority)
+        return True
+
+    def getPriority(self, item):
+        """
+        Get the priority of an item in the queue, or None.
+        """
+
+        entry = self._entries.get(item)
+        if (entry is None):
+            return None
+
+        return entry[0]
+
+    def isEmpty(self):
+        return len(self._entries) == 0
+
+    def pop(self):
+        item, priority = self.popWithPriority()
+        return item
+
+    def popWithPriority(self):
+        """
+        Remove and return the (item, priority) with the lowest priority.
+        """
+
+        heap = self.heap
+
+        while (len(heap) > 0):
+            priority, count, item = heapq.heappop(heap)
+            if (item is not _REMOVED):
+                del self._entries[item]
+                return item, priority
+
+        raise IndexError('pop from an empty priority queue')
+
+    def push(self, item, priority):
+        """
+        Add an item to the queue.
+        If the item is already in the queue, then its priority is replaced (see `update`).
+        """
+
+        oldEntry = self._entries.get(item)
+        if (oldEntry is not None):
+            oldEntry[2] = _REMOVED
+
+        entry = [priority, next(self._counter), item]
+        self._entries[item] = entry
+        heapq.heappush(self.heap, entry)
+
+    def remove(self, item):
+        """
+        Remove an item from the queue.
+        Raises a KeyError if the item is not in the queue.
+        """
+
+        entry = self._entries.pop(item)
+        entry[2] = _REMOVED
+
+    def update(self, item, priority):
+        """
+        Set the priority of an item, pushing it if it is not already in the queue.
+        """
+
+        self.push(item, priority)
+
+    def __contains__(self, item):
+        return item in self._entries
+
+    def __len__(self):
+        return len(self._entries)
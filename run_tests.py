@@ -3,10 +3,15 @@
 import os
 import re
 import sys
+import tempfile
 import unittest
 
 TEST_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'tests')
 
+# Keep the tables that tests compute out of the user's distance cache
+# (see pacai.core.distanceCalculator.getCacheDir()).
+CACHE_DIR_ENV = 'PACAI_CACHE_DIR'
+
 # Return a list of unittest.TestCase
 def _collect_tests(suite, testCases = []):
     if (isinstance(suite, unittest.TestCase)):
@@ -41,7 +46,11 @@ def main(pattern = None):
         else:
             print("Skipping %s because of match pattern." % (testCase.id()))
 
-    if (not runner.run(tests).wasSuccessful() or fail):
+    with tempfile.TemporaryDirectory() as cacheDir:
+        os.environ[CACHE_DIR_ENV] = cacheDir
+        successful = runner.run(tests).wasSuccessful()
+
+    if (not successful or fail):
         sys.exit(1)
 
 def _load_args(args):
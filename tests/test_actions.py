@@ -0,0 +1,48 @@
+import glob
+import os
+import unittest
+
+from pacai.core.actions import Actions
+from pacai.core.directions import Directions
+from pacai.core.layout import DEFAULT_LAYOUT_DIR
+from pacai.core.layout import getLayout
+
+"""
+Test that the precomputed action tables agree with `Actions`.
+"""
+class ActionTableTest(unittest.TestCase):
+    def test_matches_actions(self):
+        for path in sorted(glob.glob(os.path.join(DEFAULT_LAYOUT_DIR, '*.lay'))):
+            layout = getLayout(os.path.basename(path))
+            walls = layout.walls
+            table = layout.getActionTable()
+
+            for x in range(1, layout.width - 1):
+                for y in range(1, layout.height - 1):
+                    for position in [(x, y), (float(x), float(y)), (x + 0.5, y)]:
+                        self.assertEqual(
+                                Actions.getPossibleActions(position, Directions.EAST, walls),
+                                table.getPossibleActions(position, Directions.EAST))
+
+                        self.assertEqual(Actions.getLegalNeighbors(position, walls),
+                                table.getLegalNeighbors(position))
+
+                    moves = []
+                    for action in Directions.CARDINAL:
+                        nextX, nextY = Actions.getSuccessor((x, y), action)
+                        nextPosition = (int(nextX), int(nextY))
+                        if (not walls[nextPosition[0]][nextPosition[1]]):
+                            moves.append((action, nextPosition))
+
+                    self.assertEqual(tuple(moves), table.getCardinalMoves((x, y)))
+
+    def test_results_are_copies(self):
+        table = getLayout('tinyMaze').getActionTable()
+
+        actions = table.getPossibleActions((1, 1), Directions.STOP)
+        actions.clear()
+
+        self.assertNotEqual([], table.getPossibleActions((1, 1), Directions.STOP))
+
+if __name__ == '__main__':
+    unittest.main()
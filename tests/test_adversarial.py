@@ -0,0 +1,86 @@
+import random
+import unittest
+
+from pacai.agents.search import adversarial
+from pacai.agents.search.adversarial import AdversarialSearch
+from pacai.agents.search.adversarial import TranspositionTable
+from pacai.bin.pacman import PacmanGameState
+from pacai.core.directions import Directions
+from pacai.core.eval import score
+from pacai.core.layout import getLayout
+
+DEPTH = 2
+
+"""
+Test the adversarial search core against a plain minimax.
+"""
+class AdversarialSearchTest(unittest.TestCase):
+    def test_optimal_actions(self):
+        for state in self._getStates():
+            expected = {action: self._minimax(state.generateSuccessor(0, action), 1, DEPTH * 3 - 1)
+                    for action in self._getActions(state, 0)}
+            bestValue = max(expected.values())
+
+            for searchType in [adversarial.MINIMAX, adversarial.ALPHA_BETA]:
+                for ttSize in [0, 1000]:
+                    search = AdversarialSearch(score, searchType = searchType, maxDepth = DEPTH,
+                            ttSize = ttSize)
+
+                    action = search.getAction(state)
+                    self.assertEqual(bestValue, expected[action])
+
+    def test_transposition_table(self):
+        table = TranspositionTable(2)
+
+        table.put('a', 1, 10, adversarial.BOUND_EXACT, Directions.NORTH)
+        table.put('b', 1, 20, adversarial.BOUND_EXACT, Directions.NORTH)
+
+        # Shallower searches do not replace deeper ones.
+        table.put('a', 0, 30, adversarial.BOUND_EXACT, Directions.NORTH)
+        self.assertEqual(10, table.get('a')[1])
+
+        # The oldest entry is evicted.
+        table.put('c', 1, 40, adversarial.BOUND_EXACT, Directions.NORTH)
+        self.assertEqual(2, len(table))
+        self.assertIsNone(table.get('a'))
+        self.assertEqual(20, table.get('b')[1])
+
+    def _getStates(self):
+        rng = random.Random(7)
+        state = PacmanGameState(getLayout('smallClassic', maxGhosts = 2))
+        states = []
+
+        for i in range(8):
+            for agentIndex in range(state.getNumAgents()):
+                if (state.isOver()):
+                    return states
+
+                action = rng.choice(state.getLegalActions(agentIndex))
+                state = state.generateSuccessor(agentIndex, action)
+
+            states.append(state)
+
+        return states
+
+    def _getActions(self, state, agentIndex):
+        actions = state.getLegalActions(agentIndex)
+        if (len(actions) > 1 and Directions.STOP in actions):
+            actions.remove(Directions.STOP)
+
+        return actions
+
+    def _minimax(self, state, agentIndex, remaining):
+        if (state.isOver() or remaining == 0):
+            return score(state)
+
+        nextAgent = (agentIndex + 1) % state.getNumAgents()
+        values = [self._minimax(state.generateSuccessor(agentIndex, action), nextAgent,
+                remaining - 1) for action in self._getActions(state, agentIndex)]
+
+        if (agentIndex == 0):
+            return max(values)
+
+        return min(values)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+
+from pacai.bench import runner
+
+"""
+Test the benchmark runner (with the cheapest benchmarks).
+"""
+class BenchTest(unittest.TestCase):
+    def test_run(self):
+        results = runner.runBenchmarks(pattern = r'^grid\.count\.', repeat = 1)
+
+        self.assertEqual({'grid.count.BitGrid', 'grid.count.Grid'}, set(results['results']))
+        self.assertIn('python', results['metadata'])
+
+        for result in results['results'].values():
+            self.assertEqual(1, result['repeat'])
+            self.assertGreater(result['operationsPerSecond'], 0)
+
+    def test_compare(self):
+        baseline = {'results': {
+            'a': {'min': 1.0},
+            'b': {'min': 1.0},
+            'c': {'min': 1.0},
+            'd': {'min': 1.0},
+        }}
+
+        current = {'results': {
+            'a': {'min': 1.05},
+            'b': {'min': 1.5},
+            'c': {'min': 0.5},
+            'e': {'min': 1.0},
+        }}
+
+        comparisons = runner.compareResults(baseline, current, threshold = 0.1)
+        statuses = {comparison[0]: comparison[4] for comparison in comparisons}
+
+        self.assertEqual({'a': 'same', 'b': 'regression', 'c': 'improvement'}, statuses)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,36 @@
+import json
+import os
+import tempfile
 import unittest
 
+from pacai.agents.base import BaseAgent
+from pacai.agents.greedy import GreedyAgent
 from pacai.bin import capture
 from pacai.bin import gridworld
 from pacai.bin import pacman
+from pacai.core.directions import Directions
+from pacai.core.gamestate import AbstractGameState
+from pacai.core.layout import getLayout
+from pacai.ui.pacman.null import PacmanNullView
+
+class GameCountingAgent(GreedyAgent):
+    """
+    A greedy agent that only moves in the first game it plays (and stops in the others).
+    """
+
+    def __init__(self, index, **kwargs):
+        super().__init__(index, **kwargs)
+        self.gamesPlayed = 0
+
+    def registerInitialState(self, state):
+        super().registerInitialState(state)
+        self.gamesPlayed += 1
+
+    def getAction(self, state):
+        if (self.gamesPlayed > 1):
+            return Directions.STOP
+
+        return super().getAction(state)
 
 """
 This is a test class to assess the executables of this project.
@@ -45,6 +73,12 @@ class BinTest(unittest.TestCase):
         # Run game of gridworld with default agents.
         gridworld.main(['--null-graphics'])
 
+        for solver in ['synchronous', 'gauss-seidel', 'prioritized']:
+            gridworld.main(['--null-graphics', '-a', 'value', '-k', '1', '--solver', solver])
+
+        gridworld.main(['--null-graphics', '-a', 'value', '-k', '0', '-i', '3', '-v',
+                '--solver', 'prioritized'])
+
     def test_gridworld_help(self):
         # Show all gridworld arguments.
         try:
@@ -60,6 +94,61 @@ class BinTest(unittest.TestCase):
         # Run game of pacman with seed value entry.
         pacman.main(['-p', 'GreedyAgent', '--null-graphics', '--seed', '1234'])
 
+    def test_parallel_runs(self):
+        # Parallel results should not depend on the number of workers.
+        baseArgs = ['-p', 'GreedyAgent', '-l', 'smallClassic', '--null-graphics', '--seed', '1234',
+                '-n', '3']
+
+        games = pacman.main(baseArgs + ['--workers', '2'])
+        otherGames = pacman.main(baseArgs + ['--workers', '3'])
+
+        self.assertEqual(3, len(games))
+        self.assertEqual([game.state.getScore() for game in games],
+                [game.state.getScore() for game in otherGames])
+
+        capture.main(['--null-graphics', '--seed', '1234', '-n', '2', '--workers', '2'])
+
+    def test_parallel_stateful_agents(self):
+        # Every parallel game gets fresh agents, even when a worker plays more than one game.
+        layout = getLayout('smallClassic')
+
+        scores = []
+        for workers in [2, 4]:
+            games = pacman.runGames(layout, GameCountingAgent(0),
+                    [BaseAgent.loadAgent('RandomGhost', 1)], PacmanNullView(), 4,
+                    workers = workers, seed = 1234)
+            scores.append([game.state.getScore() for game in games])
+
+        self.assertEqual(scores[0], scores[1])
+
+    def test_profile(self):
+        with tempfile.TemporaryDirectory() as tempDir:
+            path = os.path.join(tempDir, 'profile.json')
+            pacman.main(['-p', 'GreedyAgent', '--null-graphics', '--seed', '1234', '-n', '2',
+                    '--profile', path])
+
+            with open(path, 'r') as file:
+                report = json.load(file)
+
+        self.assertEqual(2, report['games'])
+        self.assertIn('p99', report['agents']['0']['move'])
+        self.assertEqual(report['generateSuccessor']['count'], report['rules.process']['count'])
+
+    def test_count_operations(self):
+        games = pacman.runGames(getLayout('smallClassic'), BaseAgent.loadAgent('GreedyAgent', 0),
+                [BaseAgent.loadAgent('RandomGhost', 1)], PacmanNullView(), 1,
+                countOperations = True)
+
+        counts = games[0].getStateCounts().getReport()
+        self.assertEqual('GreedyAgent', counts['0']['agent'])
+
+        # Greedy pacman generates a successor for every legal action, ghosts only look at actions.
+        self.assertGreater(counts['0']['totals']['generateSuccessor'], counts['0']['turns'])
+        self.assertEqual(0, counts['1']['totals']['generateSuccessor'])
+        self.assertEqual(counts['1']['turns'], counts['1']['totals']['getLegalActions'])
+
+        self.assertIsNone(AbstractGameState.getCounters())
+
     def test_capture_seeded_maze_generations(self):
         # Run game of capture with random generated map without seed value.
         capture.main(['--null-graphics', '--layout', 'RANDOM']) 
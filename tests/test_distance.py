@@ -0,0 +1,169 @@
+import gc
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+from pacai.bin.pacman import PacmanGameState
+from pacai.core import distance
+from pacai.core import distanceCalculator
+from pacai.core.distance import manhattan
+from pacai.core.distanceCalculator import Distancer
+from pacai.core.layout import Layout
+from pacai.core.layout import getLayout
+from pacai.core.search import gridSearch
+
+TEST_LAYOUT = [
+    '%%%%%%%',
+    '%P..%.%',
+    '%.%.%.%',
+    '%...%.%',
+    '%%%%%%%',
+]
+
+"""
+Test the maze distance tables.
+"""
+class DistancerTest(unittest.TestCase):
+    def test_distances(self):
+        distancer = Distancer(Layout(TEST_LAYOUT))
+        distancer.getMazeDistances()
+
+        self.assertEqual(0, distancer.getDistance((1, 1), (1, 1)))
+        self.assertEqual(2, distancer.getDistance((1, 1), (3, 1)))
+        self.assertEqual(4, distancer.getDistance((1, 1), (3, 3)))
+        self.assertEqual(4, distancer.getDistance((3, 3), (1, 1)))
+        self.assertEqual(sys.maxsize, distancer.getDistance((1, 1), (5, 1)))
+
+        # Fractional positions snap to the closest cells.
+        self.assertEqual(2.5, distancer.getDistance((1, 1.5), (3, 1)))
+
+        with self.assertRaises(Exception):
+            distancer.getDistance((1, 1), (2, 2))
+
+    def test_symmetric(self):
+        layout = getLayout('tinyCapture')
+        distancer = Distancer(layout)
+        distancer.getMazeDistances()
+
+        cells = layout.walls.asList(False)
+        for pos1 in cells:
+            for pos2 in cells:
+                distance = distancer.getDistance(pos1, pos2)
+
+                self.assertEqual(distance, distancer.getDistance(pos2, pos1))
+                self.assertGreaterEqual(distance, manhattan(pos1, pos2))
+
+    def test_disk_cache(self):
+        layout = getLayout('tinyCapture')
+        cells = layout.walls.asList(False)
+        key = distanceCalculator.getWallsKey(layout.walls)
+        expected = distanceCalculator.computeDistances(layout)
+
+        oldCacheDir = os.environ.get(distanceCalculator.CACHE_DIR_ENV)
+
+        with tempfile.TemporaryDirectory() as cacheDir:
+            os.environ[distanceCalculator.CACHE_DIR_ENV] = cacheDir
+
+            try:
+                self.assertIsNone(distanceCalculator.loadCachedTable(key))
+                distanceCalculator.saveCachedTable(key, expected)
+
+                table = distanceCalculator.loadCachedTable(key)
+                self.assertIsNotNone(table)
+
+                for pos1 in cells:
+                    for pos2 in cells:
+                        self.assertEqual(expected[(pos1, pos2)], table[(pos1, pos2)])
+
+                # Free the mapping before the directory is removed.
+                table = None
+
+                # Tables are removed least recently used first, once the cache is too big.
+                otherKey = distanceCalculator.getWallsKey(getLayout('mediumMaze').walls)
+                distanceCalculator.saveCachedTable(otherKey, expected)
+
+                path = os.path.join(distanceCalculator.getCacheDir(), key + '.bin')
+                otherPath = os.path.join(distanceCalculator.getCacheDir(), otherKey + '.bin')
+                os.utime(path, (0, 0))
+
+                self.assertEqual(0, distanceCalculator.pruneCache(
+                        distanceCalculator.getCacheDir(), 2 * os.path.getsize(path)))
+                self.assertEqual(1, distanceCalculator.pruneCache(
+                        distanceCalculator.getCacheDir(), os.path.getsize(path)))
+
+                self.assertFalse(os.path.exists(path))
+                self.assertTrue(os.path.exists(otherPath))
+            finally:
+                if (oldCacheDir is None):
+                    del os.environ[distanceCalculator.CACHE_DIR_ENV]
+                else:
+                    os.environ[distanceCalculator.CACHE_DIR_ENV] = oldCacheDir
+
+"""
+Test the point-to-point grid solvers against the full distance tables.
+"""
+class GridSearchTest(unittest.TestCase):
+    def test_shortest_paths(self):
+        rng = random.Random(16)
+
+        for layoutName in ['mediumMaze', 'openMaze', 'contoursMaze', 'tinyCapture']:
+            layout = getLayout(layoutName)
+            actionTable = layout.getActionTable()
+            expected = distanceCalculator.computeDistances(layout)
+            cells = layout.walls.asList(False)
+
+            for i in range(50):
+                start = rng.choice(cells)
+                goal = rng.choice(cells)
+
+                for solver in [gridSearch.bidirectionalPath, gridSearch.jumpPointPath]:
+                    path = solver(actionTable, start, goal)
+
+                    self.assertEqual(start, path[0])
+                    self.assertEqual(goal, path[-1])
+                    self.assertEqual(expected[(start, goal)], len(path) - 1)
+
+                    for (position, nextPosition) in zip(path, path[1:]):
+                        self.assertEqual(1, manhattan(position, nextPosition))
+                        self.assertFalse(layout.walls[nextPosition[0]][nextPosition[1]])
+
+    def test_no_path(self):
+        actionTable = Layout(TEST_LAYOUT).getActionTable()
+
+        for solver in [gridSearch.bidirectionalPath, gridSearch.jumpPointPath]:
+            self.assertIsNone(solver(actionTable, (1, 1), (5, 1)))
+            self.assertIsNone(solver(actionTable, (1, 1), (2, 2)))
+            self.assertEqual([(1, 1)], solver(actionTable, (1, 1), (1, 1)))
+
+    def test_open_layouts(self):
+        self.assertTrue(gridSearch.isOpenLayout(getLayout('openMaze').getActionTable()))
+        self.assertFalse(gridSearch.isOpenLayout(getLayout('mediumMaze').getActionTable()))
+
+    def test_maze(self):
+        state = PacmanGameState(Layout(TEST_LAYOUT))
+
+        self.assertEqual(0, distance.maze((1, 1), (1, 1), state))
+        self.assertEqual(4, distance.maze((1, 1), (3, 3), state))
+        self.assertEqual(4, distance.maze((3, 3), (1, 1), state))
+
+        with self.assertRaises(ValueError):
+            distance.maze((1, 1), (2, 2), state)
+
+        with self.assertRaises(ValueError):
+            distance.maze((1, 1), (5, 1), state)
+
+        # The cached distances go away with the layout.
+        actionTable = state.getActionTable()
+        self.assertEqual(2, len(distance._mazeCaches[actionTable]))
+        numCaches = len(distance._mazeCaches)
+
+        del state
+        del actionTable
+        gc.collect()
+
+        self.assertEqual(numCaches - 1, len(distance._mazeCaches))
+
+if __name__ == '__main__':
+    unittest.main()
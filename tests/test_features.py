@@ -0,0 +1,146 @@
+import random
+import unittest
+
+from pacai.bin.pacman import PacmanGameState
+from pacai.core.actions import Actions
+from pacai.core.featureExtractors import FeatureIndex
+from pacai.core.featureExtractors import FeatureVector
+from pacai.core.featureExtractors import IdentityExtractor
+from pacai.core.featureExtractors import SimpleExtractor
+from pacai.core.layout import getLayout
+from pacai.core.search import search
+from pacai.student.qlearningAgents import ApproximateQAgent
+from pacai.student.searchAgents import AnyFoodSearchProblem
+
+"""
+Test feature extractors and feature vectors.
+"""
+class FeatureTest(unittest.TestCase):
+
+    def test_feature_index(self):
+        featureIndex = FeatureIndex(['a', 'b'])
+        self.assertEqual(len(featureIndex), 2)
+        self.assertEqual(featureIndex.getIndex('b'), 1)
+        self.assertIsNone(featureIndex.getIndex('c'))
+
+        self.assertEqual(featureIndex.register('c'), 2)
+        self.assertEqual(featureIndex.register('a'), 0)
+        self.assertEqual(featureIndex.getNames(), ['a', 'b', 'c'])
+
+        vector = featureIndex.toVector({'c': 2.0, 'd': 3.0})
+        self.assertEqual(vector.indexes, (2, 3))
+        self.assertEqual(vector.toDict(featureIndex), {'c': 2.0, 'd': 3.0})
+
+    def test_feature_vector(self):
+        vector = FeatureVector((0, 2), (2.0, -1.0))
+        weights = [1.0, 5.0, 3.0]
+
+        self.assertEqual(vector.dot(weights), -1.0)
+        self.assertEqual(vector.getMaxIndex(), 2)
+
+        vector.addTo(weights, 0.5)
+        self.assertEqual(weights, [2.0, 5.0, 2.5])
+
+    def test_simple_features_match_search(self):
+        # The features should match the ones found by searching from every next position.
+        extractor = SimpleExtractor()
+        rng = random.Random(0)
+
+        state = PacmanGameState(getLayout('mediumClassic'))
+        for i in range(60):
+            if (state.isOver()):
+                break
+
+            for action in state.getLegalActions():
+                self.assertEqual(extractor.getFeatures(state, action),
+                        _searchFeatures(state, action))
+
+            for agentIndex in range(state.getNumAgents()):
+                if (state.isOver()):
+                    break
+
+                state = state.generateSuccessor(agentIndex,
+                        rng.choice(state.getLegalActions(agentIndex)))
+
+    def test_simple_vectors_match_features(self):
+        # The vectors should hold exactly the same values as the feature dicts.
+        extractor = SimpleExtractor()
+        rng = random.Random(0)
+
+        state = PacmanGameState(getLayout('smallClassic'))
+        for i in range(30):
+            if (state.isOver()):
+                break
+
+            actions = state.getLegalActions()
+            vectors = extractor.getFeatureVectors(state, actions)
+
+            for (action, vector) in zip(actions, vectors):
+                features = extractor.getFeatures(state, action)
+                self.assertEqual(vector.toDict(extractor.getFeatureIndex()), features)
+                self.assertEqual(list(vector.toDict(extractor.getFeatureIndex())), list(features))
+
+            for agentIndex in range(state.getNumAgents()):
+                if (state.isOver()):
+                    break
+
+                state = state.generateSuccessor(agentIndex,
+                        rng.choice(state.getLegalActions(agentIndex)))
+
+    def test_extractors_are_separate(self):
+        extractor1 = IdentityExtractor()
+        extractor2 = IdentityExtractor()
+
+        extractor1.getFeatureIndex().register('only-here')
+        self.assertIsNone(extractor2.getFeatureIndex().getIndex('only-here'))
+
+    def test_approximate_agent_weights(self):
+        agent = ApproximateQAgent(0, extractor = 'pacai.core.featureExtractors.SimpleExtractor')
+        state = PacmanGameState(getLayout('smallGrid'))
+
+        qValues = agent.getQValues(state)
+        self.assertEqual(set(qValues), set(state.getLegalActions()))
+
+        # New features start with a weight of one.
+        self.assertEqual(set(agent.getWeights().values()), set([1.0]))
+
+        action = agent.getPolicy(state)
+        self.assertEqual(qValues[action], agent.getValue(state))
+        self.assertEqual(qValues[action], max(qValues.values()))
+
+        nextState = state.generateSuccessor(0, action)
+        agent.alpha = 0.5
+        agent.update(state, action, nextState, -1.0)
+
+        self.assertNotEqual(agent.getQValue(state, action), qValues[action])
+
+def _searchFeatures(state, action):
+    """
+    The simple features, found with a search from the next position.
+    """
+
+    food = state.getFood()
+    walls = state.getWalls()
+    ghosts = state.getGhostPositions()
+
+    features = {}
+    features['bias'] = 1.0
+
+    x, y = state.getPacmanPosition()
+    dx, dy = Actions.directionToVector(action)
+    next_x, next_y = int(x + dx), int(y + dy)
+
+    features['#-of-ghosts-1-step-away'] = sum((next_x, next_y) in
+            Actions.getLegalNeighbors(g, walls) for g in ghosts)
+
+    if not features['#-of-ghosts-1-step-away'] and food[next_x][next_y]:
+        features['eats-food'] = 1.0
+
+    prob = AnyFoodSearchProblem(state, start = (next_x, next_y))
+    dist = len(search.bfs(prob))
+    features['closest-food'] = float(dist) / (walls.getWidth() * walls.getHeight())
+
+    for key in features:
+        features[key] /= 10.0
+
+    return features
@@ -0,0 +1,138 @@
+import random
+import unittest
+
+from pacai.bin.capture import CaptureGameState
+from pacai.bin.pacman import PacmanGameState
+from pacai.core.directions import Directions
+from pacai.core.gamestate import AbstractGameState
+from pacai.core.gamestate import StateCounters
+from pacai.core.grid import Grid
+from pacai.core.layout import Layout
+from pacai.core.layout import getLayout
+
+TEST_LAYOUT = [
+    '%%%%%%',
+    '%P..o%',
+    '%%%%%%',
+]
+
+GHOST_LAYOUT = [
+    '%%%%%%%',
+    '%Po.G.%',
+    '%%%%%%%',
+]
+
+"""
+Test game state bookkeeping.
+"""
+class GameStateTest(unittest.TestCase):
+    def test_hash_path_independent(self):
+        state = PacmanGameState(Layout(TEST_LAYOUT))
+
+        first = state.generateSuccessor(0, Directions.EAST).generateSuccessor(0, Directions.STOP)
+        second = state.generateSuccessor(0, Directions.STOP).generateSuccessor(0, Directions.EAST)
+
+        self.assertEqual(first, second)
+        self.assertEqual(hash(first), hash(second))
+
+        self.assertNotEqual(state, first)
+        self.assertNotEqual(hash(state), hash(first))
+
+    def test_hash_tracks_changes(self):
+        state = PacmanGameState(Layout(TEST_LAYOUT))
+        initialHash = hash(state)
+
+        successor = state.generateSuccessor(0, Directions.EAST)
+        self.assertEqual(initialHash, hash(state))
+
+        # Undo the move and the score change, only the eaten food should remain.
+        successor.getPacmanState().respawn()
+        successor.setScore(0)
+        self.assertNotEqual(initialHash, hash(successor))
+
+        hashes = {hash(successor)}
+
+        successor.endGame(False)
+        hashes.add(hash(successor))
+
+        successor.endGame(True)
+        hashes.add(hash(successor))
+
+        self.assertEqual(3, len(hashes))
+
+    def test_agent_states_shared(self):
+        state = PacmanGameState(Layout(GHOST_LAYOUT))
+
+        successor = state.generateSuccessor(0, Directions.EAST)
+
+        # Pacman moved, so it gets a new state.
+        # The ghost was only scared, so it is copied too and the parent is left untouched.
+        self.assertIsNot(state.getAgentState(0), successor.getAgentState(0))
+        self.assertIsNot(state.getAgentState(1), successor.getAgentState(1))
+        self.assertEqual((1, 1), state.getPacmanPosition())
+        self.assertFalse(state.getAgentState(1).isScared())
+        self.assertTrue(successor.getAgentState(1).isScared())
+
+        # Now only pacman moves, the ghost should be shared.
+        nextSuccessor = successor.generateSuccessor(0, Directions.WEST)
+        self.assertIsNot(successor.getAgentState(0), nextSuccessor.getAgentState(0))
+        self.assertIs(successor.getAgentState(1), nextSuccessor.getAgentState(1))
+        self.assertEqual((2, 1), successor.getPacmanPosition())
+
+    def test_counters(self):
+        state = PacmanGameState(Layout(TEST_LAYOUT))
+        counters = StateCounters()
+
+        AbstractGameState.setCounters(counters)
+        try:
+            for action in state.getLegalActions(0):
+                hash(state.generateSuccessor(0, action))
+        finally:
+            AbstractGameState.setCounters(None)
+
+        self.assertEqual({'generateSuccessor': 2, 'getLegalActions': 1, 'hash': 2},
+                counters.asDict())
+
+        # Nothing is counted when counting is off.
+        state.generateSuccessor(0, Directions.EAST)
+        self.assertEqual(2, counters.generateSuccessor)
+
+    def test_pack_pacman(self):
+        layout = getLayout('smallClassic')
+        self._checkPack(PacmanGameState(layout), layout, PacmanGameState)
+
+    def test_pack_list_food(self):
+        layout = getLayout('smallClassic', foodGridClass = Grid)
+        self.assertEqual(getLayout('smallClassic').food, layout.food)
+        self._checkPack(PacmanGameState(layout), layout, PacmanGameState)
+
+    def test_pack_capture(self):
+        layout = getLayout('tinyCapture')
+        self._checkPack(CaptureGameState(layout, 300), layout, CaptureGameState)
+
+    def _checkPack(self, state, layout, stateClass):
+        rng = random.Random(4)
+        records = set()
+
+        for move in range(200):
+            if (state.isOver()):
+                break
+
+            agentIndex = move % state.getNumAgents()
+            action = rng.choice(state.getLegalActions(agentIndex))
+            state = state.generateSuccessor(agentIndex, action)
+
+            record = state.pack()
+            unpacked = stateClass.unpack(layout, record)
+
+            self.assertEqual(state, unpacked)
+            self.assertEqual(hash(state), hash(unpacked))
+            self.assertEqual(record, unpacked.pack())
+            self.assertEqual(state.getNumFood(), unpacked.getNumFood())
+
+            records.add(record)
+
+        self.assertEqual(1, len({len(record) for record in records}))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import pickle
+import unittest
+
+from pacai.core.grid import BitGrid
+from pacai.core.grid import Grid
+
+"""
+Test that the bitmask grid behaves exactly like the list-backed grid.
+"""
+class GridTest(unittest.TestCase):
+    def _buildGrids(self, width, height, positions):
+        grid = Grid(width, height)
+        bitGrid = BitGrid(width, height)
+
+        for (x, y) in positions:
+            grid[x][y] = True
+            bitGrid[x][y] = True
+
+        return grid, bitGrid
+
+    def test_access(self):
+        positions = [(0, 0), (1, 2), (3, 1), (4, 3)]
+        grid, bitGrid = self._buildGrids(5, 4, positions)
+
+        for x in range(5):
+            for y in range(4):
+                self.assertEqual(grid[x][y], bitGrid[x][y])
+
+        self.assertEqual(grid.asList(), bitGrid.asList())
+        self.assertEqual(grid.asList(False), bitGrid.asList(False))
+        self.assertEqual(str(grid), str(bitGrid))
+
+        with self.assertRaises(IndexError):
+            bitGrid[0][4]
+
+    def test_count_and_hash(self):
+        positions = [(0, 0), (1, 2), (3, 1), (4, 3)]
+        grid, bitGrid = self._buildGrids(5, 4, positions)
+
+        self.assertEqual(grid.count(), bitGrid.count())
+        self.assertEqual(grid.count(False), bitGrid.count(False))
+        self.assertEqual(hash(grid), hash(bitGrid))
+
+        grid[1][2] = False
+        bitGrid[1][2] = False
+        bitGrid[1][2] = False
+
+        self.assertEqual(grid.count(), bitGrid.count())
+        self.assertEqual(hash(grid), hash(bitGrid))
+
+        full = BitGrid(70, 70, initialValue = True)
+        self.assertEqual(4900, full.count())
+        self.assertEqual(hash(full.getBits()), hash(full))
+
+    def test_equality(self):
+        grid, bitGrid = self._buildGrids(5, 4, [(0, 0), (3, 1)])
+
+        self.assertEqual(grid, bitGrid)
+        self.assertEqual(bitGrid, grid)
+        self.assertEqual(grid.getBits(), bitGrid.getBits())
+
+        grid[0][0] = False
+        self.assertNotEqual(grid, bitGrid)
+        self.assertNotEqual(bitGrid, grid)
+
+        self.assertNotEqual(Grid(4, 5), BitGrid(5, 4))
+
+    def test_copy(self):
+        _, bitGrid = self._buildGrids(5, 4, [(2, 2)])
+
+        copy = bitGrid.copy()
+        self.assertEqual(bitGrid, copy)
+
+        copy[2][2] = False
+        copy[0][1] = True
+
+        self.assertTrue(bitGrid[2][2])
+        self.assertFalse(bitGrid[0][1])
+        self.assertNotEqual(bitGrid, copy)
+        self.assertEqual(1, bitGrid.count())
+
+    def test_pickle(self):
+        _, bitGrid = self._buildGrids(5, 4, [(2, 2), (4, 0)])
+        bitGrid[0][0]
+
+        loaded = pickle.loads(pickle.dumps(bitGrid))
+        self.assertEqual(bitGrid, loaded)
+        self.assertEqual(hash(bitGrid), hash(loaded))
+        self.assertEqual(bitGrid.count(), loaded.count())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,248 @@
+import unittest
+
+from pacai.bin import gridworld
+from pacai.core.compiledMdp import CompiledMDP
+from pacai.core.mdp import MarkovDecisionProcess
+from pacai.student.valueIterationAgent import ValueIterationAgent
+
+GRID_NAMES = ['BookGrid', 'BridgeGrid', 'CliffGrid', 'Cliff2Grid', 'DiscountGrid', 'MazeGrid']
+
+class SplitChainMDP(MarkovDecisionProcess):
+    """
+    A chain of states that only pays out at the end,
+    where every step lists the next state many times (each with a small probability).
+    """
+
+    def __init__(self, length, splits):
+        self.length = length
+        self.splits = splits
+
+    def getStates(self):
+        return list(range(self.length + 1))
+
+    def getStartState(self):
+        return 0
+
+    def getPossibleActions(self, state):
+        if (self.isTerminal(state)):
+            return []
+
+        return ['go']
+
+    def getTransitionStatesAndProbs(self, state, action):
+        return [(state + 1, 0.9 / self.splits)] * self.splits + [(state, 0.1)]
+
+    def getReward(self, state, action, nextState):
+        if (nextState == self.length):
+            return 1.0
+
+        return 0.0
+
+    def isTerminal(self, state):
+        return state == self.length
+
+"""
+Test the compiled MDP tables against the MDPs they are compiled from.
+"""
+class CompiledMDPTest(unittest.TestCase):
+
+    def test_matches_python_backend(self):
+        for name in GRID_NAMES:
+            mdp = gridworld._getGridWorld(name)
+            mdp.setLivingReward(-0.1)
+            mdp.setNoise(0.3)
+
+            python = ValueIterationAgent(0, mdp, 0.9, 25, backend = 'python')
+            compiled = ValueIterationAgent(0, mdp, 0.9, 25, backend = 'compiled')
+
+            # The values are computed in the same order, so they should match exactly.
+            self.assertEqual(python.values, compiled.values, name)
+
+            for state in mdp.getStates():
+                self.assertEqual(python.getPolicy(state), compiled.getPolicy(state), name)
+
+                for action in mdp.getPossibleActions(state):
+                    self.assertEqual(python.getQValue(state, action),
+                            compiled.getQValue(state, action), name)
+
+    def test_tolerance(self):
+        mdp = gridworld._getGridWorld('BookGrid')
+        compiled = CompiledMDP(mdp)
+
+        values, iterations = compiled.valueIteration(0.9, tolerance = 1e-8)
+        self.assertLess(iterations, 1000)
+
+        # At convergence, another backup does not change anything.
+        nextValues = compiled.backup(values, 0.9)
+        for (value, nextValue) in zip(values, nextValues):
+            self.assertAlmostEqual(value, nextValue, places = 6)
+
+        agent = ValueIterationAgent(0, mdp, 0.9, 1000, tolerance = 1e-8)
+        self.assertEqual(agent.iterationsDone, iterations)
+
+        with self.assertRaises(ValueError):
+            compiled.valueIteration(0.9)
+
+    def test_evaluate_policy(self):
+        mdp = gridworld._getGridWorld('BookGrid')
+        compiled = CompiledMDP(mdp)
+
+        values, iterations = compiled.valueIteration(0.9, tolerance = 1e-10)
+        policy = compiled.getPolicy(values, 0.9)
+
+        # The optimal policy is worth the optimal values.
+        policyValues, iterations = compiled.evaluatePolicy(policy, 0.9, tolerance = 1e-10)
+        for (value, policyValue) in zip(values, policyValues):
+            self.assertAlmostEqual(value, policyValue, places = 6)
+
+        # Always going north from the start is worse.
+        start = mdp.getStartState()
+        policy[start] = 'north' if (policy[start] != 'north') else 'south'
+        worseValues, iterations = compiled.evaluatePolicy(policy, 0.9, tolerance = 1e-10)
+        startId = compiled.getStateId(start)
+        self.assertLess(worseValues[startId], values[startId])
+
+        policy[start] = 'exit'
+        with self.assertRaises(ValueError):
+            compiled.evaluatePolicy(policy, 0.9, iterations = 1)
+
+    def test_solvers(self):
+        for name in GRID_NAMES:
+            mdp = gridworld._getGridWorld(name)
+            compiled = CompiledMDP(mdp)
+
+            expected, iterations = compiled.valueIteration(0.9, tolerance = 1e-10)
+            expectedPolicy = compiled.getPolicy(expected, 0.9)
+
+            gaussSeidel, sweeps = compiled.gaussSeidel(0.9, tolerance = 1e-10)
+            prioritized, backups = compiled.prioritizedSweeping(0.9, tolerance = 1e-10)
+
+            for values in [gaussSeidel, prioritized]:
+                for (value, expectedValue) in zip(values, expected):
+                    self.assertAlmostEqual(value, expectedValue, places = 6, msg = name)
+
+                self.assertEqual(compiled.getPolicy(values, 0.9), expectedPolicy, name)
+
+            self.assertLessEqual(sweeps, iterations, name)
+
+    def test_prioritized_split_transitions(self):
+        mdp = SplitChainMDP(20, 10)
+        compiled = CompiledMDP(mdp)
+
+        # The probabilities of reaching the same state with one action add up.
+        stateId = compiled.getStateId(1)
+        predecessors = dict(compiled._getPredecessors()[stateId])
+        self.assertAlmostEqual(0.9, predecessors[compiled.getStateId(0)])
+        self.assertAlmostEqual(0.1, predecessors[stateId])
+
+        tolerance = 1e-6
+        values, backups = compiled.prioritizedSweeping(0.9, tolerance)
+
+        # Every residual is within the tolerance.
+        for (value, nextValue) in zip(values, compiled.backup(values, 0.9)):
+            self.assertLessEqual(abs(nextValue - value), tolerance)
+
+    def test_prioritized_counts(self):
+        # Every Bellman evaluation of a state is counted as a backup.
+        class CountingMDP(CompiledMDP):
+            evaluations = 0
+
+            def _getBestQValue(self, stateTransitions, values, discount):
+                CountingMDP.evaluations += 1
+                return super()._getBestQValue(stateTransitions, values, discount)
+
+        mdp = gridworld._getGridWorld('MazeGrid')
+        mdp.setNoise(0.3)
+
+        compiled = CountingMDP(mdp)
+        values, backups = compiled.prioritizedSweeping(0.9, 1e-8)
+
+        # The first pass over all the states (with actions) is one full backup.
+        numStates = len(compiled.getStates()) - 1
+        self.assertEqual(CountingMDP.evaluations + numStates, backups)
+        self.assertEqual(backups, compiled.getBackupCount())
+
+        capped = CountingMDP(mdp)
+        values, backups = capped.prioritizedSweeping(0.9, 1e-8, maxBackups = 2 * numStates)
+        self.assertEqual(2 * numStates, backups)
+
+    def test_prioritized_sparse_rewards(self):
+        # A long corridor with a single reward at the end.
+        grid = [[' '] * 30 + [10]]
+        grid[0][0] = 'S'
+        mdp = gridworld.Gridworld(grid)
+        mdp.setNoise(0.0)
+
+        synchronous = ValueIterationAgent(0, mdp, 0.9, 1000, tolerance = 1e-6)
+        prioritized = ValueIterationAgent(0, mdp, 0.9, 1000, tolerance = 1e-6,
+                solver = 'prioritized')
+
+        self.assertLess(prioritized.backupsDone * 5, synchronous.backupsDone)
+        self.assertEqual(0, prioritized.iterationsDone)
+
+        for state in mdp.getStates():
+            self.assertAlmostEqual(prioritized.getValue(state), synchronous.getValue(state),
+                    places = 4)
+            self.assertEqual(prioritized.getPolicy(state), synchronous.getPolicy(state))
+
+        # The backups are capped at the same amount of work as the given number of sweeps.
+        capped = ValueIterationAgent(0, mdp, 0.9, 2, solver = 'prioritized')
+        self.assertLessEqual(capped.backupsDone, 2 * len(mdp.getStates()))
+
+        with self.assertRaises(ValueError):
+            ValueIterationAgent(0, mdp, 0.9, 10, backend = 'python', solver = 'prioritized')
+
+    def test_counts(self):
+        mdp = gridworld._getGridWorld('BookGrid')
+        compiled = CompiledMDP(mdp)
+
+        # 11 cells and the terminal state.
+        self.assertEqual(compiled.getNumStates(), 12)
+
+        # 9 cells with 4 moves and 2 exits.
+        self.assertEqual(compiled.getNumPairs(), 9 * 4 + 2)
+
+        for state in mdp.getStates():
+            self.assertEqual(compiled.getStates()[compiled.getStateId(state)], state)
+
+"""
+Test the caches of the gridworld MDP.
+"""
+class GridworldTest(unittest.TestCase):
+
+    def test_transition_cache(self):
+        mdp = gridworld._getGridWorld('BookGrid')
+        start = mdp.getStartState()
+
+        transitions = mdp.getTransitionStatesAndProbs(start, 'north')
+        self.assertIs(mdp.getTransitionStatesAndProbs(start, 'north'), transitions)
+        self.assertAlmostEqual(dict(transitions)[(0, 1)], 0.8)
+
+        # The same noise keeps the cache.
+        mdp.setNoise(0.2)
+        self.assertIs(mdp.getTransitionStatesAndProbs(start, 'north'), transitions)
+
+        mdp.setNoise(0.0)
+        self.assertEqual(dict(mdp.getTransitionStatesAndProbs(start, 'north'))[(0, 1)], 1.0)
+
+        with self.assertRaises(Exception):
+            mdp.getTransitionStatesAndProbs(start, 'exit')
+
+    def test_reward_cache(self):
+        mdp = gridworld._getGridWorld('BookGrid')
+        start = mdp.getStartState()
+
+        self.assertEqual(mdp.getReward(start, 'north', (0, 1)), 0.0)
+        self.assertEqual(mdp.getReward((3, 2), 'exit', mdp.grid.terminalState), 1)
+
+        mdp.setLivingReward(-0.5)
+        self.assertEqual(mdp.getReward(start, 'north', (0, 1)), -0.5)
+        self.assertEqual(mdp.getReward((3, 2), 'exit', mdp.grid.terminalState), 1)
+
+    def test_states_cache(self):
+        mdp = gridworld._getGridWorld('BookGrid')
+
+        states = mdp.getStates()
+        self.assertIs(mdp.getStates(), states)
+        self.assertEqual(len(states), 12)
+        self.assertEqual(states[0], mdp.grid.terminalState)
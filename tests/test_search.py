@@ -0,0 +1,367 @@
+import random
+import unittest
+
+from pacai.agents.search.base import SearchAgent
+from pacai.agents.search.foodsearch import AStarFoodSearchAgent
+from pacai.bin import pacman
+from pacai.bin.pacman import PacmanGameState
+from pacai.core import distanceCalculator
+from pacai.core.layout import getLayout
+from pacai.core.search import anytime
+from pacai.core.search import foodField
+from pacai.core.search import heuristic
+from pacai.core.search import oracle
+from pacai.core.search.food import FoodSearchProblem
+from pacai.core.search.food import PackedFoodSearchProblem
+from pacai.core.search.foodField import NearestFoodField
+from pacai.core.search.graph import SearchTree
+from pacai.core.search.graph import graphSearch
+from pacai.core.search.oracle import MazeDistanceOracle
+from pacai.core.search.position import PositionSearchProblem
+from pacai.student import search
+from pacai.util.priorityQueue import IndexedPriorityQueue
+from pacai.util.priorityQueue import PriorityQueue
+from pacai.util.queue import Queue
+from pacai.util.stack import Stack
+
+"""
+Test the search algorithms against a plain graph search that copies the path into every node.
+"""
+class SearchTest(unittest.TestCase):
+    def test_same_as_copied_paths(self):
+        problems = [
+            (PositionSearchProblem, 'mediumMaze', heuristic.manhattan),
+            (PositionSearchProblem, 'openMaze', heuristic.manhattan),
+            (FoodSearchProblem, 'tinySearch', heuristic.numFood),
+        ]
+
+        for (problemClass, layoutName, searchHeuristic) in problems:
+            state = PacmanGameState(getLayout(layoutName))
+
+            searches = [
+                (search.depthFirstSearch, Stack, None),
+                (search.breadthFirstSearch, Queue, None),
+                (search.uniformCostSearch, PriorityQueue, lambda state, cost: cost),
+                (lambda problem: search.aStarSearch(problem, searchHeuristic), PriorityQueue,
+                    lambda state, cost: searchHeuristic(state, problem) + cost),
+            ]
+
+            for (searchFunction, fringeClass, priorityFunction) in searches:
+                problem = problemClass(state)
+                expected = self._copiedPathSearch(problem, fringeClass(), priorityFunction)
+
+                actual = problemClass(state)
+                self.assertEqual(expected, searchFunction(actual))
+
+                self.assertEqual(problem.getExpandedCount(), actual.getExpandedCount())
+                self.assertEqual(problem.getVisitHistory(), actual.getVisitHistory())
+
+    def test_indexed_fringe(self):
+        # Keying the fringe by state finds the same path, but never holds a state twice.
+        state = PacmanGameState(getLayout('openMaze'))
+        priorityFunction = lambda state, cost: heuristic.manhattan(state, problem) + cost
+
+        problem = PositionSearchProblem(state)
+        plainFringe = PriorityQueue()
+        expected = graphSearch(problem, plainFringe, priorityFunction)
+
+        indexedFringe = IndexedPriorityQueue()
+        self.assertEqual(expected, graphSearch(problem, indexedFringe, priorityFunction))
+
+        self.assertLess(len(indexedFringe.heap), len(plainFringe.heap))
+
+    def test_packed_food(self):
+        state = PacmanGameState(getLayout('tinySearch'))
+        problem = FoodSearchProblem(state)
+        packed = PackedFoodSearchProblem(state)
+
+        self.assertEqual(packed.startingState(), packed.packState(problem.startingState()))
+
+        # Walk both problems down the same (first) successors.
+        gridState = problem.startingState()
+        packedState = packed.startingState()
+
+        for i in range(20):
+            self.assertEqual(gridState, packed.unpackState(packedState))
+            self.assertEqual(problem.isGoal(gridState), packed.isGoal(packedState))
+            self.assertEqual(heuristic.numFood(gridState, problem),
+                    heuristic.numFood(packedState, packed))
+            self.assertEqual(problem.getFoodPositions(gridState),
+                    packed.getFoodPositions(packedState))
+
+            gridSuccessors = problem.successorStates(gridState)
+            packedSuccessors = packed.successorStates(packedState)
+
+            self.assertEqual([(packed.packState(successor), action, cost)
+                    for (successor, action, cost) in gridSuccessors], packedSuccessors)
+
+            gridState = gridSuccessors[i % len(gridSuccessors)][0]
+            packedState = packedSuccessors[i % len(packedSuccessors)][0]
+
+        actions = search.breadthFirstSearch(PackedFoodSearchProblem(state))
+        self.assertEqual(len(search.breadthFirstSearch(FoodSearchProblem(state))), len(actions))
+        self.assertEqual(len(actions), packed.actionsCost(actions))
+
+    def test_astar_food_agent(self):
+        # The food search agent uses packed states all the way through (including actionsCost).
+        state = PacmanGameState(getLayout('tinySearch'))
+        optimal = len(search.breadthFirstSearch(FoodSearchProblem(state)))
+
+        agent = AStarFoodSearchAgent(0)
+        agent.registerInitialState(state)
+
+        while (not state.isOver()):
+            state = state.generateSuccessor(0, agent.getAction(state))
+
+        self.assertTrue(state.isWin())
+        self.assertEqual(agent._actionIndex, optimal)
+
+        pacman.main(['-p', 'AStarFoodSearchAgent', '-l', 'tinySearch', '--null-graphics'])
+
+    def test_tree_paths(self):
+        tree = SearchTree()
+
+        north = tree.addNode(0, 'North', 1)
+        northEast = tree.addNode(north, 'East', 2)
+        northWest = tree.addNode(north, 'West', 2)
+        south = tree.addNode(0, 'South', 1)
+
+        self.assertEqual(['North', 'East'], tree.getPath(northEast))
+        self.assertEqual(2, tree.getDepth(northWest))
+        self.assertEqual([], tree.getPath(0))
+
+        for first in range(len(tree)):
+            for second in range(len(tree)):
+                expected = tree.getPath(first) < tree.getPath(second)
+                self.assertEqual(expected, tree.comparePaths(first, second) < 0)
+
+        self.assertGreater(tree.comparePaths(south, northWest), 0)
+
+    def _copiedPathSearch(self, problem, fringe, priorityFunction):
+        def push(item, cost):
+            if (priorityFunction is None):
+                fringe.push(item)
+            else:
+                fringe.push(item, priorityFunction(item[0], cost))
+
+        push((problem.startingState(), [], 0), 0)
+        explored = set()
+
+        while (not fringe.isEmpty()):
+            state, actions, cost = fringe.pop()
+            if (state in explored):
+                continue
+
+            if (problem.isGoal(state)):
+                return actions
+
+            explored.add(state)
+
+            for (successor, action, stepCost) in problem.successorStates(state):
+                if (successor not in explored):
+                    push((successor, actions + [action], cost + stepCost), cost + stepCost)
+
+        return None
+
+"""
+Test the bounded (weighted, anytime, and budgeted) variants of A*.
+"""
+class AnytimeSearchTest(unittest.TestCase):
+    PROBLEMS = [
+        (PositionSearchProblem, 'mediumMaze', heuristic.manhattan),
+        (PackedFoodSearchProblem, 'trickySearch', heuristic.foodSpanningTree),
+    ]
+
+    def test_bounds(self):
+        for (problemClass, layoutName, searchHeuristic) in self.PROBLEMS:
+            state = PacmanGameState(getLayout(layoutName))
+            optimal = len(search.aStarSearch(problemClass(state), searchHeuristic))
+
+            searches = [
+                lambda problem: anytime.budgetedAStarSearch(problem, searchHeuristic),
+                lambda problem: anytime.weightedAStarSearch(problem, searchHeuristic, 1.0),
+                lambda problem: anytime.weightedAStarSearch(problem, searchHeuristic, 3.0),
+                lambda problem: anytime.araStarSearch(problem, searchHeuristic),
+            ]
+
+            for searchFunction in searches:
+                problem = problemClass(state)
+                result = searchFunction(problem)
+
+                self.assertTrue(result.complete)
+                self.assertFalse(result.exhausted)
+                self.assertEqual(len(result.actions), result.cost)
+                self.assertEqual(result.cost, problem.actionsCost(result.actions))
+                self.assertLessEqual(result.cost, optimal * result.bound)
+
+            # ARA* only stops early when its path is optimal.
+            result = anytime.araStarSearch(problemClass(state), searchHeuristic)
+            self.assertEqual(1.0, result.bound)
+            self.assertEqual(optimal, result.cost)
+
+    def test_budget(self):
+        for (problemClass, layoutName, searchHeuristic) in self.PROBLEMS:
+            state = PacmanGameState(getLayout(layoutName))
+
+            for searchFunction in [anytime.budgetedAStarSearch, anytime.araStarSearch]:
+                problem = problemClass(state)
+                result = searchFunction(problem, searchHeuristic, budget = 10)
+
+                self.assertTrue(result.exhausted)
+                self.assertFalse(result.complete)
+                self.assertEqual(10, result.expanded)
+
+                # The best partial path is still a legal path.
+                self.assertGreater(len(result.actions), 0)
+                self.assertEqual(len(result.actions), problem.actionsCost(result.actions))
+
+    def test_search_agent(self):
+        state = PacmanGameState(getLayout('mediumMaze'))
+
+        agent = SearchAgent(0, fn = 'pacai.core.search.search.arastar',
+                heuristic = 'pacai.core.search.heuristic.manhattan', budget = '100000',
+                weight = '2.5')
+        agent.registerInitialState(state)
+
+        self.assertEqual(len(search.breadthFirstSearch(PositionSearchProblem(state))),
+                len(agent._actions))
+
+        with self.assertRaises(ValueError):
+            SearchAgent(0, fn = 'pacai.core.search.search.bfs', budget = '100')
+
+"""
+Test the nearest food fields (and their repairs) against the full distance tables.
+"""
+class NearestFoodFieldTest(unittest.TestCase):
+    def test_repairs(self):
+        for layoutName in ['mediumClassic', 'trickySearch']:
+            layout = getLayout(layoutName)
+            expected = distanceCalculator.computeDistances(layout)
+            actionTable = layout.getActionTable()
+            height = layout.height
+
+            field = NearestFoodField(actionTable)
+            food = layout.food.asList()
+            foodBits = layout.food.getBits()
+            rng = random.Random(25)
+
+            # Eat the food in a random order, repairing the field each time.
+            lastFoodEaten = None
+            while (True):
+                distances = field.getField(foodBits, lastFoodEaten)
+
+                for position in layout.walls.asList(False):
+                    nearest = min([expected[(position, foodPosition)] for foodPosition in food],
+                            default = foodField.UNREACHABLE)
+                    self.assertEqual(nearest, distances[actionTable.getCellId(position)])
+
+                if (len(food) == 0):
+                    break
+
+                lastFoodEaten = food.pop(rng.randrange(len(food)))
+                foodBits &= ~(1 << (lastFoodEaten[0] * height + lastFoodEaten[1]))
+
+            self.assertEqual(field.getSearchCount(), 1)
+            self.assertGreater(field.getRepairCount(), 0)
+
+    def test_cache(self):
+        layout = getLayout('smallClassic')
+        field = NearestFoodField(layout.getActionTable(), maxFields = 2)
+        foodBits = layout.food.getBits()
+
+        distances = field.getField(foodBits)
+        self.assertIs(field.getField(foodBits), distances)
+
+        field.getField(foodBits & (foodBits - 1))
+        field.getField(foodBits & (foodBits - 2))
+        self.assertEqual(field.getFieldCount(), 2)
+
+        self.assertIs(foodField.getNearestFoodField(layout.getActionTable()),
+                foodField.getNearestFoodField(layout.getActionTable()))
+
+"""
+Test the food distances (and the spanning tree heuristic) against the full distance tables.
+"""
+class FoodDistancesTest(unittest.TestCase):
+    def test_distances(self):
+        for layoutName in ['trickySearch', 'mediumSearch']:
+            layout = getLayout(layoutName)
+            expected = distanceCalculator.computeDistances(layout)
+            problem = FoodSearchProblem(PacmanGameState(layout))
+            distances = problem.getFoodDistances()
+
+            for position in layout.walls.asList(False):
+                cellId = problem.actionTable.getCellId(position)
+
+                for (foodIndex, foodPosition) in enumerate(problem.foodPositions):
+                    self.assertEqual(expected[(position, foodPosition)],
+                            distances.getDistance(cellId, foodIndex))
+
+    def test_tree_weights(self):
+        problem = FoodSearchProblem(PacmanGameState(getLayout('mediumSearch')))
+        distances = problem.getFoodDistances()
+        rng = random.Random(19)
+
+        for i in range(20):
+            foodIndexes = sorted(rng.sample(range(distances.getNumFood()), rng.randint(2, 60)))
+            foodMask = sum([1 << foodIndex for foodIndex in foodIndexes])
+
+            expected = distances._computeTreeWeightPrim(foodIndexes)
+            self.assertEqual(expected, distances._computeTreeWeightKruskal(foodIndexes))
+            self.assertEqual(expected, distances.getTreeWeight(foodMask))
+
+    def test_optimal(self):
+        for layoutName in ['tinySearch', 'trickySearch']:
+            state = PacmanGameState(getLayout(layoutName))
+
+            optimal = len(search.breadthFirstSearch(PackedFoodSearchProblem(state)))
+
+            for problemClass in [FoodSearchProblem, PackedFoodSearchProblem]:
+                problem = problemClass(state)
+                self.assertLessEqual(heuristic.foodSpanningTree(problem.startingState(), problem),
+                        optimal)
+
+                path = search.aStarSearch(problem, heuristic.foodSpanningTree)
+                self.assertEqual(optimal, len(path))
+
+"""
+Test the maze distance oracle against the full distance tables.
+"""
+class MazeDistanceOracleTest(unittest.TestCase):
+    def test_distances(self):
+        layout = getLayout('mediumMaze')
+        expected = distanceCalculator.computeDistances(layout)
+        cells = layout.walls.asList(False)
+
+        # Small enough for all-pairs, and with LRU eviction.
+        oracles = [
+            MazeDistanceOracle(layout.getActionTable(), allPairsMaxCells = len(cells)),
+            MazeDistanceOracle(layout.getActionTable(), maxRows = 3, allPairsMaxCells = 0),
+        ]
+
+        for distanceOracle in oracles:
+            for source in cells[::7]:
+                self.assertEqual([expected[(source, target)] for target in cells],
+                        distanceOracle.getDistances(source, cells))
+
+                for target in cells[::11]:
+                    self.assertEqual(expected[(source, target)],
+                            distanceOracle.getDistance(source, target))
+
+        self.assertTrue(oracles[0].isAllPairs())
+        self.assertEqual(len(cells), oracles[0].getRowCount())
+
+        self.assertFalse(oracles[1].isAllPairs())
+        self.assertEqual(3, oracles[1].getRowCount())
+
+        with self.assertRaises(ValueError):
+            oracles[1].getDistance((0, 0), cells[0])
+
+    def test_attached(self):
+        state = PacmanGameState(getLayout('tinySearch'))
+        problem = FoodSearchProblem(state)
+
+        self.assertIs(oracle.getDistanceOracle(state.getActionTable()), problem.distanceOracle)
+
+if __name__ == '__main__':
+    unittest.main()
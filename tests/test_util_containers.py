@@ -52,5 +52,32 @@ class UtilContainersTest(unittest.TestCase):
         for val, pri in reversed(val_list):
             self.assertEqual(val, testPriorityQueue.pop())
 
+    def test_indexed_priority_queue(self):
+        testPriorityQueue = priorityQueue.IndexedPriorityQueue()
+        self.assertTrue(testPriorityQueue.isEmpty())
+
+        for val in ['a', 'b', 'c', 'd']:
+            testPriorityQueue.push(val, 10)
+
+        # Only lower priorities replace the current one.
+        self.assertTrue(testPriorityQueue.decreaseKey('c', 1))
+        self.assertFalse(testPriorityQueue.decreaseKey('c', 5))
+        self.assertEqual(1, testPriorityQueue.getPriority('c'))
+
+        # Updates can also raise priorities.
+        testPriorityQueue.update('a', 20)
+        testPriorityQueue.remove('b')
+
+        self.assertEqual(3, len(testPriorityQueue))
+        self.assertNotIn('b', testPriorityQueue)
+
+        # Ties are broken in push order.
+        testPriorityQueue.push('e', 10)
+        self.assertEqual(['c', 'd', 'e', 'a'],
+                [testPriorityQueue.pop() for i in range(len(testPriorityQueue))])
+
+        self.assertTrue(testPriorityQueue.isEmpty())
+        self.assertRaises(IndexError, testPriorityQueue.pop)
+
 if __name__ == '__main__':
     unittest.main()